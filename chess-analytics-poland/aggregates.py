@@ -0,0 +1,129 @@
+# aggregates.py
+import logging
+
+from sqlalchemy import text
+
+# Per-player aggregates over player_games, so reports read a few rows per player instead of grouping games.
+# Triggers on player_games log every row added (+1) or removed (-1) to player_games_changes, and
+# refresh_aggregates folds the pending log into the tables and empties it, in one transaction. The tables only
+# ever see the changes since the last refresh, never a full recount.
+AGGREGATE_TABLES = {
+    "player_stats": ["player_key"],
+    "player_color_stats": ["player_key", "color"],
+    "player_eco_stats": ["player_key", "eco"],
+    "player_time_class_stats": ["player_key", "time_class"],
+    "player_pair_stats": ["player_key", "opponent_key", "color"],
+}
+KEY_TYPES = {"player_key": "INTEGER", "opponent_key": "INTEGER", "color": "TEXT", "eco": "TEXT", "time_class": "TEXT"}
+# Keys that are nullable in player_games; NULL is grouped as 'unknown', since it can't be part of a primary key
+NULLABLE_KEYS = {"eco", "time_class"}
+# Counter column -> one change row's contribution. Averages are sum / count, e.g. rating_sum / rated_games.
+COUNTERS = {
+    "games": "sign",
+    "wins": "CASE WHEN outcome = 'W' THEN sign ELSE 0 END",
+    "draws": "CASE WHEN outcome = 'D' THEN sign ELSE 0 END",
+    "losses": "CASE WHEN outcome = 'L' THEN sign ELSE 0 END",
+    "rating_sum": "sign * COALESCE(rating, 0)",
+    "rated_games": "CASE WHEN rating IS NOT NULL THEN sign ELSE 0 END",
+    "opponent_rating_sum": "sign * COALESCE(opponent_rating, 0)",
+    "opponent_rated_games": "CASE WHEN opponent_rating IS NOT NULL THEN sign ELSE 0 END",
+}
+CHANGE_COLUMNS = ["player_key", "opponent_key", "color", "outcome", "rating", "opponent_rating", "eco", "time_class"]
+# Serializes refreshes, so concurrent ingests fold the log one after another
+AGGREGATE_LOCK_KEY = 7340032
+
+CHANGES_DDL = """
+    CREATE TABLE IF NOT EXISTS player_games_changes (
+        sign SMALLINT NOT NULL,
+        player_key INTEGER NOT NULL,
+        opponent_key INTEGER,
+        color TEXT NOT NULL,
+        outcome CHAR(1),
+        rating INTEGER,
+        opponent_rating INTEGER,
+        eco TEXT,
+        time_class TEXT
+    );
+"""
+LOG_FUNCTION_DDL = f"""
+    CREATE OR REPLACE FUNCTION log_player_games_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO player_games_changes (sign, {', '.join(CHANGE_COLUMNS)})
+            SELECT 1, {', '.join(CHANGE_COLUMNS)} FROM added_rows;
+        ELSE
+            INSERT INTO player_games_changes (sign, {', '.join(CHANGE_COLUMNS)})
+            SELECT -1, {', '.join(CHANGE_COLUMNS)} FROM removed_rows;
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+"""
+TRIGGERS = {
+    "player_games_changes_insert": "AFTER INSERT ON player_games REFERENCING NEW TABLE AS added_rows",
+    "player_games_changes_delete": "AFTER DELETE ON player_games REFERENCING OLD TABLE AS removed_rows",
+}
+
+
+def aggregate_ddl(table, keys):
+    columns = [f"{key} {KEY_TYPES[key]} NOT NULL" for key in keys]
+    columns += [f"{name} {'BIGINT' if name.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0" for name in COUNTERS]
+    columns.append(f"PRIMARY KEY ({', '.join(keys)})")
+    return f"CREATE TABLE IF NOT EXISTS {table} (\n        " + ",\n        ".join(columns) + "\n    );"
+
+
+def key_expression(key, alias=None):
+    """The grouping expression for a key column of the change rows, qualified with alias if given."""
+    column = f"{alias}.{key}" if alias else key
+    return f"COALESCE({column}, 'unknown')" if key in NULLABLE_KEYS else column
+
+
+def fold_sql(table, keys, source):
+    """INSERT ... ON CONFLICT adding the summed contributions of the change rows in source (a table or
+    subquery with a sign column and the CHANGE_COLUMNS) to table's counters. Groups are written in key order,
+    so concurrent writers lock rows in the same order."""
+    groups = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    where = "WHERE opponent_key IS NOT NULL" if "opponent_key" in keys else ""
+    return f"""
+        INSERT INTO {table} ({', '.join(keys)}, {', '.join(COUNTERS)})
+        SELECT {', '.join(key_expression(key) for key in keys)},
+               {', '.join(f'SUM({expression})' for expression in COUNTERS.values())}
+        FROM {source}
+        {where}
+        GROUP BY {groups}
+        ORDER BY {groups}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+            {', '.join(f'{name} = {table}.{name} + EXCLUDED.{name}' for name in COUNTERS)}
+    """
+
+
+def refresh_aggregates(connection):
+    """Folds the pending player_games changes into the aggregate tables inside the caller's transaction and
+    returns the number of change rows applied. Groups whose games all went away are removed."""
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+    connection.execute(text("CREATE TEMP TABLE IF NOT EXISTS pending_changes ON COMMIT DROP AS SELECT * FROM player_games_changes WITH NO DATA"))
+    connection.execute(text("TRUNCATE pending_changes"))
+    # Only the rows this DELETE removes are folded, so changes logged meanwhile wait for the next refresh
+    taken = connection.execute(text("""
+        WITH taken AS (DELETE FROM player_games_changes RETURNING *)
+        INSERT INTO pending_changes SELECT * FROM taken
+    """)).rowcount
+    if not taken:
+        return 0
+    for table, keys in AGGREGATE_TABLES.items():
+        connection.execute(text(fold_sql(table, keys, "pending_changes")))
+        matches = " AND ".join(f"t.{key} = {key_expression(key, 'c')}" for key in keys)
+        connection.execute(text(f"DELETE FROM {table} t USING pending_changes c WHERE t.games = 0 AND {matches}"))
+    logging.info(f"Folded {taken} player_games changes into the aggregate tables.")
+    return taken
+
+
+def rebuild_aggregates(connection):
+    """Recomputes every aggregate table from player_games and drops the pending log, inside the caller's transaction."""
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+    connection.execute(text(f"TRUNCATE player_games_changes, {', '.join(AGGREGATE_TABLES)}"))
+    source = f"(SELECT 1 AS sign, {', '.join(CHANGE_COLUMNS)} FROM player_games) AS current_rows"
+    for table, keys in AGGREGATE_TABLES.items():
+        connection.execute(text(fold_sql(table, keys, source)))
+    logging.info("Rebuilt the aggregate tables from player_games.")
+
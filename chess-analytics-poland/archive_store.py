@@ -0,0 +1,82 @@
+# archive_store.py
+import gzip
+import io
+import json
+import logging
+import os
+import re
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Player directories live at the repository root unless CHESS_ARCHIVE_ROOT points elsewhere
+ARCHIVE_ROOT = os.environ.get("CHESS_ARCHIVE_ROOT", PROJECT_ROOT)
+
+ARCHIVE_SUFFIX = ".ndjson.gz"  # One gzip-compressed JSON game per line
+LEGACY_SUFFIX = ".json"  # Pretty-printed JSON list of games, as written by older versions
+READ_BUFFER_SIZE = 1 << 20
+ARCHIVE_NAME_RE = re.compile(r'^(?P<player>.+)_games_(?P<year>\d{4})_(?P<month>\d{2})(?P<suffix>\.ndjson\.gz|\.json)$')
+
+
+def player_data_dir(player):
+    """Directory holding a player's downloaded archives."""
+    return os.path.join(ARCHIVE_ROOT, player)
+
+
+def archive_filename(data_dir, player, year, month, suffix=ARCHIVE_SUFFIX):
+    return os.path.join(data_dir, f"{player}_games_{int(year):04d}_{int(month):02d}{suffix}")
+
+
+def find_archive(data_dir, player, year, month):
+    """Returns the path of the stored archive for a month, preferring the compressed format, or None."""
+    for suffix in (ARCHIVE_SUFFIX, LEGACY_SUFFIX):
+        path = archive_filename(data_dir, player, year, month, suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def write_archive(path, games):
+    """Writes games as gzip-compressed NDJSON, atomically replacing any previous copy."""
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        for game in games:
+            f.write(json.dumps(game, separators=(',', ':')))
+            f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def iter_archive(path):
+    """Streams games from an archive file one at a time; legacy JSON files are loaded whole."""
+    if path.endswith(ARCHIVE_SUFFIX):
+        # Binary lines skip the text-decoding layer; json.loads accepts UTF-8 bytes directly
+        with gzip.open(path, 'rb') as f:
+            for line in io.BufferedReader(f, READ_BUFFER_SIZE):
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def list_player_archives(data_dir, player):
+    """Returns the player's archive files sorted by month, one per month (compressed copy preferred)."""
+    by_month = {}
+    if not os.path.isdir(data_dir):
+        return []
+    for filename in os.listdir(data_dir):
+        match = ARCHIVE_NAME_RE.match(filename)
+        if not match or match.group("player") != player:
+            continue
+        month = (match.group("year"), match.group("month"))
+        if month not in by_month or match.group("suffix") == ARCHIVE_SUFFIX:
+            by_month[month] = os.path.join(data_dir, filename)
+    return [by_month[month] for month in sorted(by_month)]
+
+
+def iter_player_games(player, data_dir=None):
+    """Streams every stored game for a player, month by month. Unreadable files are logged and skipped."""
+    data_dir = data_dir or player_data_dir(player)
+    for path in list_player_archives(data_dir, player):
+        try:
+            yield from iter_archive(path)
+        except (IOError, EOFError, json.JSONDecodeError) as e:
+            logging.error(f"Error reading archive {path}: {e}")
@@ -0,0 +1,102 @@
+# batch_ingest.py
+import csv
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from db_connection import get_engine
+from rate_limiter import SharedTokenBucket
+
+# Per-player stages that can run inside the pool; visualize is interactive and analyze is global
+BATCH_STAGES = ["ingest", "backfill"]
+DEFAULT_PROCESSES = 4
+
+# Set in each worker by _init_worker
+_rate_limiter = None
+
+
+def read_usernames(players=None, players_file=None):
+    """Collects usernames from a comma-separated list and/or a file with one username per line (# comments allowed)."""
+    usernames = []
+    if players:
+        usernames.extend(players.split(","))
+    if players_file:
+        with open(players_file, 'r', encoding='utf-8') as f:
+            usernames.extend(line.split("#")[0] for line in f)
+    # Normalize and drop duplicates, keeping the given order
+    return list(dict.fromkeys(name.strip().lower() for name in usernames if name.strip()))
+
+
+def _init_worker(rate_limiter):
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+    # Pooled connections inherited from the parent over fork must not be reused by the child
+    get_engine().dispose(close=False)
+
+
+def _ingest_player(username, stages, options):
+    from main import run_pipeline
+    start = time.perf_counter()
+    try:
+        context = run_pipeline(username, stages, options, rate_limiter=_rate_limiter)
+        # Months whose download failed are retried on the next run, but this run didn't sync the player fully
+        failed_archives = context.get("failed_archives")
+        error = f"{len(failed_archives)} archives failed to download" if failed_archives else None
+        return {"player": username, "status": "failed" if error else "ok", "games_inserted": context.get("games_inserted", 0),
+                "timings": context["timings"], "elapsed": time.perf_counter() - start, "error": error}
+    except Exception as e:
+        logging.exception(f"Batch ingestion failed for {username}")
+        return {"player": username, "status": "failed", "games_inserted": 0,
+                "timings": {}, "elapsed": time.perf_counter() - start, "error": str(e)}
+
+
+def run_batch(usernames, stages, options, processes=DEFAULT_PROCESSES):
+    """Runs the per-player stages for every username across a process pool.
+
+    All workers draw from one shared request budget (options.rate), and a failing player is
+    recorded in the summary without stopping the others. Returns one summary dict per player.
+    """
+    stages = [stage for stage in stages if stage in BATCH_STAGES]
+    rate_limiter = SharedTokenBucket(options.rate, capacity=options.workers)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(rate_limiter,)) as executor:
+        futures = {executor.submit(_ingest_player, username, stages, options): username for username in usernames}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                results.append({"player": futures[future], "status": "failed", "games_inserted": 0,
+                                "timings": {}, "elapsed": 0.0, "error": str(e)})
+
+    order = {username: position for position, username in enumerate(usernames)}
+    results.sort(key=lambda result: order[result["player"]])
+    return results
+
+
+def print_summary(results, stages, summary_file=None):
+    """Prints games ingested and time per stage for each player, optionally writing the same table as CSV."""
+    stages = [stage for stage in stages if stage in BATCH_STAGES]
+    rows = [
+        {"player": result["player"], "status": result["status"], "games_inserted": result["games_inserted"],
+         **{f"{stage}_s": round(result["timings"].get(stage, 0.0), 1) for stage in stages},
+         "total_s": round(result["elapsed"], 1), "error": result["error"] or ""}
+        for result in results
+    ]
+
+    print("\n📋 Batch summary:")
+    for row in rows:
+        stage_times = "  ".join(f"{stage}={row[f'{stage}_s']:.1f}s" for stage in stages)
+        status = "✅" if row["status"] == "ok" else f"❌ {row['error']}"
+        print(f"  {row['player']:<20} {row['games_inserted']:>8} games  {stage_times}  total={row['total_s']:.1f}s  {status}")
+    failed = sum(1 for row in rows if row["status"] != "ok")
+    print(f"  {len(rows) - failed} succeeded, {failed} failed, "
+          f"{sum(row['games_inserted'] for row in rows)} games ingested in total.")
+
+    if summary_file:
+        with open(summary_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["player"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Summary written to {summary_file}")
@@ -0,0 +1,45 @@
+"""Benchmarks serial vs. concurrent archive downloads against the local mock Chess.com API.
+
+Usage: python benchmarks/bench_archive_download.py --archives 120 --latency 0.15
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rate_limiter import TokenBucket
+from scripts.connection_to_database import iter_archives
+from mock_chess_api import MockChessApi
+
+
+def run(archive_urls, workers, rate):
+    start = time.perf_counter()
+    games = sum(len(data) for _, data in iter_archives(archive_urls, workers, TokenBucket(rate, capacity=workers)))
+    return time.perf_counter() - start, games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--archives", type=int, default=120, help="Number of monthly archives to fetch")
+    parser.add_argument("--latency", type=float, default=0.15, help="Simulated per-request latency in seconds")
+    parser.add_argument("--games", type=int, default=50, help="Games per archive")
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second for concurrent runs (0 = unlimited)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with MockChessApi(synthetic_players=1, months=args.archives, games_per_month=args.games, latency=args.latency) as api:
+        archive_urls = api.archive_urls(api.players[0])
+        api.total_games()  # Build every response body up front so the timings measure transfer only
+
+        print(f"📦 {args.archives} archives, {args.latency * 1000:.0f} ms latency, {args.games} games each")
+        baseline = None
+        for workers in args.workers:
+            elapsed, games = run(archive_urls, workers, args.rate)
+            baseline = baseline or elapsed
+            print(f"  workers={workers:<3} {elapsed:7.2f}s  {games / elapsed:10.0f} games/s  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compares size and read speed of legacy pretty-printed JSON archives vs. compressed NDJSON.
+
+Usage: python benchmarks/bench_archive_store.py --months 24 --games 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import LEGACY_SUFFIX, archive_filename, iter_player_games, write_archive
+from pgn_headers import header_value
+
+HEADERS = ('[Event "Live Chess"]\n[Site "Chess.com"]\n[Date "2024.01.{day:02d}"]\n[White "bench"]\n[Black "opponent"]\n'
+           '[Result "1-0"]\n[ECO "C50"]\n[ECOUrl "https://www.chess.com/openings/Italian-Game"]\n\n')
+MOVETEXT = (" ".join(f"{n}. e4 {{[%clk 0:02:5{n % 10}.9]}} {n}... e5 {{[%clk 0:02:5{n % 10}.1]}}" for n in range(1, 41))
+            + " 1-0\n")
+
+
+def synthetic_month(games):
+    return [{
+        "url": f"https://www.chess.com/game/live/{i}", "uuid": f"bench-{i}", "pgn": HEADERS.format(day=i % 28 + 1) + MOVETEXT,
+        "time_control": "180", "end_time": 1704067200 + i * 60, "rated": True, "time_class": "blitz", "rules": "chess",
+        "white": {"rating": 1500, "result": "win", "username": "bench"},
+        "black": {"rating": 1480, "result": "resigned", "username": "opponent"},
+    } for i in range(games)]
+
+
+def time_read(data_dir):
+    start = time.perf_counter()
+    count = sum(1 for game in iter_player_games("bench", data_dir) if header_value(game["pgn"], "Date"))
+    return time.perf_counter() - start, count
+
+
+def peak_memory(data_dir):
+    tracemalloc.start()
+    for _ in iter_player_games("bench", data_dir):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def dir_size(data_dir):
+    return sum(os.path.getsize(os.path.join(data_dir, name)) for name in os.listdir(data_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--games", type=int, default=2000, help="Games per month")
+    args = parser.parse_args()
+
+    games = synthetic_month(args.games)
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as store_dir:
+        for month in range(args.months):
+            year, month = 2010 + month // 12, month % 12 + 1
+            with open(archive_filename(legacy_dir, "bench", year, month, LEGACY_SUFFIX), 'w', encoding='utf-8') as f:
+                json.dump(games, f, indent=4)
+            write_archive(archive_filename(store_dir, "bench", year, month), games)
+
+        print(f"📦 {args.months} months x {args.games} games")
+        for label, data_dir in (("legacy JSON", legacy_dir), ("NDJSON.gz", store_dir)):
+            elapsed, count = time_read(data_dir)
+            print(f"  {label:<12} {dir_size(data_dir) / 1e6:8.1f} MB on disk  read+scan {elapsed:6.2f}s  "
+                  f"{count / elapsed:10,.0f} games/s  peak memory {peak_memory(data_dir) / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmarks the COPY + ON CONFLICT loader against a scratch copy of the games table.
+
+Usage: python benchmarks/bench_bulk_load.py --games 500000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bulk_load import copy_insert
+from db_connection import get_engine
+from partitions import game_key_columns
+from scripts.connection_to_database import GAME_COLUMNS
+
+BENCH_TABLE = "games_bulk_bench"
+PGN = '[Event "Live Chess"]\n[Site "Chess.com"]\n[Date "2024.01.15"]\n[ECO "C50"]\n\n1. e4 {[%clk 0:02:59.9]} 1... e5 {[%clk 0:02:58.1]} 2. Nf3 {[%clk 0:02:57.3]} 1-0\n'
+
+
+def synthetic_rows(count):
+    for i in range(count):
+        yield {
+            "game_id": str(uuid.uuid4()),
+            "white_key": i % 1000 + 1,
+            "black_key": (i * 7) % 1000 + 1,
+            "white_rating": 1200 + i % 800,
+            "black_rating": 1200 + (i * 3) % 800,
+            "time_class": "blitz",
+            "time_control": "180",
+            "rules": "chess",
+            "pgn": PGN,
+            "start_time": "2024-01-15 12:00:00",
+            "winner": ("white", "black", "draw")[i % 3],
+            "date_time": "2024-01-15",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=500000)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    rows = list(synthetic_rows(args.games))
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        # A plain table with the same primary key as games (game_id, plus date_time once games is partitioned)
+        connection.execute(text(f"CREATE TABLE {BENCH_TABLE} (LIKE games INCLUDING ALL)"))
+        key_columns = game_key_columns(connection)
+
+    try:
+        for label in ("fresh load", "all duplicates"):
+            start = time.perf_counter()
+            with engine.begin() as connection:
+                inserted, skipped = copy_insert(connection, BENCH_TABLE, rows, GAME_COLUMNS, key_columns)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<15} {elapsed:7.2f}s  {len(rows) / elapsed * 60:12,.0f} games/min  "
+                  f"(inserted={inserted}, skipped={skipped})")
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compares movetext tokenization (moves + clocks + ply count) with chess.pgn.read_game and the old move counter.
+
+With python-chess installed the sample uses legal games so read_game parses them fully; otherwise it is skipped.
+
+Usage: python benchmarks/bench_movetext.py --games 200000
+"""
+import argparse
+import importlib.util
+import io
+import itertools
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game_extraction import split_pgn
+from pgn_movetext import tokenize_movetext
+from generate_corpus import generate_month
+
+SAMPLE_GAMES = 5000
+HAS_CHESS = importlib.util.find_spec("chess") is not None
+
+# The move counter this replaces: strip comments and move numbers, then count what is left
+COMMENT_RE = re.compile(r'\{[^}]*\}')
+MOVE_NUMBER_RE = re.compile(r'\d+\.(\.\.)?')
+
+
+def legacy_count(movetext):
+    return sum(1 for token in MOVE_NUMBER_RE.sub(' ', COMMENT_RE.sub(' ', movetext)).split()
+               if token not in {"1-0", "0-1", "1/2-1/2", "*"})
+
+
+def read_game_clocks(pgn):
+    import chess.pgn
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    return [node.move.uci() for node in game.mainline()], [node.clock() for node in game.mainline()]
+
+
+def measure(label, items, run, baseline=None):
+    start = time.perf_counter()
+    for item in items:
+        run(item)
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"  {label:<34} {elapsed:7.2f}s  {len(items) / elapsed:10,.0f} games/s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200000)
+    args = parser.parse_args()
+
+    sample = [game["pgn"] for game in generate_month("bench_player", 2024, 1, min(args.games, SAMPLE_GAMES), legal=HAS_CHESS)]
+    pgns = list(itertools.islice(itertools.cycle(sample), args.games))
+    movetexts = [split_pgn(pgn)[1] for pgn in pgns]
+    print(f"📦 {len(pgns):,} games, {sum(tokenize_movetext(m).plies for m in movetexts[:len(sample)]) / len(sample):.0f} plies on average")
+
+    measure("legacy move count (plies only)", movetexts, legacy_count)
+    tokenize = measure("tokenize_movetext (moves + clocks)", movetexts, tokenize_movetext)
+    if HAS_CHESS:
+        # read_game is far slower; time a slice and scale the rate
+        subset = pgns[:max(1, len(pgns) // 20)]
+        elapsed = measure("chess.pgn.read_game (1/20 sample)", subset, read_game_clocks)
+        print(f"  tokenize_movetext is x{(elapsed / len(subset)) / (tokenize / len(movetexts)):.0f} faster than read_game")
+    else:
+        print("  (python-chess not installed, skipping chess.pgn.read_game)")
+
+
+if __name__ == "__main__":
+    main()
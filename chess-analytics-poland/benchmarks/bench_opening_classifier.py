@@ -0,0 +1,54 @@
+"""Times compiling the openings sheet into a trie vs. loading the pickle cache, and classification throughput.
+
+Usage: python benchmarks/bench_opening_classifier.py --games 200000
+"""
+import argparse
+import collections
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game_extraction import split_pgn
+from generate_corpus import generate_month
+from opening_classifier import build_opening_trie, classify_moves, load_opening_trie, _tries
+from pgn_movetext import tokenize_movetext
+
+SAMPLE_GAMES = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_opening_trie()
+    build = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, "trie.pickle")
+        load_opening_trie(cache_path=cache_path)
+        _tries.clear()
+        start = time.perf_counter()
+        trie = load_opening_trie(cache_path=cache_path)
+        load = time.perf_counter() - start
+    print(f"  build trie from CSV   {build * 1000:7.1f} ms")
+    print(f"  load pickled trie     {load * 1000:7.1f} ms  x{build / load:.1f}")
+
+    sample = [tokenize_movetext(split_pgn(game["pgn"])[1]).moves
+              for game in generate_month("bench_player", 2024, 1, min(args.games, SAMPLE_GAMES))]
+    games = list(itertools.islice(itertools.cycle(sample), args.games))
+    start = time.perf_counter()
+    results = [classify_moves(moves, trie) for moves in games]
+    elapsed = time.perf_counter() - start
+    print(f"  classify_moves        {elapsed:7.2f} s  {len(games) / elapsed:10,.0f} games/s")
+
+    names = collections.Counter(name for _, name, _ in results[:len(sample)])
+    print(f"📖 {len(names)} distinct openings in the sample; most common: {names.most_common(3)}")
+
+
+if __name__ == "__main__":
+    main()
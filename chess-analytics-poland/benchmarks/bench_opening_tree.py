@@ -0,0 +1,38 @@
+"""Measures opening tree aggregation speed and tree size (rows stored per player) by tree depth.
+
+Usage: python benchmarks/bench_opening_tree.py --games 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game_extraction import extract_game
+from generate_corpus import generate_month, month_range
+from opening_tree import tree_deltas
+
+PLAYER = "bench_player"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50000)
+    parser.add_argument("--depths", default="10,20,40", help="Comma-separated tree depths in plies")
+    args = parser.parse_args()
+
+    months = max(1, args.games // 2000)
+    games = [extract_game(game) for year, month in month_range((2024, 1), months)
+             for game in generate_month(PLAYER, year, month, args.games // months)]
+    print(f"📦 {len(games):,} games for one player")
+
+    for depth in (int(depth) for depth in args.depths.split(",")):
+        start = time.perf_counter()
+        nodes = tree_deltas(PLAYER, games, depth)
+        elapsed = time.perf_counter() - start
+        print(f"  depth {depth:>3}  {elapsed:6.2f}s  {len(games) / elapsed:10,.0f} games/s  {len(nodes):10,} nodes")
+
+
+if __name__ == "__main__":
+    main()
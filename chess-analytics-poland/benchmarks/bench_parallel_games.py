@@ -0,0 +1,74 @@
+"""Measures how parallel_games scales with worker processes on a synthetic player's archives.
+
+Each game is split and its movetext tokenized, a stand-in for heavier per-game analysis. With python-chess
+installed, --replay replays every game on a board instead, the CPU-bound case the pool exists for.
+
+Usage: python benchmarks/bench_parallel_games.py --months 24 --games 2000 [--replay]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import archive_filename, iter_player_games, write_archive
+from game_extraction import split_pgn
+from generate_corpus import generate_month, month_range
+from parallel_games import map_player_games
+from pgn_movetext import tokenize_movetext
+
+PLAYER = "bench_player"
+
+
+def game_plies(game):
+    return tokenize_movetext(split_pgn(game["pgn"])[1]).plies
+
+
+def replay_plies(game):
+    import chess.pgn
+    board = chess.pgn.read_game(io.StringIO(game["pgn"])).end().board()
+    return len(board.move_stack)
+
+
+def process_counts(limit):
+    counts, processes = [], 1
+    while processes < limit:
+        counts.append(processes)
+        processes *= 2
+    return counts + [limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--games", type=int, default=2000, help="Games per month")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--replay", action="store_true", help="Replay every game with python-chess")
+    args = parser.parse_args()
+    func = replay_plies if args.replay else game_plies
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for year, month in month_range((2022, 1), args.months):
+            write_archive(archive_filename(data_dir, PLAYER, year, month),
+                          generate_month(PLAYER, year, month, args.games, legal=args.replay))
+        total = args.months * args.games
+        print(f"📦 {total:,} games in {args.months} archives, {func.__name__} per game")
+
+        start = time.perf_counter()
+        expected = [func(game) for game in iter_player_games(PLAYER, data_dir)]
+        serial = time.perf_counter() - start
+        print(f"  {'serial':<14} {serial:7.2f}s  {total / serial:10,.0f} games/s")
+
+        for processes in process_counts(args.processes):
+            start = time.perf_counter()
+            results = list(map_player_games(func, PLAYER, processes, data_dir))
+            elapsed = time.perf_counter() - start
+            assert results == expected, "parallel results differ from the serial run"
+            print(f"  {f'{processes} processes':<14} {elapsed:7.2f}s  {total / elapsed:10,.0f} games/s  x{serial / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
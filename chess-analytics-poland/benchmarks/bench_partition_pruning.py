@@ -0,0 +1,80 @@
+"""Checks that date-bounded queries on games only scan the monthly partitions they cover, using EXPLAIN ANALYZE.
+
+For each query it prints the execution time and how many of the games partitions the plan reads, and fails if
+a query reads more months than its date range spans. Run scripts/partition_games.py first on older databases.
+
+Usage: python benchmarks/bench_partition_pruning.py [--months 3] [--runs 5]
+"""
+import argparse
+import datetime
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from partitions import is_partitioned, list_partitions, month_start, next_month
+
+QUERIES = [
+    ("recent games by time class",
+     "SELECT time_class, COUNT(*), AVG(white_rating) FROM games WHERE date_time >= :since GROUP BY time_class"),
+    ("recent results",
+     "SELECT winner, COUNT(*) FROM games WHERE date_time >= :since AND date_time < :until GROUP BY winner"),
+    ("recent openings",
+     "SELECT book_opening, COUNT(*) FROM games WHERE date_time >= :since GROUP BY book_opening ORDER BY 2 DESC LIMIT 10"),
+]
+
+
+def scanned_partitions(plan):
+    """Yields the games partitions an EXPLAIN JSON plan reads."""
+    if plan.get("Relation Name", "").startswith("games_") and plan.get("Actual Loops", 1):
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from scanned_partitions(child)
+
+
+def explain(connection, sql, params, runs):
+    """Returns (best execution time in ms, partitions read) over several EXPLAIN ANALYZE runs. Partitions
+    pruned at run time can still show up in the plan, never executed, so only executed scans count."""
+    best, partitions = None, set()
+    for _ in range(runs):
+        result = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params).scalar()
+        elapsed = result[0]["Execution Time"]
+        best = elapsed if best is None else min(best, elapsed)
+        partitions = set(scanned_partitions(result[0]["Plan"]))
+    return best, partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=3, help="Months covered by the date-bounded queries")
+    parser.add_argument("--runs", type=int, default=5, help="EXPLAIN ANALYZE runs per query; the best is reported")
+    args = parser.parse_args()
+
+    failures = 0
+    with get_engine().connect() as connection:
+        if not is_partitioned(connection):
+            sys.exit("games is not partitioned yet: run scripts/partition_games.py first.")
+        total = len(list_partitions(connection))
+        latest = connection.execute(text("SELECT MAX(date_time) FROM games")).scalar() or datetime.date.today()
+        until = next_month(month_start(latest))
+        since = until
+        for _ in range(args.months):
+            since = month_start(since - datetime.timedelta(days=1))
+        params = {"since": since, "until": until}
+        print(f"📦 {total} partitions, date range {since} to {until}")
+        for label, sql in QUERIES:
+            elapsed, partitions = explain(connection, sql, params, args.runs)
+            print(f"  {label:<28} {elapsed:9.2f} ms  {len(partitions)}/{total} partitions")
+            if len(partitions) > args.months:
+                failures += 1
+                print(f"  ❌ {label} reads {len(partitions)} partitions for a {args.months}-month range")
+    if failures:
+        sys.exit(1)
+    print("✅ Every date-bounded query is pruned to the months it covers.")
+
+
+if __name__ == "__main__":
+    main()
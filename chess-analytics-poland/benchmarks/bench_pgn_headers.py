@@ -0,0 +1,85 @@
+"""Compares PGN header extraction throughput: the old per-tag re.search calls vs. the one-pass scanner.
+
+Games come from a corpus in the archive store layout (see generate_corpus.py) or, by default, from a
+synthetic sample cycled up to --games, so millions of games fit in memory.
+
+Usage: python benchmarks/bench_pgn_headers.py --games 2000000
+       python benchmarks/bench_pgn_headers.py --corpus /data/corpus --games 5000000
+"""
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import iter_player_games
+from pgn_headers import header_value, scan_header_column, scan_headers
+from generate_corpus import generate_month
+
+SAMPLE_GAMES = 20000
+TAGS = ["Date", "ECO"]
+
+
+# The extraction code this replaces: one regex search per tag and per call site
+def legacy_date(pgn):
+    match = re.search(r'\[Date\s+"(.*?)"\]', pgn, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def legacy_eco(pgn):
+    match = re.search(r'\[ECO\s+"(.*?)"\]', pgn)
+    return match.group(1) if match else None
+
+
+def legacy_all(pgn):
+    return dict(re.findall(r'\[(\w+)\s+"(.*?)"\]', pgn.partition("\n\n")[0]))
+
+
+def load_pgns(corpus, games):
+    if corpus:
+        source = (game["pgn"] for player in sorted(os.listdir(corpus))
+                  for game in iter_player_games(player, os.path.join(corpus, player)))
+        return list(itertools.islice(source, games))
+    sample = [game["pgn"] for game in generate_month("bench_player", 2024, 1, min(games, SAMPLE_GAMES))]
+    return list(itertools.islice(itertools.cycle(sample), games))
+
+
+def measure(label, pgns, run, baseline=None):
+    start = time.perf_counter()
+    run(pgns)
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"  {label:<38} {elapsed:7.2f}s  {len(pgns) / elapsed:12,.0f} games/s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--corpus", help="Archive root to read real or generated games from")
+    args = parser.parse_args()
+
+    pgns = load_pgns(args.corpus, args.games)
+    print(f"📦 {len(pgns):,} games, tags {TAGS}")
+
+    two_tags = measure("re.search per tag (Date, ECO)", pgns, lambda p: [(legacy_date(g), legacy_eco(g)) for g in p])
+    measure("header_value per tag (Date, ECO)", pgns, lambda p: [(header_value(g, "Date"), header_value(g, "ECO")) for g in p], two_tags)
+
+    full = measure("re.findall, all tags", pgns, lambda p: [legacy_all(g) for g in p])
+    measure("scan_headers, all tags", pgns, lambda p: [scan_headers(g) for g in p], full)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print("  (pandas not installed, skipping the batch scan)")
+        return
+    series = pd.Series(pgns)
+    apply = measure("Series.apply(re.search) per tag", series, lambda s: [s.apply(legacy_eco), s.apply(legacy_date)])
+    measure("scan_header_column (Date, ECO)", series, lambda s: scan_header_column(s, TAGS), apply)
+
+
+if __name__ == "__main__":
+    main()
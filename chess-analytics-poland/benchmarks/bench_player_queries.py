@@ -0,0 +1,95 @@
+"""Compares the old OR-filtered per-player queries on games with their player_games range-scan rewrites
+using EXPLAIN ANALYZE.
+
+For each query it prints the execution time and the scan nodes on games and player_games, and checks that the
+rewrite never falls back to a sequential scan. Run scripts/create_indexes.py first.
+
+Usage: python benchmarks/bench_player_queries.py [player] [--runs 5]
+"""
+import argparse
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from player_queries import PLAYER_GAME_IDS_SQL, PLAYER_GAME_ROWS_SQL
+from players import PLAYER_KEY_SQL
+
+OR_FILTER = f"(white_key = ({PLAYER_KEY_SQL}) OR black_key = ({PLAYER_KEY_SQL}))"
+VISUALIZE_COLUMNS = "white_key, white_rating, black_key, black_rating, winner, date_time, time_control"
+
+QUERIES = [
+    ("visualize: player games",
+     f"SELECT {VISUALIZE_COLUMNS} FROM games WHERE {OR_FILTER} ORDER BY date_time",
+     PLAYER_GAME_ROWS_SQL),
+    ("dashboard: latest 100 games",
+     f"SELECT date_time, eco, winner FROM games WHERE {OR_FILTER} ORDER BY date_time DESC LIMIT 100",
+     f"SELECT date_time, eco, outcome FROM player_games WHERE player_key = ({PLAYER_KEY_SQL}) ORDER BY date_time DESC LIMIT 100"),
+    ("backfill: player game ids",
+     f"SELECT game_id FROM games WHERE {OR_FILTER}",
+     f"SELECT game_id FROM games WHERE game_id IN ({PLAYER_GAME_IDS_SQL})"),
+    ("eco: games per opening",
+     "SELECT eco, COUNT(*) FROM games WHERE eco = 'C50' GROUP BY eco",
+     None),
+    ("time_class: bullet games",
+     "SELECT COUNT(*) FROM games WHERE time_class = 'bullet'",
+     None),
+]
+
+
+SCANNED_TABLES = {"games", "player_games"}
+
+
+def scans(plan):
+    """Yields "<node type> on <table>" (Seq Scan, Index Scan, ...) for every read of the games or player_games
+    tables in an EXPLAIN JSON plan."""
+    if plan.get("Relation Name") in SCANNED_TABLES:
+        yield f"{plan['Node Type']} on {plan['Relation Name']}"
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+def explain(connection, sql, player, runs):
+    """Returns (best execution time in ms, scan nodes) over several EXPLAIN ANALYZE runs."""
+    best, nodes = None, []
+    for _ in range(runs):
+        result = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), {"player": player}).scalar()
+        elapsed = result[0]["Execution Time"]
+        best = elapsed if best is None else min(best, elapsed)
+        nodes = sorted(set(scans(result[0]["Plan"])))
+    return best, nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("player", nargs="?", help="Player to query (default: the one with the most games as white)")
+    parser.add_argument("--runs", type=int, default=5, help="EXPLAIN ANALYZE runs per query; the best is reported")
+    args = parser.parse_args()
+
+    failures = 0
+    with get_engine().connect() as connection:
+        player = (args.player or connection.execute(text(
+            "SELECT p.handle FROM games g JOIN players p ON p.player_key = g.white_key "
+            "GROUP BY p.handle ORDER BY COUNT(*) DESC LIMIT 1")).scalar() or "").lower()
+        total = connection.execute(text("SELECT COUNT(*) FROM games")).scalar()
+        print(f"📦 {total:,} games, player {player!r}")
+        for label, old_sql, new_sql in QUERIES:
+            old_ms, old_scans = explain(connection, old_sql, player, args.runs)
+            print(f"  {label:<28} {'before' if new_sql else 'indexed':<8} {old_ms:9.2f} ms  {', '.join(old_scans)}")
+            checked_ms, checked_scans = (old_ms, old_scans)
+            if new_sql:
+                checked_ms, checked_scans = explain(connection, new_sql, player, args.runs)
+                print(f"  {'':<28} {'after':<8} {checked_ms:9.2f} ms  {', '.join(checked_scans)}  x{old_ms / checked_ms:.1f}")
+            if any(node.startswith("Seq Scan") for node in checked_scans):
+                failures += 1
+                print(f"  ❌ {label} still scans sequentially")
+    if failures:
+        sys.exit(1)
+    print("✅ Every query is served by index scans.")
+
+
+if __name__ == "__main__":
+    main()
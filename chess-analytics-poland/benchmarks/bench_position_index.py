@@ -0,0 +1,43 @@
+"""Measures position indexing throughput: replaying games and hashing every ply, serially and across processes.
+
+Usage: python benchmarks/bench_position_index.py --games 20000 --processes 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game_extraction import split_pgn
+from generate_corpus import generate_month
+from parallel_games import map_game_batches
+from pgn_movetext import tokenize_movetext
+from position_index import replay_positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    games = [(game["uuid"], tokenize_movetext(split_pgn(game["pgn"])[1]).moves)
+             for game in generate_month("bench_player", 2024, 1, args.games, legal=True)]
+    print(f"📦 {len(games):,} legal games")
+
+    start = time.perf_counter()
+    positions = sum(len(rows) for _, rows in map(replay_positions, games))
+    serial = time.perf_counter() - start
+    print(f"  {'serial':<14} {serial:7.2f}s  {len(games) / serial:8,.0f} games/s  {positions / serial:10,.0f} positions/s")
+
+    start = time.perf_counter()
+    for _ in map_game_batches(replay_positions, games, args.processes, chunk_size=500):
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"  {f'{args.processes} processes':<14} {elapsed:7.2f}s  {len(games) / elapsed:8,.0f} games/s  x{serial / elapsed:.1f}")
+    print(f"  {positions / len(games):.0f} distinct positions per game")
+
+
+if __name__ == "__main__":
+    main()
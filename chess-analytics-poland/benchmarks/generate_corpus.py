@@ -0,0 +1,235 @@
+"""Generates a synthetic Chess.com-shaped game corpus for scale testing.
+
+Writes one archive per player and month in the archive store layout that ingestion and the
+backfill scripts read (<output>/<player>/<player>_games_YYYY_MM.ndjson.gz). Games carry the
+usual Chess.com PGN headers (Date, ECO, ECOUrl, Elo, TimeControl, Termination...), movetext with
+%clk annotations, ratings and results. Openings come from data/openings_sheet.csv. Past the
+opening, moves are random SAN-shaped tokens unless --legal-moves is given, which plays random
+legal moves with python-chess (much slower, needed only for board-replay benchmarks).
+
+Generation is deterministic for a given --seed and streams month by month, so it scales to tens of
+millions of games; --processes spreads players over CPU cores.
+
+Usage: python benchmarks/generate_corpus.py --players 1000 --months 60 --games 150 --output /data/corpus --processes 8
+"""
+import argparse
+import calendar
+import csv
+import os
+import random
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import ARCHIVE_ROOT, archive_filename, write_archive
+
+OPENINGS_SHEET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "openings_sheet.csv")
+
+# (time_control, time_class, base seconds, increment)
+TIME_CONTROLS = [
+    ("60", "bullet", 60, 0), ("120+1", "bullet", 120, 1), ("180", "blitz", 180, 0), ("180+2", "blitz", 180, 2),
+    ("300", "blitz", 300, 0), ("600", "rapid", 600, 0), ("900+10", "rapid", 900, 10), ("1/86400", "daily", 86400, 0),
+]
+TIME_CONTROL_WEIGHTS = [8, 4, 20, 10, 15, 25, 10, 8]
+# (white result, black result, PGN result, termination template)
+OUTCOMES = [
+    ("win", "resigned", "1-0", "{white} won by resignation"),
+    ("win", "checkmated", "1-0", "{white} won by checkmate"),
+    ("win", "timeout", "1-0", "{white} won on time"),
+    ("resigned", "win", "0-1", "{black} won by resignation"),
+    ("checkmated", "win", "0-1", "{black} won by checkmate"),
+    ("timeout", "win", "0-1", "{black} won on time"),
+    ("agreed", "agreed", "1/2-1/2", "Game drawn by agreement"),
+    ("repetition", "repetition", "1/2-1/2", "Game drawn by repetition"),
+    ("stalemate", "stalemate", "1/2-1/2", "Game drawn by stalemate"),
+    ("insufficient", "insufficient", "1/2-1/2", "Game drawn by insufficient material"),
+]
+OUTCOME_WEIGHTS = [22, 8, 8, 20, 8, 8, 10, 6, 2, 3]
+FILES = "abcdefgh"
+PIECES = "NBRQK"
+
+_openings = None
+
+
+def load_openings():
+    """Returns [(eco, name, [san, ...])] from the openings sheet, loaded once per process."""
+    global _openings
+    if _openings is None:
+        with open(OPENINGS_SHEET, 'r', encoding='utf-8') as f:
+            _openings = [(row["ECO"], row["name"], row["moves"].split()) for row in csv.DictReader(f)]
+    return _openings
+
+
+def eco_url(name):
+    """Builds a Chess.com-style opening URL from an opening name."""
+    slug = re.sub(r"[^A-Za-z0-9.]+", "-", name.split(";")[0].replace("'", "")).strip("-")
+    return f"https://www.chess.com/openings/{slug}"
+
+
+def random_san(rng):
+    """A SAN-shaped move token; not necessarily legal."""
+    square = f"{rng.choice(FILES)}{rng.randint(1, 8)}"
+    roll = rng.random()
+    if roll < 0.3:
+        move = square
+    elif roll < 0.4:
+        move = f"{rng.choice(FILES)}x{square}"
+    elif roll < 0.42:
+        move = rng.choice(["O-O", "O-O-O"])
+    else:
+        move = f"{rng.choice(PIECES)}{'x' if rng.random() < 0.25 else ''}{square}"
+    return move + ("+" if rng.random() < 0.07 else "")
+
+
+def legal_moves(rng, opening_moves, plies):
+    """Plays the opening and then random legal moves with python-chess, returning SAN moves."""
+    import chess
+    board = chess.Board()
+    moves = []
+    for san in opening_moves:
+        try:
+            move = board.parse_san(san)
+        except ValueError:
+            break  # A few sheet lines are malformed; continue from the last legal position
+        moves.append(board.san(move))
+        board.push(move)
+    while len(moves) < plies and not board.is_game_over():
+        move = rng.choice(list(board.legal_moves))
+        moves.append(board.san(move))
+        board.push(move)
+    return moves
+
+
+def format_clock(seconds):
+    seconds = max(0.0, seconds)
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:04.1f}"
+
+
+def build_movetext(rng, moves, base, increment, result):
+    """Interleaves move numbers, SAN moves and {[%clk H:MM:SS.d]} comments the way Chess.com exports them."""
+    clocks = [float(base), float(base)]
+    parts = []
+    for ply, san in enumerate(moves):
+        side = ply % 2
+        clocks[side] = clocks[side] - rng.uniform(0.1, base / 40) + increment
+        number = ply // 2 + 1
+        parts.append(f"{number}{'.' if side == 0 else '...'} {san} {{[%clk {format_clock(clocks[side])}]}}")
+    parts.append(result)
+    return " ".join(parts)
+
+
+def generate_month(player, year, month, games, seed=0, legal=False):
+    """Yields one month of Chess.com archive entries for a synthetic player, in end_time order."""
+    rng = random.Random(f"{seed}:{player}:{year}:{month}")
+    openings = load_openings()
+    player_rating = random.Random(f"{seed}:{player}").randint(600, 2700)
+    month_start = calendar.timegm((year, month, 1, 0, 0, 0))
+    month_seconds = calendar.monthrange(year, month)[1] * 86400
+    end_times = sorted(month_start + rng.randrange(month_seconds) for _ in range(games))
+
+    for end_time in end_times:
+        time_control, time_class, base, increment = rng.choices(TIME_CONTROLS, TIME_CONTROL_WEIGHTS)[0]
+        white_result, black_result, result, termination = rng.choices(OUTCOMES, OUTCOME_WEIGHTS)[0]
+        opponent = f"opponent_{rng.randrange(100000):05d}"
+        white, black = (player, opponent) if rng.random() < 0.5 else (opponent, player)
+        player_rating = max(100, player_rating + rng.randint(-8, 8))
+        opponent_rating = max(100, player_rating + rng.randint(-150, 150))
+        white_elo, black_elo = (player_rating, opponent_rating) if white == player else (opponent_rating, player_rating)
+
+        eco, name, opening_moves = rng.choice(openings)
+        plies = rng.randint(max(len(opening_moves), 20), 140)
+        if legal:
+            moves = legal_moves(rng, opening_moves, plies)
+        else:
+            moves = opening_moves + [random_san(rng) for _ in range(plies - len(opening_moves))]
+
+        duration = rng.randint(30, base * 2 if base < 86400 else 86400 * 5)
+        start = time.gmtime(end_time - duration)
+        end = time.gmtime(end_time)
+        game_id = rng.getrandbits(36)
+        link = f"https://www.chess.com/game/{'daily' if time_class == 'daily' else 'live'}/{game_id}"
+        headers = [
+            ("Event", "Let's Play!" if time_class == "daily" else "Live Chess"), ("Site", "Chess.com"),
+            ("Date", time.strftime("%Y.%m.%d", start)), ("Round", "-"), ("White", white), ("Black", black),
+            ("Result", result), ("Timezone", "UTC"), ("ECO", eco), ("ECOUrl", eco_url(name)),
+            ("UTCDate", time.strftime("%Y.%m.%d", start)), ("UTCTime", time.strftime("%H:%M:%S", start)),
+            ("WhiteElo", str(white_elo)), ("BlackElo", str(black_elo)), ("TimeControl", time_control),
+            ("Termination", termination.format(white=white, black=black)),
+            ("StartTime", time.strftime("%H:%M:%S", start)), ("EndDate", time.strftime("%Y.%m.%d", end)),
+            ("EndTime", time.strftime("%H:%M:%S", end)), ("Link", link),
+        ]
+        pgn = "\n".join(f'[{tag} "{value}"]' for tag, value in headers) + "\n\n" + build_movetext(rng, moves, base, increment, result) + "\n"
+
+        yield {
+            "url": link,
+            "pgn": pgn,
+            "time_control": time_control,
+            "end_time": end_time,
+            "rated": True,
+            "uuid": f"{rng.getrandbits(32):08x}-{rng.getrandbits(16):04x}-11ee-{rng.getrandbits(16):04x}-{rng.getrandbits(48):012x}",
+            "time_class": time_class,
+            "rules": "chess",
+            "eco": eco_url(name),
+            "white": {"rating": white_elo, "result": white_result, "username": white},
+            "black": {"rating": black_elo, "result": black_result, "username": black},
+        }
+
+
+def month_range(start, months):
+    year, month = start
+    for _ in range(months):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def generate_player(task):
+    """Writes every month for one player; returns (player, games written)."""
+    player, output, start, months, games, seed, legal = task
+    data_dir = os.path.join(output, player)
+    os.makedirs(data_dir, exist_ok=True)
+    rng = random.Random(f"{seed}:{player}:volume")
+    written = 0
+    for year, month in month_range(start, months):
+        # Activity varies month to month around the requested mean
+        count = max(0, int(rng.gauss(games, games * 0.3)))
+        write_archive(archive_filename(data_dir, player, year, month), generate_month(player, year, month, count, seed, legal))
+        written += count
+    return player, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--games", type=int, default=200, help="Mean games per player per month")
+    parser.add_argument("--start", default="2020-01", help="First month, YYYY-MM")
+    parser.add_argument("--output", default=ARCHIVE_ROOT, help="Archive root to write player directories into")
+    parser.add_argument("--prefix", default="synthetic_player_", help="Username prefix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--legal-moves", action="store_true", help="Play legal moves with python-chess")
+    args = parser.parse_args()
+
+    start = tuple(int(part) for part in args.start.split("-"))
+    width = len(str(args.players - 1))
+    tasks = [(f"{args.prefix}{p:0{width}d}", args.output, start, args.months, args.games, args.seed, args.legal_moves)
+             for p in range(args.players)]
+
+    print(f"🧪 Generating ~{args.players * args.months * args.games:,} games for {args.players} players "
+          f"x {args.months} months into {args.output}")
+    started = time.perf_counter()
+    total = 0
+    with Pool(args.processes) as pool:
+        for done, (player, written) in enumerate(pool.imap_unordered(generate_player, tasks), start=1):
+            total += written
+            if done % max(1, args.players // 20) == 0 or done == args.players:
+                elapsed = time.perf_counter() - started
+                print(f"  {done}/{args.players} players, {total:,} games, {total / elapsed:,.0f} games/s")
+    print(f"✅ Wrote {total:,} games in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
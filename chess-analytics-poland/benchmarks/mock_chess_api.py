@@ -0,0 +1,187 @@
+"""Local stand-in for the Chess.com published-data API, for offline ingestion benchmarks and regression runs.
+
+Serves /pub/player/{name}/games/archives and /pub/player/{name}/games/{YYYY}/{MM} from recorded archives
+(a directory laid out like the archive store) and/or synthetic players, with optional latency, random
+HTTP 429 responses and ETag/Last-Modified revalidation.
+
+Usage: python benchmarks/mock_chess_api.py --port 8765 --players 3 --months 24 --games 200 --latency 0.1
+       CHESS_API_BASE_URL=http://127.0.0.1:8765/pub python main.py bench_player_0 --stages ingest
+"""
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import ARCHIVE_NAME_RE, iter_archive, list_player_archives
+from generate_corpus import generate_month
+
+ARCHIVES_PATH_RE = re.compile(r'^/pub/player/(?P<player>[^/]+)/games/archives/?$')
+MONTH_PATH_RE = re.compile(r'^/pub/player/(?P<player>[^/]+)/games/(?P<year>\d{4})/(?P<month>\d{2})/?$')
+
+
+class MockChessApi:
+    """Threaded HTTP server imitating the Chess.com archive endpoints. Use start()/stop() or as a context manager."""
+
+    def __init__(self, fixtures_dir=None, synthetic_players=0, months=12, games_per_month=100,
+                 latency=0.0, jitter=0.0, rate_limit_probability=0.0, seed=0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_probability = rate_limit_probability
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {}
+        # player -> {(year, month): callable returning the month's games}
+        self._archives = {}
+
+        if fixtures_dir:
+            for player in sorted(os.listdir(fixtures_dir)):
+                for path in list_player_archives(os.path.join(fixtures_dir, player), player):
+                    match = ARCHIVE_NAME_RE.match(os.path.basename(path))
+                    key = (int(match.group("year")), int(match.group("month")))
+                    self._archives.setdefault(player, {})[key] = lambda path=path: list(iter_archive(path))
+
+        first_year = 2024 - (months - 1) // 12
+        for p in range(synthetic_players):
+            player = f"bench_player_{p}"
+            for m in range(months):
+                year, month = first_year + m // 12, m % 12 + 1
+                self._archives.setdefault(player, {})[(year, month)] = (
+                    lambda player=player, year=year, month=month: list(generate_month(player, year, month, games_per_month, seed)))
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/pub"
+
+    @property
+    def players(self):
+        return sorted(self._archives)
+
+    def archive_urls(self, player):
+        return [f"{self.base_url}/player/{player}/games/{year}/{month:02d}" for year, month in sorted(self._archives[player])]
+
+    def total_games(self, player=None):
+        players = [player] if player else self.players
+        return sum(len(json.loads(self._body(p, year, month)[0])["games"])
+                   for p in players for year, month in self._archives[p])
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _body(self, player, year, month):
+        """Serialized month body with its ETag and Last-Modified, built once and cached."""
+        key = (player, year, month)
+        with self._lock:
+            if key not in self._bodies:
+                body = json.dumps({"games": self._archives[player][(year, month)]()}).encode()
+                last_modified_year, last_modified_month = (year + 1, 1) if month == 12 else (year, month + 1)
+                last_modified = formatdate(calendar.timegm((last_modified_year, last_modified_month, 1, 0, 0, 0)), usegmt=True)
+                self._bodies[key] = (body, f'"{hashlib.md5(body).hexdigest()}"', last_modified)
+            return self._bodies[key]
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+            def _send(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with api._lock:
+                    api.stats[status] += 1
+
+            def do_GET(self):
+                if api.latency or api.jitter:
+                    time.sleep(api.latency + api._random.uniform(0, api.jitter))
+                if api.rate_limit_probability and api._random.random() < api.rate_limit_probability:
+                    return self._send(429, b'{"message": "Too Many Requests"}', {"Retry-After": "1"})
+
+                match = ARCHIVES_PATH_RE.match(self.path)
+                if match and match.group("player").lower() in api._archives:
+                    archives = api.archive_urls(match.group("player").lower())
+                    return self._send(200, json.dumps({"archives": archives}).encode(), {"Content-Type": "application/json"})
+
+                match = MONTH_PATH_RE.match(self.path)
+                key = match and (int(match.group("year")), int(match.group("month")))
+                if match and key in api._archives.get(match.group("player").lower(), {}):
+                    body, etag, last_modified = api._body(match.group("player").lower(), *key)
+                    validators = {"ETag": etag, "Last-Modified": last_modified}
+                    if self.headers.get("If-None-Match") == etag:
+                        return self._send(304, headers=validators)
+                    since = self.headers.get("If-Modified-Since")
+                    if since and not self.headers.get("If-None-Match"):
+                        try:
+                            if parsedate_to_datetime(since) >= parsedate_to_datetime(last_modified):
+                                return self._send(304, headers=validators)
+                        except (TypeError, ValueError):
+                            pass
+                    return self._send(200, body, {"Content-Type": "application/json", **validators})
+
+                self._send(404, b'{"code": 0, "message": "Data provider not found."}', {"Content-Type": "application/json"})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="Directory of recorded player archives (archive store layout)")
+    parser.add_argument("--players", type=int, default=0, help="Synthetic players (bench_player_N)")
+    parser.add_argument("--months", type=int, default=12, help="Months per synthetic player")
+    parser.add_argument("--games", type=int, default=100, help="Games per synthetic month")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Probability of answering 429")
+    args = parser.parse_args()
+
+    api = MockChessApi(args.fixtures, args.players, args.months, args.games, args.latency, args.jitter,
+                       args.rate_limit, host=args.host, port=args.port)
+    print(f"🧪 Mock Chess.com API for {len(api.players)} players at {api.base_url}")
+    print(f"   CHESS_API_BASE_URL={api.base_url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Responses by status: {dict(api.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# bulk_load.py
+import io
+import itertools
+import logging
+import time
+
+from sqlalchemy import text
+
+DEFAULT_CHUNK_ROWS = 50000  # Rows serialized per COPY round trip
+
+
+def pg_array(values):
+    """Formats a list as a Postgres array literal, e.g. ['e4', None] -> {"e4",NULL}."""
+    return "{" + ",".join(
+        "NULL" if value is None
+        else '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' if isinstance(value, str)
+        else str(value)
+        for value in values
+    ) + "}"
+
+
+def csv_field(value):
+    """Formats one value as a COPY CSV field. NULL is the only unquoted empty field; every other value is quoted,
+    so an empty string (e.g. the opening tree root's path) stays an empty string instead of reading back as NULL.
+    Lists are written as Postgres array literals."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = pg_array(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_chunk(cursor, table, columns, records):
+    """Serializes records (sequences ordered like columns) to CSV in memory and COPYs them into table."""
+    buffer = io.StringIO()
+    buffer.writelines(",".join(map(csv_field, record)) + "\n" for record in records)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def copy_insert(connection, table, rows, columns, conflict_columns=("game_id",), chunk_rows=DEFAULT_CHUNK_ROWS,
+                on_conflict="DO NOTHING", inserted_keys=None):
+    """Bulk-inserts rows through a COPY into a temporary staging table followed by
+    INSERT ... ON CONFLICT DO NOTHING, so duplicate keys are skipped instead of aborting the batch.
+    Pass on_conflict (e.g. "DO UPDATE SET ...") to merge into existing rows instead, and a list as
+    inserted_keys to have the conflict-column values of the rows actually written appended to it.
+
+    Runs inside the caller's SQLAlchemy connection/transaction. Returns (inserted, skipped).
+    """
+    staging = f"{table}_staging"
+    column_list = ", ".join(columns)
+    connection.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    connection.execute(text(f"TRUNCATE {staging}"))
+
+    cursor = connection.connection.cursor()
+    total = 0
+    try:
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+            _copy_chunk(cursor, staging, columns, ([row.get(column) for column in columns] for row in chunk))
+            total += len(chunk)
+    finally:
+        cursor.close()
+
+    returning = f"RETURNING {', '.join(conflict_columns)}" if inserted_keys is not None else ""
+    result = connection.execute(text(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list} FROM {staging}
+        ON CONFLICT ({', '.join(conflict_columns)}) {on_conflict}
+        {returning}
+    """))
+    inserted = result.rowcount
+    if inserted_keys is not None:
+        inserted_keys.extend(key[0] if len(conflict_columns) == 1 else tuple(key) for key in result)
+    connection.execute(text(f"TRUNCATE {staging}"))
+
+    logging.info(f"COPY into {table}: {inserted} inserted, {total - inserted} skipped as duplicates.")
+    return inserted, total - inserted
+
+
+def copy_update(connection, table, key_column, column, pairs, batch_size=DEFAULT_CHUNK_ROWS):
+    """Backfills one column from (key, value) pairs, or several from (key, value, ...) tuples when column is
+    a sequence of names. Each batch is COPYed into a temporary table and applied with a single
+    UPDATE ... FROM join instead of one UPDATE per row.
+
+    Runs inside the caller's SQLAlchemy connection/transaction. Returns the number of rows updated.
+    """
+    columns = [column] if isinstance(column, str) else list(column)
+    staging = f"{table}_{columns[0]}_backfill"
+    # Same column types as the target, so COPY does the casting
+    connection.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS SELECT {key_column}, {', '.join(columns)} FROM {table} WITH NO DATA"))
+    assignments = ", ".join(f"{name} = s.{name}" for name in columns)
+    changed = " OR ".join(f"t.{name} IS DISTINCT FROM s.{name}" for name in columns)
+
+    cursor = connection.connection.cursor()
+    total_updated = 0
+    try:
+        pairs = iter(pairs)
+        batch_number = 0
+        while True:
+            batch = list(itertools.islice(pairs, batch_size))
+            if not batch:
+                break
+            batch_number += 1
+            start = time.perf_counter()
+            connection.execute(text(f"TRUNCATE {staging}"))
+            _copy_chunk(cursor, staging, [key_column, *columns], batch)
+            result = connection.execute(text(f"""
+                UPDATE {table} AS t
+                SET {assignments}
+                FROM {staging} AS s
+                WHERE t.{key_column} = s.{key_column}
+                  AND ({changed})
+            """))
+            total_updated += result.rowcount
+            logging.info(f"Backfill {table}.{', '.join(columns)} batch {batch_number}: {len(batch)} rows, "
+                         f"{result.rowcount} updated in {time.perf_counter() - start:.2f}s")
+    finally:
+        cursor.close()
+
+    return total_updated
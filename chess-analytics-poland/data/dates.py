@@ -1,63 +1,45 @@
-import json
 import os
-import re
 import sys
-import datetime
 import logging
 import pandas as pd
-from sqlalchemy import create_engine, text
 
 # Log setup
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-import sys
-import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from db_connection import get_engine
+from game_extraction import normalize_pgn_date
+from pgn_headers import header_value
+from bulk_load import copy_update
+from partitions import ensure_month_partitions
+from schema_migrations import migrate
+from archive_store import player_data_dir, iter_player_games
 
 engine = get_engine()
 print("✅ Database connection imported and created successfully.")
 
+# Backfill for games loaded before ingestion extracted date_time itself (see game_extraction.py).
 
-
-# Function to extract the date from a PGN string
+# Function to extract the date from a PGN's Date tag
 def extract_date_from_pgn(pgn):
-    match = re.search(r'\[Date "(\d{4}\.\d{1,2}\.\d{1,2})"\]', pgn, re.IGNORECASE)
-    if match:
-        try:
-            return datetime.datetime.strptime(match.group(1), '%Y.%m.%d').date().strftime('%Y-%m-%d')
-        except ValueError as e:
-            logging.warning(f"Invalid PGN date: {match.group(1)} — {e}")
-    logging.warning("No valid Date tag found in PGN. Using default date.")
-    return '1900-01-01'
-
-# Function to process JSON files and extract dates
+    return normalize_pgn_date(header_value(pgn, "Date"))
+
+# Function to read the stored archives and extract dates
 def process_json_files_for_dates(player):
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(os.path.dirname(script_dir))
-    player_json_dir = os.path.join(project_root, player)
+    player_json_dir = player_data_dir(player)
     extracted_dates = []
 
     if not os.path.exists(player_json_dir):
         logging.error(f"JSON data directory not found: {player_json_dir}")
         return pd.DataFrame()
 
-    for filename in os.listdir(player_json_dir):
-        if filename.endswith(".json") and filename.startswith(f"{player}_games_"):
-            filepath = os.path.join(player_json_dir, filename)
-            try:
-                with open(filepath, 'r') as f:
-                    games = json.load(f)
-                    for game in games:
-                        if "pgn" not in game:
-                            continue
-                        game_id = game.get("uuid", game.get("url", "").split('/')[-1])
-                        date_time = extract_date_from_pgn(game["pgn"])
-                        extracted_dates.append({"game_id": game_id, "date_time": date_time})
-            except IOError as e:
-                logging.error(f"Error reading JSON file {filepath}: {e}")
-            except json.JSONDecodeError as e:
-                logging.error(f"Error decoding JSON in {filepath}: {e}")
+    # Streams games from the archive store (compressed NDJSON or legacy JSON)
+    for game in iter_player_games(player, player_json_dir):
+        if "pgn" not in game:
+            continue
+        game_id = game.get("uuid", game.get("url", "").split('/')[-1])
+        date_time = extract_date_from_pgn(game["pgn"])
+        extracted_dates.append({"game_id": game_id, "date_time": date_time})
 
     if extracted_dates:
         df = pd.DataFrame(extracted_dates)
@@ -71,37 +53,18 @@ def update_games_table_with_dates(df_dates):
     try:
         logging.info(f"Processing {len(df_dates)} extracted dates.")
 
+        # games.date_time comes with the schema migrations (see schema_migrations.py)
+        migrate(engine)
+
         with engine.connect() as connection:
-            # Check if date_time column exists
-            result = connection.execute(text("""
-                SELECT EXISTS (
-                    SELECT 1
-                    FROM information_schema.columns
-                    WHERE table_name = 'games'
-                    AND column_name = 'date_time'
-                );
-            """)).scalar()
-
-            if not result:
-                connection.execute(text("""
-                    ALTER TABLE games
-                    ADD COLUMN date_time DATE;
-                """))
-                connection.commit()
-                logging.info("date_time column added to games table.")
-            else:
-                logging.info("date_time column already exists in games table.")
-
-            # Update games table with date_time from DataFrame
-            for _, row in df_dates.iterrows():
-                game_id = row['game_id']
-                date_time = row['date_time']
-                connection.execute(text("""
-                    UPDATE games
-                    SET date_time = :date_time
-                    WHERE game_id = :game_id;
-                """), {"date_time": date_time, "game_id": game_id})
+            # A changed date moves the game into its month's partition, which has to exist
+            ensure_month_partitions(engine, df_dates["date_time"])
+
+            # Update games table with date_time from DataFrame in set-based batches
+            updated = copy_update(connection, "games", "game_id", "date_time",
+                                  df_dates[["game_id", "date_time"]].itertuples(index=False, name=None))
             connection.commit()
+            logging.info(f"Updated date_time for {updated} games.")
 
         logging.info("Successfully updated games table with date_time data.")
 
@@ -115,7 +78,7 @@ def main():
     else:
         player = input("Enter the Chess.com username: ").strip().lower()
 
-    # Step 1: Process JSON files and extract dates into a DataFrame
+    # Step 1: Read the stored archives and extract dates into a DataFrame
     dates_df = process_json_files_for_dates(player)
 
     # Step 2: Update the database with the extracted dates
@@ -8,6 +8,15 @@ from sqlalchemy import create_engine
 
 from sqlalchemy import text
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from pgn_headers import header_value
+from bulk_load import copy_update
+from archive_store import player_data_dir, iter_player_games
+
+# Backfill for games loaded before ingestion extracted ECO codes itself (see game_extraction.py).
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -26,40 +35,26 @@ DB_TABLE_NAME = "games"
 DB_COLUMN_NAME = "eco"
 
 def extract_eco_from_pgn(pgn):
-    eco_match = re.search(r'\[ECO\s+"(.*?)"\]', pgn)
-    if eco_match:
-        return eco_match.group(1)
-    return "unknown"
+    return header_value(pgn, "ECO", "unknown")
 
 def process_json_files(player):
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(os.path.dirname(script_dir)) # Go up two levels to the project root
-    player_json_dir = os.path.join(project_root, player)
+    player_json_dir = player_data_dir(player)
     extracted_openings = []
 
     if not os.path.exists(player_json_dir):
         logging.error(f"JSON data directory not found: {player_json_dir}")
         return pd.DataFrame()
 
-    for filename in os.listdir(player_json_dir):
-        if filename.endswith(".json") and filename.startswith(f"{player}_games_"):
-            filepath = os.path.join(player_json_dir, filename)
-            try:
-                with open(filepath, 'r') as f:
-                    games = json.load(f)
-                    for game in games:
-                        pgn = game.get("pgn", "")
-                        eco_code = extract_eco_from_pgn(pgn)
-                        game_id = game.get("uuid", game.get("url", "").split('/')[-1])
-                        extracted_openings.append({
-                            "player": player,
-                            "game_id": game_id,
-                            "eco_code": eco_code
-                        })
-            except IOError as e:
-                logging.error(f"Error reading JSON file {filepath}: {e}")
-            except json.JSONDecodeError as e:
-                logging.error(f"Error decoding JSON in {filepath}: {e}")
+    # Streams games from the archive store (compressed NDJSON or legacy JSON)
+    for game in iter_player_games(player, player_json_dir):
+        pgn = game.get("pgn", "")
+        eco_code = extract_eco_from_pgn(pgn)
+        game_id = game.get("uuid", game.get("url", "").split('/')[-1])
+        extracted_openings.append({
+            "player": player,
+            "game_id": game_id,
+            "eco_code": eco_code
+        })
 
     openings_df = pd.DataFrame(extracted_openings)
     return openings_df
@@ -86,25 +81,15 @@ def update_eco_in_database(df):
         logging.warning("No opening data to update in the database.")
         return
 
-    engine = create_engine(DB_URL)
+    engine = get_engine()
     try:
         with engine.connect() as connection:
-            for index, row in df.iterrows():
-                eco_code = row['eco_code']
-                game_id = row['game_id']
-                sql = text(f"""
-                    UPDATE {DB_TABLE_NAME}
-                    SET {DB_COLUMN_NAME} = :eco
-                    WHERE game_id = :game_id;
-                """)
-                connection.execute(sql, {"eco": eco_code, "game_id": game_id})
+            updated = copy_update(connection, DB_TABLE_NAME, "game_id", DB_COLUMN_NAME,
+                                  df[["game_id", "eco_code"]].itertuples(index=False, name=None))
             connection.commit() # Ensure changes are committed to the database
-            logging.info(f"Successfully updated ECO codes for {len(df)} games in the database.")
+            logging.info(f"Successfully updated ECO codes for {updated} of {len(df)} games in the database.")
     except Exception as e:
         logging.error(f"Error updating database: {e}")
-    finally:
-        if engine:
-            engine.dispose() # Dispose of the engine to release resources
 def main():
     print(f"Script location: {os.path.abspath(__file__)}") # Keep this for debugging
     if len(sys.argv) > 1:
@@ -0,0 +1,131 @@
+# game_extraction.py
+import datetime
+import logging
+
+from pgn_headers import scan_headers
+from pgn_movetext import tokenize_movetext
+from opening_classifier import classify_moves
+
+DEFAULT_DATE = '1900-01-01'
+WINNERS = {"1-0": "white", "0-1": "black", "1/2-1/2": "draw"}
+# Chess.com result codes that end a game drawn
+DRAW_RESULTS = {"agreed", "repetition", "stalemate", "insufficient", "50move", "timevsinsufficient"}
+# PGN tags extract_game reads, looked up case-insensitively like the tag names in the PGN itself
+GAME_TAGS = ["Date", "ECO", "ECOUrl", "Result"]
+# Columns of an extracted row written to the game_moves side table: tokenized SAN moves and per-ply clocks in deciseconds
+MOVE_COLUMNS = ["game_id", "ply_count", "moves", "clocks"]
+
+
+def split_pgn(pgn):
+    """Splits a PGN into its header block and movetext."""
+    header, _, movetext = pgn.partition("\n\n")
+    return header, movetext
+
+
+def normalize_pgn_date(date_str):
+    """Converts a PGN date (YYYY.M.D) to YYYY-MM-DD, falling back to 1900-01-01."""
+    if date_str:
+        try:
+            return datetime.datetime.strptime(date_str, '%Y.%m.%d').date().strftime('%Y-%m-%d')
+        except ValueError as e:
+            logging.warning(f"Invalid PGN date: {date_str} — {e}")
+    else:
+        logging.warning("No Date tag found in PGN.")
+    return DEFAULT_DATE
+
+
+def opening_name_from_url(eco_url):
+    """Turns a Chess.com ECOUrl (…/openings/Sicilian-Defense-Najdorf-Variation) into a readable name."""
+    if not eco_url:
+        return None
+    return eco_url.rstrip('/').split('/')[-1].replace('-', ' ')
+
+
+def parse_time_control(time_control):
+    """Splits a Chess.com time control into (base seconds, increment seconds).
+
+    "180+2" -> (180, 2), "600" -> (600, 0), daily "1/86400" -> (86400, 0).
+    """
+    try:
+        if '/' in time_control:
+            return int(time_control.split('/')[1]), 0
+        base, _, increment = time_control.partition('+')
+        return int(base), int(increment or 0)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def count_moves(plies):
+    """Full moves in a game of the given number of plies."""
+    return (plies + 1) // 2
+
+
+def game_termination(white, black):
+    """Returns how the game ended from the losing (or drawing) side's Chess.com result code, e.g. 'resigned'."""
+    if white.get("result") == "win":
+        return black.get("result")
+    return white.get("result")
+
+
+def game_winner(result, white, black):
+    """Returns 'white', 'black' or 'draw' (the game_winner enum) from the PGN Result tag, falling back to the
+    players' Chess.com result codes; None when neither tells."""
+    if result in WINNERS:
+        return WINNERS[result]
+    if white.get("result") == "win":
+        return "white"
+    if black.get("result") == "win":
+        return "black"
+    if white.get("result") in DRAW_RESULTS:
+        return "draw"
+    return None
+
+
+def extract_game(game):
+    """Builds a complete games row from one Chess.com archive entry, parsing its PGN once.
+    The row also carries the tokenized moves and clocks (ply_count, moves, clocks) for game_moves, and the
+    deepest named opening from openings_sheet.csv the moves pass through (book_eco, book_opening, book_plies).
+    Players are named by username (white_player_id, black_player_id); the keys games stores are assigned
+    at insert time (see players.assign_player_keys).
+
+    Raises KeyError when a required field is missing.
+    """
+    pgn = game["pgn"]
+    _, movetext = split_pgn(pgn)
+    headers = scan_headers(pgn, tags=GAME_TAGS)
+    movetext_tokens = tokenize_movetext(movetext)
+    white = game["white"]
+    black = game["black"]
+    end_time = game.get("end_time")
+    base_time, increment = parse_time_control(game["time_control"])
+    book_eco, book_opening, book_plies = classify_moves(movetext_tokens.moves)
+
+    return {
+        "game_id": game.get("uuid", game["url"].split("/")[-1]),
+        "white_player_id": white["username"],
+        "black_player_id": black["username"],
+        "white_rating": white.get("rating", 0),
+        "black_rating": black.get("rating", 0),
+        "time_class": game["time_class"],
+        "time_control": game["time_control"],
+        "base_time": base_time,
+        "increment": increment,
+        "rules": game["rules"],
+        "eco": headers.get("ECO", "unknown"),
+        "eco_url": headers.get("ECOUrl"),
+        "opening_name": opening_name_from_url(headers.get("ECOUrl")),
+        "book_eco": book_eco,
+        "book_opening": book_opening,
+        "book_plies": book_plies,
+        "result": headers.get("Result"),
+        "termination": game_termination(white, black),
+        "move_count": count_moves(movetext_tokens.plies),
+        "ply_count": movetext_tokens.plies,
+        "moves": movetext_tokens.moves,
+        "clocks": movetext_tokens.clocks,
+        "pgn": pgn,
+        "start_time": datetime.datetime.fromtimestamp(end_time).strftime('%Y-%m-%d %H:%M:%S') if end_time else None,
+        "end_time": datetime.datetime.fromtimestamp(end_time, datetime.timezone.utc).isoformat() if end_time else None,
+        "winner": game_winner(headers.get("Result"), white, black),
+        "date_time": normalize_pgn_date(headers.get("Date")),
+    }
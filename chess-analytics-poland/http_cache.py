@@ -0,0 +1,64 @@
+# http_cache.py
+import json
+import logging
+import os
+import threading
+
+
+class ArchiveCache:
+    """Stores ETag/Last-Modified validators per archive URL so archives can be revalidated with conditional requests.
+
+    Validators from a download stay pending until confirm() is called for its URL, so save() never persists them
+    for an archive whose games were not stored: a later 304 for it would otherwise skip games that were never kept.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._pending = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable HTTP cache {path}: {e}")
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._entries
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match / If-Modified-Since headers for a previously seen URL."""
+        with self._lock:
+            entry = self._entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, response):
+        """Records the validators returned with a 200 response, pending until the URL is confirmed."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._pending[url] = {"etag": etag, "last_modified": last_modified}
+
+    def confirm(self, urls):
+        """Keeps the pending validators of urls, once their archives are stored."""
+        with self._lock:
+            for url in urls:
+                if url in self._pending:
+                    self._entries[url] = self._pending.pop(url)
+
+    def save(self):
+        with self._lock:
+            entries = dict(self._entries)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
@@ -1,74 +1,181 @@
-import sys
+import argparse
 import os
-import subprocess
+import sys
+import time
 
 # Ensures all imports in chess-analytics-poland/ work no matter where main.py is run from
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
+from db_connection import get_engine
+
+# Stages run in this order; each is an in-process function sharing one engine and context.
+# Modules are imported inside the stage so e.g. an analyze-only run never loads matplotlib.
+STAGES = ["ingest", "backfill", "positions", "analyze", "visualize"]
+DEFAULT_STAGES = ["ingest", "analyze", "visualize"]
+# Visualize opens interactive charts, so batch mode only runs it for each player when asked to with --stages
+DEFAULT_BATCH_STAGES = ["ingest", "analyze"]
+PLAYER_STAGES = {"ingest", "backfill", "visualize"}
+
+
+def get_player_games(context):
+    """Loads the player's games once and shares the DataFrame between stages."""
+    if "player_games" not in context:
+        from scripts.visualize import load_player_games
+        context["player_games"] = load_player_games(context["username"], context["engine"])
+    return context["player_games"]
+
+
+def run_ingest(context):
+    from scripts.connection_to_database import process_player_games
+    options = context["options"]
+    context["failed_archives"] = []
+    context["games_inserted"] = process_player_games(
+        context["username"],
+        max_workers=options.workers,
+        requests_per_second=options.rate,
+        batch_size=options.batch_size,
+        rate_limiter=context.get("rate_limiter"),
+        failed_archives=context["failed_archives"],
+    )
+    # New games invalidate any dataset loaded earlier
+    context.pop("player_games", None)
+
+
+def run_backfill(context):
+    # Only needed for games loaded before ingestion extracted dates, ECO codes, moves, book openings and opening trees itself
+    from data.dates import process_json_files_for_dates, update_games_table_with_dates
+    from data.openingdatabase import process_json_files, save_opening_data_to_csv, update_eco_in_database
+    from scripts.backfill_moves import backfill_game_moves
+    from scripts.backfill_openings import backfill_book_openings
+    from scripts.build_opening_tree import rebuild_opening_tree
+    dates_df = process_json_files_for_dates(context["username"])
+    if not dates_df.empty:
+        update_games_table_with_dates(dates_df)
+    openings_df = process_json_files(context["username"])
+    save_opening_data_to_csv(openings_df)
+    update_eco_in_database(openings_df)
+    backfill_game_moves(context["username"])
+    backfill_book_openings(context["username"])
+    rebuild_opening_tree(context["username"])
+    # Backfilled rows reach the per-player aggregates through the change log; fold them in right away
+    from aggregates import refresh_aggregates
+    with context["engine"].begin() as connection:
+        refresh_aggregates(connection)
+
+
+def run_positions(context):
+    # Replays games not yet in the position index; covers every player's games when run without a username
+    from scripts.index_positions import index_positions
+    index_positions(context["username"], processes=context["options"].processes)
+
+
+def run_analyze(context):
+    from scripts.analyze_data import run_analysis
+    context["analysis"] = run_analysis(context["engine"])
+
+
+def run_visualize(context):
+    from scripts.visualize import plot_player_statistics
+    df_player = get_player_games(context)
+    if df_player.empty:
+        print(f"Warning: No games found in the database for player '{context['username']}'.")
+        return
+    plot_player_statistics(context["username"], df_player)
+
+
+STAGE_FUNCTIONS = {
+    "ingest": run_ingest,
+    "backfill": run_backfill,
+    "positions": run_positions,
+    "analyze": run_analyze,
+    "visualize": run_visualize,
+}
+
+
+def run_pipeline(username, stages, options, rate_limiter=None):
+    """Runs the selected stages in order and returns the shared context, including per-stage wall times."""
+    context = {"username": username, "engine": get_engine(), "options": options, "timings": {}, "rate_limiter": rate_limiter}
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        print(f"\n🔄 Running {stage} for {username or 'all players'}...")
+        start = time.perf_counter()
+        STAGE_FUNCTIONS[stage](context)
+        context["timings"][stage] = time.perf_counter() - start
+        print(f"✅ {stage} complete in {context['timings'][stage]:.1f}s.")
+
+    print("\n⏱️ Stage timings:")
+    for stage, elapsed in context["timings"].items():
+        print(f"  {stage:<10} {elapsed:8.1f}s")
+    return context
+
+
+def parse_args(argv=None):
+    from scripts.connection_to_database import DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BATCH_SIZE
+    parser = argparse.ArgumentParser(description="Run the Chess.com statistics pipeline in-process.")
+    parser.add_argument("username", nargs="?", help="Chess.com username (required by ingest, backfill and visualize)")
+    parser.add_argument("--stages",
+                        help=f"Comma-separated stages to run, from: {', '.join(STAGES)} "
+                             f"(default: {','.join(DEFAULT_STAGES)}; {','.join(DEFAULT_BATCH_STAGES)} in batch mode)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent archive downloads")
+    parser.add_argument("--rate", type=float, default=DEFAULT_REQUESTS_PER_SECOND, help="Max API requests per second (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Games per database flush")
+    parser.add_argument("--players", help="Batch mode: comma-separated usernames")
+    parser.add_argument("--players-file", help="Batch mode: file with one username per line")
+    parser.add_argument("--processes", type=int,
+                        help="Batch mode: players ingested in parallel, default 4 (--rate is shared by all); "
+                             "positions stage: replay processes, default one per CPU")
+    parser.add_argument("--summary-file", help="Batch mode: write the per-player summary as CSV")
+    args = parser.parse_args(argv)
+
+    args.batch = bool(args.players or args.players_file)
+    if args.stages is None:
+        args.stages = DEFAULT_BATCH_STAGES if args.batch else DEFAULT_STAGES
+    else:
+        args.stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in args.stages if stage not in STAGE_FUNCTIONS]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    if PLAYER_STAGES.intersection(args.stages) and not args.username and not args.batch:
+        parser.error("a username (or --players/--players-file) is required for the ingest, backfill and visualize stages")
+    if args.username:
+        args.username = args.username.strip().lower()
+    return args
+
+
+def run_batch_mode(args):
+    """Ingests every listed player across a process pool, then runs the global stages (positions, analyze) once
+    and, if requested, visualize for each player ingested successfully, one at a time."""
+    from batch_ingest import DEFAULT_PROCESSES, read_usernames, run_batch, print_summary
+    processes = args.processes or DEFAULT_PROCESSES
+    usernames = read_usernames(args.players, args.players_file)
+    if args.username and args.username not in usernames:
+        usernames.insert(0, args.username)
+    print(f"📦 Batch mode: {len(usernames)} players on {processes} processes, {args.rate} req/s shared.")
+
+    results = run_batch(usernames, args.stages, args, processes=processes)
+    print_summary(results, args.stages, args.summary_file)
+
+    # Global stages run once over everything the workers ingested
+    global_stages = [stage for stage in ("positions", "analyze") if stage in args.stages]
+    if global_stages:
+        run_pipeline(None, global_stages, args)
+
+    if "visualize" in args.stages:
+        for result in results:
+            if result["status"] != "ok":
+                print(f"Skipping visualize for {result['player']}: ingestion failed.")
+                continue
+            run_pipeline(result["player"], ["visualize"], args)
+
 
 def main():
-    username = input("Enter the Chess.com username to process: ").strip().lower()
-    data_folder = username
-    root_dir = os.path.dirname(os.path.abspath(__file__))
-    scripts_dir = os.path.join(root_dir, "scripts")
-    data_dir = os.path.join(root_dir, "data")
-    # chess_web_viz_dir = os.path.join(root_dir, "chess_web_viz")
-    # app_path = os.path.join(chess_web_viz_dir, "app.py")
-
-    connection_to_db_path = os.path.join(scripts_dir, "connection_to_database.py")
-    dates_path = os.path.join(data_dir, "dates.py")
-    opening_db_path = os.path.join(data_dir, "openingdatabase.py")
-    analyze_data_path = os.path.join(scripts_dir, "analyze_data.py")
-    visualize_path = os.path.join(scripts_dir, "visualize.py")
-
-    # print("--- Path Debugging ---")
-    # print(f"Root Directory: {root_dir}")
-    # print(f"Scripts Directory: {scripts_dir}")
-    # print(f"Data Directory: {data_dir}")
-    # print(f"Chess Web Viz Directory: {chess_web_viz_dir}")
-    # print(f"Flask App Path: {app_path}")
-    # print(f"Connection to DB Path: {connection_to_db_path}")
-    # print(f"Dates Path: {dates_path}")
-    # print(f"Opening Database Path: {opening_db_path}")
-    # print(f"Analyze Data Path: {analyze_data_path}")
-    # print(f"Visualize Path: {visualize_path}")
-    # print("----------------------")
-
-    # Step 1: Connect to database and potentially insert initial data
-    print(f"🔄 Running {os.path.basename(connection_to_db_path)} for {username}...")
-    subprocess.run([sys.executable, connection_to_db_path, username])
-    print(f"✅ {os.path.basename(connection_to_db_path)} complete.")
-
-    # Step 2: Extract dates from PGNs
-    print(f"\n🗓️ Running {os.path.basename(dates_path)} for {username}...")
-    subprocess.run([sys.executable, dates_path, username])
-    print(f"✅ {os.path.basename(dates_path)} complete.")
-
-    # Step 3: Update database with opening data
-    print("\n♟️ Running opening database update...")
-    subprocess.run([sys.executable, opening_db_path, username]) # Pass username
-    print(f"✅ {os.path.basename(opening_db_path)} complete.")
-
-    # Step 4: Analyze data
-    print(f"\n📊 Running {os.path.basename(analyze_data_path)} for {username}, folder: {data_folder}...")
-    subprocess.run([sys.executable, analyze_data_path, username, data_folder])
-    print(f"✅ {os.path.basename(analyze_data_path)} complete.")
-
-    # Step 5: Visualize data (optional - if you still want the CLI plots)
-    print(f"\n📈 Running {os.path.basename(visualize_path)} for {username}, folder: {data_folder}...")
-    subprocess.run([sys.executable, visualize_path, username, data_folder])
-    print(f"✅ {os.path.basename(visualize_path)} complete.")
-
-    # # Step 6: Run the Flask web application
-    # print("\n🌐 Starting Flask web application...")
-    # try:
-    #     subprocess.run([sys.executable, app_path, username], check=True) # Pass username
-    # except subprocess.CalledProcessError as e:
-    #     print(f"❌ Error running Flask app: {e}")
-    # except FileNotFoundError:
-    #     print(f"❌ Error: Flask app file not found at {app_path}")
-
-    # print("\n✨ Project workflow complete.")
+    args = parse_args()
+    if args.batch:
+        run_batch_mode(args)
+    else:
+        run_pipeline(args.username, args.stages, args)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,83 @@
+# opening_classifier.py
+import csv
+import logging
+import os
+import pickle
+
+OPENINGS_SHEET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "openings_sheet.csv")
+# Compiled trie, rebuilt whenever the sheet's size or modification time changes
+TRIE_CACHE = os.path.join(os.path.dirname(OPENINGS_SHEET), "openings_sheet.trie.pickle")
+TRIE_FORMAT = 1
+OPENING = None  # Trie key holding the (eco, name) of the named opening that ends at a node
+SAN_ANNOTATIONS = "+#!?"
+
+_tries = {}
+
+
+def normalize_san(san):
+    """Drops check/mate marks and annotations, so "Qa4+" in the sheet matches "Qa4+!" or "Qa4" in a game."""
+    return san.rstrip(SAN_ANNOTATIONS)
+
+
+def build_opening_trie(sheet=OPENINGS_SHEET):
+    """Compiles the openings sheet into a move-prefix trie of nested dicts keyed by SAN move.
+    A node's OPENING key holds the (eco, name) of the opening whose move sequence ends there;
+    when several rows share a sequence, the first one in the sheet wins."""
+    root = {}
+    with open(sheet, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            node = root
+            for san in row["moves"].split():
+                node = node.setdefault(normalize_san(san), {})
+            node.setdefault(OPENING, (row["ECO"], row["name"]))
+    return root
+
+
+def _sheet_signature(sheet):
+    stat = os.stat(sheet)
+    return TRIE_FORMAT, stat.st_size, stat.st_mtime_ns
+
+
+def load_opening_trie(sheet=OPENINGS_SHEET, cache_path=TRIE_CACHE):
+    """Returns the compiled trie, loaded once per process from the pickle cache and rebuilt from the
+    sheet only when the cache is missing or stale."""
+    if sheet in _tries:
+        return _tries[sheet]
+    signature = _sheet_signature(sheet)
+    trie = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_signature, cached_trie = pickle.load(f)
+            if cached_signature == signature:
+                trie = cached_trie
+        except (IOError, EOFError, pickle.UnpicklingError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable opening trie cache {cache_path}: {e}")
+    if trie is None:
+        trie = build_opening_trie(sheet)
+        if cache_path:
+            try:
+                tmp_path = f"{cache_path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump((signature, trie), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logging.warning(f"Could not write opening trie cache {cache_path}: {e}")
+    _tries[sheet] = trie
+    return trie
+
+
+def classify_moves(moves, trie=None):
+    """Returns (eco, name, plies) for the deepest named opening the SAN move list passes through,
+    or (None, None, 0) when not even the first move is in the sheet. Stops at the first move that
+    leaves the book, so it never reads more of the game than the longest matching line."""
+    node = trie if trie is not None else load_opening_trie()
+    match = (None, None, 0)
+    for ply, san in enumerate(moves, 1):
+        node = node.get(normalize_san(san))
+        if node is None:
+            break
+        opening = node.get(OPENING)
+        if opening is not None:
+            match = (*opening, ply)
+    return match
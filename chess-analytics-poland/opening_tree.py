@@ -0,0 +1,146 @@
+# opening_tree.py
+from sqlalchemy import text
+
+from bulk_load import copy_insert
+
+DEFAULT_TREE_DEPTH = 20  # Plies per game added to the tree; deeper lines are almost always unique
+MAX_SUBTREE_DEPTH = 6  # Levels a single subtree request may return
+TREE_COLUMNS = ["player_id", "color", "path", "depth", "move", "games", "wins", "draws", "losses", "opponent_rating_sum"]
+COUNTER_COLUMNS = ["games", "wins", "draws", "losses", "opponent_rating_sum"]
+OUTCOMES = {"1-0": ("win", "loss"), "0-1": ("loss", "win"), "1/2-1/2": ("draw", "draw")}
+
+
+def game_outcome(result, color):
+    """Returns 'win', 'draw' or 'loss' for the side playing color, from a PGN Result tag (None if unfinished)."""
+    outcomes = OUTCOMES.get(result)
+    if outcomes is None:
+        return None
+    return outcomes[0] if color == "white" else outcomes[1]
+
+
+def _count_games(sides, depth):
+    """Aggregates (player, color, game) sides into {(player, color, path): counters}."""
+    nodes = {}
+    for player, color, game in sides:
+        outcome = game_outcome(game["result"], color)
+        opponent_rating = game["black_rating"] if color == "white" else game["white_rating"]
+        path = ""
+        for ply in range(min(depth, len(game["moves"])) + 1):
+            if ply:
+                path = f"{path} {game['moves'][ply - 1]}" if path else game["moves"][0]
+            counters = nodes.get((player, color, path))
+            if counters is None:
+                counters = nodes[(player, color, path)] = [0, 0, 0, 0, 0]
+            counters[0] += 1
+            if outcome == "win":
+                counters[1] += 1
+            elif outcome == "draw":
+                counters[2] += 1
+            elif outcome == "loss":
+                counters[3] += 1
+            counters[4] += opponent_rating or 0
+    return nodes
+
+
+def tree_deltas(player, games, depth=DEFAULT_TREE_DEPTH):
+    """Aggregates games into per-node counters for the player's tree.
+
+    games yields dicts with white_player_id, black_player_id, white_rating, black_rating, result and moves.
+    Returns {(color, path): [games, wins, draws, losses, opponent_rating_sum]}, where path is the
+    space-joined SAN prefix ('' for the root). Games the player didn't take part in are ignored.
+    """
+    player = player.lower()
+
+    def sides():
+        for game in games:
+            if (game["white_player_id"] or "").lower() == player:
+                yield player, "white", game
+            elif (game["black_player_id"] or "").lower() == player:
+                yield player, "black", game
+
+    return {(color, path): counters for (_, color, path), counters in _count_games(sides(), depth).items()}
+
+
+def _merge_nodes(connection, nodes):
+    """Merges {(player, color, path): counters} into the persisted trees. Returns the number of nodes written."""
+    if not nodes:
+        return 0
+    # Written in key order, so concurrent ingests merging into the same opponent's tree lock nodes in the same order
+    rows = (
+        dict(zip(TREE_COLUMNS, (player, color, path, path.count(" ") + 1 if path else 0,
+                                path.rsplit(" ", 1)[-1] or None, *counters)))
+        for (player, color, path), counters in sorted(nodes.items())
+    )
+    merge = ", ".join(f"{column} = opening_tree.{column} + EXCLUDED.{column}" for column in COUNTER_COLUMNS)
+    written, _ = copy_insert(connection, "opening_tree", rows, TREE_COLUMNS,
+                             conflict_columns=("player_id", "color", "path"), on_conflict=f"DO UPDATE SET {merge}")
+    return written
+
+
+def update_opening_tree(connection, player, games, depth=DEFAULT_TREE_DEPTH):
+    """Adds games to the player's persisted tree inside the caller's transaction, merging the counters
+    into existing nodes. Only pass games not counted before, e.g. the keys copy_insert reports as new.
+    Returns the number of nodes written."""
+    nodes = tree_deltas(player, games, depth)
+    return _merge_nodes(connection, {(player.lower(), color, path): counters for (color, path), counters in nodes.items()})
+
+
+def update_opening_trees(connection, games, depth=DEFAULT_TREE_DEPTH):
+    """Adds games to the trees of both of their players in one write, like update_opening_tree. Used at ingest,
+    so a game stored while ingesting one player is also counted for an opponent who is ingested later."""
+    def sides():
+        for game in games:
+            if game["white_player_id"]:
+                yield game["white_player_id"].lower(), "white", game
+            if game["black_player_id"]:
+                yield game["black_player_id"].lower(), "black", game
+
+    return _merge_nodes(connection, _count_games(sides(), depth))
+
+
+def delete_opening_tree(connection, player):
+    """Drops every node of the player's tree, ahead of a rebuild."""
+    connection.execute(text("DELETE FROM opening_tree WHERE player_id = :player"), {"player": player.lower()})
+
+
+def fetch_subtree(connection, player, color, moves=(), depth=2):
+    """Returns the node reached by the SAN moves and its descendants up to depth levels below it, as nested dicts
+    (move, games, wins, draws, losses, avg_opponent_rating, children sorted by games), or None if the line was
+    never played. A single range scan over the (player_id, color, path) index, so it stays fast on large trees.
+    """
+    depth = max(0, min(depth, MAX_SUBTREE_DEPTH))
+    path = " ".join(moves)
+    base_depth = len(moves)
+    rows = connection.execute(text("""
+        SELECT path, depth, move, games, wins, draws, losses, opponent_rating_sum
+        FROM opening_tree
+        WHERE player_id = :player AND color = :color
+          AND (path = :path OR path LIKE :prefix)
+          AND depth <= :max_depth
+        ORDER BY depth
+    """), {
+        "player": player.lower(), "color": color, "path": path,
+        # SAN never contains LIKE wildcards, so the prefix needs no escaping
+        "prefix": f"{path} %" if path else "_%",
+        "max_depth": base_depth + depth,
+    }).mappings()
+
+    nodes = {}
+    for row in rows:
+        node = {
+            "move": row["move"],
+            "games": row["games"], "wins": row["wins"], "draws": row["draws"], "losses": row["losses"],
+            "avg_opponent_rating": round(row["opponent_rating_sum"] / row["games"]) if row["games"] else None,
+            "children": [],
+        }
+        nodes[row["path"]] = node
+        if row["depth"] > base_depth:
+            parent = row["path"].rsplit(" ", 1)[0] if row["depth"] > 1 else ""
+            if parent in nodes:
+                nodes[parent]["children"].append(node)
+    root = nodes.get(path)
+    if root is None:
+        return None
+    for node in nodes.values():
+        node["children"].sort(key=lambda child: child["games"], reverse=True)
+    return root
@@ -0,0 +1,91 @@
+# parallel_games.py
+import itertools
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from archive_store import iter_archive, list_player_archives, player_data_dir
+
+try:
+    import pyarrow as pa
+except ImportError:  # Results are returned as plain lists instead
+    pa = None
+
+DEFAULT_CHUNK_SIZE = 1000  # Games per task: large enough to amortize pickling, small enough to balance load
+IN_FLIGHT_PER_PROCESS = 2  # Tasks queued per worker so none idles while the parent collects results
+
+
+def _pack(results, as_arrow):
+    """Turns one chunk of per-game results (dicts when as_arrow) into what is sent back to the parent."""
+    return pa.RecordBatch.from_pylist(results) if as_arrow else results
+
+
+def _run_games(func, as_arrow, games):
+    return _pack([func(game) for game in games], as_arrow)
+
+
+def _run_archive(func, as_arrow, path):
+    # The worker reads and decompresses the file itself, so the parent only ships a path
+    return _pack([func(game) for game in iter_archive(path)], as_arrow)
+
+
+def _ordered_map(task, items, args, processes, initializer=None, initargs=()):
+    """Submits task(*args, item) for each item and yields the results in submission order,
+    keeping a bounded window of tasks in flight so memory stays flat on any input size."""
+    processes = processes or os.cpu_count()
+    window = processes * IN_FLIGHT_PER_PROCESS
+    with ProcessPoolExecutor(max_workers=processes, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(task, *args, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _check_arrow(as_arrow):
+    if as_arrow and pa is None:
+        raise ImportError("as_arrow=True requires pyarrow")
+
+
+def map_game_batches(func, games, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, as_arrow=False,
+                     initializer=None, initargs=()):
+    """Runs func on every game across a process pool and yields one batch of results per chunk, in input order.
+
+    games is any iterable of games or DB rows (it is consumed lazily). func must be a picklable module-level
+    function. Batches are lists, or pyarrow RecordBatches when as_arrow is set and func returns dicts —
+    columnar buffers that cross the process boundary far cheaper than lists of dicts.
+    """
+    _check_arrow(as_arrow)
+    yield from _ordered_map(_run_games, _chunks(games, chunk_size), (func, as_arrow), processes, initializer, initargs)
+
+
+def map_games(func, games, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, initializer=None, initargs=()):
+    """Like map_game_batches, but yields individual results in input order."""
+    for batch in map_game_batches(func, games, processes, chunk_size, False, initializer, initargs):
+        yield from batch
+
+
+def map_archive_batches(func, paths, processes=None, as_arrow=False, initializer=None, initargs=()):
+    """Runs func on every game of every archive file, one file per task, yielding one batch per file in order.
+
+    Workers read the files themselves, so the parent never becomes the bottleneck on decompression or JSON parsing.
+    """
+    _check_arrow(as_arrow)
+    yield from _ordered_map(_run_archive, paths, (func, as_arrow), processes, initializer, initargs)
+
+
+def map_player_games(func, player, processes=None, data_dir=None):
+    """Runs func on every stored game of a player, yielding results in archive (month) order."""
+    paths = list_player_archives(data_dir or player_data_dir(player), player)
+    logging.info(f"Processing {len(paths)} archives for {player} across {processes or os.cpu_count()} processes.")
+    for batch in map_archive_batches(func, paths, processes):
+        yield from batch
@@ -0,0 +1,105 @@
+# participation.py
+import textwrap
+
+from sqlalchemy import text
+
+# player_games holds one narrow row per (player, game) so per-player queries are a single range scan on
+# player_key instead of a white-or-black OR filter over the wide games table. Triggers on games keep it in
+# sync with every insert, update and delete. There is no foreign key to games: a partitioned games table can
+# only be referenced through its full (game_id, date_time) key, and detaching a month shouldn't depend on it.
+PLAYER_GAMES_DDL = """
+    CREATE TABLE IF NOT EXISTS player_games (
+        player_key INTEGER NOT NULL,
+        game_id TEXT NOT NULL,
+        color TEXT NOT NULL,
+        rating INTEGER,
+        opponent_key INTEGER,
+        opponent_rating INTEGER,
+        outcome CHAR(1),
+        date_time DATE,
+        time_class TEXT,
+        time_control TEXT,
+        eco TEXT,
+        PRIMARY KEY (player_key, game_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_player_games_player_date ON player_games (player_key, date_time);
+"""
+PLAYER_GAMES_COLUMNS = ["player_key", "game_id", "color", "rating", "opponent_key", "opponent_rating", "outcome",
+                        "date_time", "time_class", "time_control", "eco"]
+
+
+def _outcome_sql(color):
+    """W/D/L for the side playing color, from the winner enum."""
+    opponent = "black" if color == "white" else "white"
+    return f"CASE g.winner WHEN '{color}' THEN 'W' WHEN '{opponent}' THEN 'L' WHEN 'draw' THEN 'D' END"
+
+
+def _side_sql(color, source):
+    opponent = "black" if color == "white" else "white"
+    return f"""
+        SELECT g.{color}_key, g.game_id, '{color}', g.{color}_rating, g.{opponent}_key,
+               g.{opponent}_rating, {_outcome_sql(color)}, g.date_time, g.time_class, g.time_control, g.eco
+        FROM {source} g
+        WHERE g.{color}_key IS NOT NULL"""
+
+
+def participation_select(source):
+    """SELECT producing the player_games rows for every game in source (a table or transition table name)."""
+    return _side_sql("white", source) + "\n        UNION ALL" + _side_sql("black", source)
+
+
+# The games columns player_games rows are derived from; updates that change none of them leave player_games alone
+PARTICIPATION_SOURCE_COLUMNS = ["white_key", "black_key", "white_rating", "black_rating", "winner", "date_time",
+                                "time_class", "time_control", "eco"]
+
+
+def _changed_sql(old, new):
+    """Join condition pairing old and new versions of the updated games whose participation columns differ."""
+    old_columns = ", ".join(f"{old}.{column}" for column in PARTICIPATION_SOURCE_COLUMNS)
+    new_columns = ", ".join(f"{new}.{column}" for column in PARTICIPATION_SOURCE_COLUMNS)
+    return f"{new}.game_id = {old}.game_id AND ({old_columns}) IS DISTINCT FROM ({new_columns})"
+
+
+SYNC_FUNCTION_DDL = f"""
+    CREATE OR REPLACE FUNCTION sync_player_games() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM player_games p USING previous_games g
+            WHERE p.game_id = g.game_id AND p.player_key IN (g.white_key, g.black_key);
+        ELSIF TG_OP = 'UPDATE' THEN
+            DELETE FROM player_games p USING previous_games g JOIN changed_games n ON {_changed_sql('g', 'n')}
+            WHERE p.game_id = g.game_id AND p.player_key IN (g.white_key, g.black_key);
+            WITH updated_games AS (SELECT n.* FROM changed_games n JOIN previous_games g ON {_changed_sql('g', 'n')})
+            INSERT INTO player_games ({', '.join(PLAYER_GAMES_COLUMNS)}){textwrap.indent(participation_select("updated_games"), "    ")}
+            ON CONFLICT (player_key, game_id) DO NOTHING;
+        ELSE
+            INSERT INTO player_games ({', '.join(PLAYER_GAMES_COLUMNS)}){textwrap.indent(participation_select("changed_games"), "    ")}
+            ON CONFLICT (player_key, game_id) DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+"""
+# Statement-level triggers see a whole COPY/INSERT ... SELECT batch at once through the transition tables.
+# Old rows are removed by their player keys, so each one is a primary key probe rather than a scan. Updates only
+# touch the games whose participation columns changed, so backfills of other columns (moves, openings, results)
+# don't rewrite player_games or feed the aggregate change log. UPDATE OF can't do that filtering: Postgres
+# doesn't allow transition tables on triggers with a column list.
+TRIGGERS = {
+    "games_player_games_insert": "AFTER INSERT ON games REFERENCING NEW TABLE AS changed_games",
+    "games_player_games_update": "AFTER UPDATE ON games REFERENCING OLD TABLE AS previous_games NEW TABLE AS changed_games",
+    "games_player_games_delete": "AFTER DELETE ON games REFERENCING OLD TABLE AS previous_games",
+}
+
+
+def ensure_player_games_triggers(connection):
+    """(Re)creates the sync triggers on games that are missing or were created with other transition tables."""
+    present = dict(connection.execute(text("SELECT tgname, tgoldtable FROM pg_trigger WHERE tgrelid = 'games'::regclass")).all())
+    for name, timing in TRIGGERS.items():
+        old_table = "previous_games" if "OLD TABLE" in timing else None
+        if name in present:
+            if present[name] == old_table:
+                continue
+            connection.execute(text(f"DROP TRIGGER {name} ON games"))
+        connection.execute(text(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION sync_player_games()"))
+
@@ -0,0 +1,124 @@
+# partitions.py
+import datetime
+import logging
+import re
+
+from sqlalchemy import text
+
+# games is range-partitioned by month on date_time: games_YYYY_MM holds [first of the month, first of the next).
+# Date-bounded queries on games.date_time only scan the months they cover, and closed months can be compacted
+# or detached as a unit. Ingest creates the partitions a batch needs before loading it.
+PARTITION_NAME = re.compile(r"^games_(\d{4})_(\d{2})$")
+# Primary key of the partitioned games table; Postgres requires it to include the partition column
+PARTITIONED_KEY_COLUMNS = ("game_id", "date_time")
+# Serializes partition creation between concurrent ingests
+PARTITION_LOCK_KEY = 7340031
+
+# With date_time in the primary key, game_id alone is no longer unique: a game stored again under another date
+# (e.g. once a missing Date tag is filled in) would become a second row in another partition, while game_pgns,
+# game_moves and player_games are keyed by game_id alone. game_ids holds every stored game_id and is the conflict
+# target ingest claims ids against before it loads games; deleting a game's last row releases its id.
+GAME_IDS_DDL = """
+    CREATE TABLE IF NOT EXISTS game_ids (
+        game_id TEXT PRIMARY KEY
+    );
+    CREATE OR REPLACE FUNCTION release_game_ids() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM game_ids i USING removed_games r
+        WHERE i.game_id = r.game_id AND NOT EXISTS (SELECT 1 FROM games g WHERE g.game_id = r.game_id);
+        RETURN NULL;
+    END
+    $$;
+"""
+GAME_IDS_TRIGGER = "games_release_game_ids"
+
+
+def month_start(day):
+    """First day of the month of a date or YYYY-MM-DD string."""
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day[:10])
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month):
+    return f"games_{month:%Y_%m}"
+
+
+def partition_month(name):
+    """The month a games_YYYY_MM partition covers, or None for other tables."""
+    match = PARTITION_NAME.match(name)
+    return datetime.date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(connection, table="games"):
+    return connection.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+                              {"table": table}).scalar() or False
+
+
+def game_key_columns(connection):
+    """Conflict columns for inserts into games: (game_id, date_time) once games is partitioned, (game_id) before.
+    Uniqueness of game_id itself is enforced through game_ids."""
+    return PARTITIONED_KEY_COLUMNS if is_partitioned(connection) else ("game_id",)
+
+
+def ensure_game_ids_trigger(connection):
+    """(Re)creates the trigger on games that releases the game_ids of deleted games."""
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {GAME_IDS_TRIGGER} ON games"))
+    connection.execute(text(f"""
+        CREATE TRIGGER {GAME_IDS_TRIGGER} AFTER DELETE ON games REFERENCING OLD TABLE AS removed_games
+        FOR EACH STATEMENT EXECUTE FUNCTION release_game_ids()
+    """))
+
+
+def list_partitions(connection, parent="games"):
+    """Returns [(partition name, bound expression, rows estimate)] for the partitions of parent, oldest first."""
+    rows = connection.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::BIGINT
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:parent)
+        ORDER BY c.relname
+    """), {"parent": parent})
+    return [tuple(row) for row in rows]
+
+
+def create_month_partitions(connection, months, parent="games"):
+    """Creates the missing monthly partitions of parent inside the caller's transaction and returns their names.
+
+    Each partition is created standalone and then attached, which only takes a SHARE UPDATE EXCLUSIVE lock on
+    parent, so concurrent loads into other months carry on.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    existing = {name for name, _, _ in list_partitions(connection, parent)}
+    created = []
+    for month in sorted(set(months)):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        connection.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        connection.execute(text(
+            f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"))
+        logging.info(f"Created partition {name}.")
+        created.append(name)
+    return created
+
+
+def ensure_month_partitions(engine, days):
+    """Makes sure games has a partition for the month of every given date (dates or YYYY-MM-DD strings),
+    creating missing ones in a short transaction of its own. Does nothing while games is not partitioned.
+    Returns the names created."""
+    months = {month_start(day) for day in days if day}
+    if not months:
+        return []
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            return []
+        existing = {partition_month(name) for name, _, _ in list_partitions(connection)}
+    if months <= existing:
+        return []
+    with engine.begin() as connection:
+        return create_month_partitions(connection, months - existing)
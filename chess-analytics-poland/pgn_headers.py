@@ -0,0 +1,77 @@
+# pgn_headers.py
+import re
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # Batch scans fall back to the per-game scanner
+    pa = pc = None
+
+# One match per header line, bounded to the header block: a single linear pass with no backtracking
+# across lines. The value runs to the closing "] at the end of the line, so escaped quotes survive.
+HEADER_LINE_RE = re.compile(r'^\[(\w+)\s+"(.*)"\]\r?$', re.MULTILINE)
+
+
+def header_end(pgn):
+    """Offset where the header block ends (the first blank line), or the end of the string."""
+    end = pgn.find("\n\n")
+    return len(pgn) if end < 0 else end
+
+
+def scan_headers(pgn, tags=None):
+    """Returns the [Tag "value"] pairs of a PGN header block as a dict keyed by the tags as written, optionally
+    only the given tags, which are matched case-insensitively and keyed as passed."""
+    if not pgn:
+        return {}
+    headers = dict(HEADER_LINE_RE.findall(pgn, 0, header_end(pgn)))
+    if tags is not None:
+        by_name = {tag.lower(): value for tag, value in headers.items()}
+        return {tag: by_name[tag.lower()] for tag in tags if tag.lower() in by_name}
+    return headers
+
+
+@lru_cache(maxsize=None)
+def _tag_line_re(tag):
+    return re.compile(rf'^\[{re.escape(tag)}\s+"(.*)"\]\r?$', re.MULTILINE | re.IGNORECASE)
+
+
+def header_value(pgn, tag, default=None):
+    """Returns a single header's value without building the full dict — the cheapest lookup for one tag.
+    The tag name is matched case-insensitively."""
+    if not pgn:
+        return default
+    match = _tag_line_re(tag).search(pgn)
+    # Only scan up to the match to check it lies in the header block, not the movetext
+    if match is None or pgn.find("\n\n", 0, match.start()) >= 0:
+        return default
+    return match.group(1)
+
+
+def header_tag_pattern(tag):
+    """RE2 pattern (for Arrow's regex kernels) capturing one tag's value as group tag. It only matches within the
+    header block: every line before the tag must be another header line, so a [Tag "..."] in a movetext comment
+    after the blank line is never picked up."""
+    return rf'\A(?:\[[^\n]*\n)*?\[(?i:{tag})\s+"(?P<{tag}>[^\n]*)"\]\r?(?:\n|\z)'
+
+
+def scan_header_column(pgns, tags):
+    """Extracts the given tags from a whole column of PGNs at once.
+
+    Accepts a pandas Series, a pyarrow Array/ChunkedArray or any sequence of strings and returns a
+    DataFrame with one column per tag (None where a game lacks the tag), keeping a Series' index.
+    With pyarrow installed the work runs in Arrow's vectorized regex kernels; otherwise each game
+    goes through header_value.
+    """
+    import pandas as pd
+
+    index = pgns.index if isinstance(pgns, pd.Series) else None
+    if pc is not None:
+        array = pgns if isinstance(pgns, (pa.Array, pa.ChunkedArray)) else pa.array(pgns, type=pa.string(), from_pandas=True)
+        columns = {tag: pc.struct_field(pc.extract_regex(array, header_tag_pattern(tag)), [0]) for tag in tags}
+        frame = pa.table(columns).to_pandas()
+    else:
+        frame = pd.DataFrame({tag: [header_value(pgn, tag) for pgn in pgns] for tag in tags})
+    if index is not None:
+        frame.index = index
+    return frame
@@ -0,0 +1,69 @@
+# pgn_movetext.py
+import re
+from collections import namedtuple
+
+# Chess.com exports every ply as "<number>. <SAN> {[%clk H:MM:SS.d]}" (black plies numbered "<number>...")
+PLY_CLOCK_RE = re.compile(r'(\d+)(\.|\.\.\.) (\S+) \{\[%clk (\d+:\d+:\d+(?:\.\d)?)\]\}')
+# Generic PGN tokens: comments, variations, NAGs, rest-of-line comments, everything else
+TOKEN_RE = re.compile(r'\{[^}]*\}|\([^)]*\)|\$\d+|;[^\n]*|[^\s{}();]+')
+CLOCK_RE = re.compile(r'\[%clk (\d+:\d+:\d+(?:\.\d)?)\]')
+MOVE_NUMBER_PREFIX_RE = re.compile(r'^\d+\.+')
+RESULT_TOKENS = {"1-0", "0-1", "1/2-1/2", "*"}
+CLOCK_CACHE_LIMIT = 1 << 20
+
+TokenizedMovetext = namedtuple("TokenizedMovetext", ["moves", "clocks", "plies"])
+
+
+def clock_deciseconds(clock):
+    """Converts an H:MM:SS(.d) clock to deciseconds."""
+    hours, minutes, seconds = clock.split(":")
+    return int(hours) * 36000 + int(minutes) * 600 + round(float(seconds) * 10)
+
+
+class _ClockCache(dict):
+    """Memoizes clock conversions; the same few thousand clock strings recur across games."""
+
+    def __missing__(self, clock):
+        if len(self) >= CLOCK_CACHE_LIMIT:
+            self.clear()
+        value = self[clock] = clock_deciseconds(clock)
+        return value
+
+
+_clocks = _ClockCache()
+
+
+def _tokenize_generic(movetext):
+    """Token-by-token fallback for PGNs that don't follow the one-clock-per-ply Chess.com layout."""
+    moves, clocks = [], []
+    for token in TOKEN_RE.findall(movetext):
+        first = token[0]
+        if first == "{":
+            clock = CLOCK_RE.search(token)
+            if clock and moves:
+                clocks[-1] = _clocks[clock.group(1)]
+        elif first in "($;" or token in RESULT_TOKENS:
+            continue
+        else:
+            san = MOVE_NUMBER_PREFIX_RE.sub("", token) if first.isdigit() else token
+            if san:
+                moves.append(san)
+                clocks.append(None)
+    return moves, clocks
+
+
+def tokenize_movetext(movetext):
+    """Splits PGN movetext into SAN moves and the remaining clock after each ply, in deciseconds
+    (None where a ply has no %clk comment). Returns TokenizedMovetext(moves, clocks, plies).
+    """
+    found = PLY_CLOCK_RE.findall(movetext)
+    if found:
+        # Fast path: one regex pass when every ply carries a clock and nothing else is commented
+        number, dots = found[-1][0], found[-1][1]
+        expected = int(number) * 2 - (1 if dots == "." else 0)
+        if len(found) == expected == movetext.count("{"):
+            moves = [ply[2] for ply in found]
+            clocks = [_clocks[ply[3]] for ply in found]
+            return TokenizedMovetext(moves, clocks, len(moves))
+    moves, clocks = _tokenize_generic(movetext)
+    return TokenizedMovetext(moves, clocks, len(moves))
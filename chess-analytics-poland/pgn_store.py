@@ -0,0 +1,28 @@
+# pgn_store.py
+from sqlalchemy import text
+
+# Full PGNs live in game_pgns, out of the hot games table, and are read only by features that need them.
+# toast_tuple_target makes Postgres compress (and move out of line) any PGN over a few hundred bytes,
+# not just the ones past the default 2 kB threshold. Like game_moves it is keyed by game_id alone, without a
+# foreign key to the partitioned games table.
+GAME_PGNS_DDL = """
+    CREATE TABLE IF NOT EXISTS game_pgns (
+        game_id TEXT PRIMARY KEY,
+        pgn TEXT NOT NULL
+    ) WITH (toast_tuple_target = 256);
+"""
+PGN_COLUMNS = ["game_id", "pgn"]
+
+
+def fetch_pgn(connection, game_id):
+    """Returns one game's PGN, or None if it isn't stored."""
+    return connection.execute(text("SELECT pgn FROM game_pgns WHERE game_id = :game_id"), {"game_id": game_id}).scalar()
+
+
+def fetch_pgns(connection, game_ids):
+    """Returns {game_id: pgn} for the given games in one primary-key lookup; games without a PGN are left out."""
+    game_ids = list(game_ids)
+    if not game_ids:
+        return {}
+    rows = connection.execute(text("SELECT game_id, pgn FROM game_pgns WHERE game_id = ANY(:game_ids)"), {"game_ids": game_ids})
+    return dict(rows.all())
@@ -0,0 +1,50 @@
+# player_queries.py
+from players import PLAYER_KEY_SQL
+
+# Per-player queries take the :player parameter as a lower-cased username (the players handle), resolve it to
+# its integer key once and range-scan the narrow player_games table (see participation.py) on that key.
+
+# Game ids of the :player parameter's games, for semi-joins such as "g.game_id IN (...)": one range scan
+# over the player_games primary key
+PLAYER_GAME_IDS_SQL = f"SELECT game_id FROM player_games WHERE player_key = ({PLAYER_KEY_SQL})"
+
+# The :player parameter's games from player_games alone, in the white/black shape the charts use (players by
+# handle), plus the player's own rating, color, W/D/L outcome and ECO code, oldest first. winner is NULL for draws.
+PLAYER_GAME_ROWS_SQL = """
+    SELECT pg.date_time,
+           pg.rating AS player_rating,
+           CASE WHEN pg.color = 'white' THEN me.handle ELSE op.handle END AS white_player_id,
+           CASE WHEN pg.color = 'white' THEN pg.rating ELSE pg.opponent_rating END AS white_rating,
+           CASE WHEN pg.color = 'black' THEN me.handle ELSE op.handle END AS black_player_id,
+           CASE WHEN pg.color = 'black' THEN pg.rating ELSE pg.opponent_rating END AS black_rating,
+           CASE pg.outcome WHEN 'W' THEN me.handle WHEN 'L' THEN op.handle END AS winner,
+           pg.color, pg.outcome, pg.time_class, pg.time_control, pg.eco
+    FROM players me
+    JOIN player_games pg ON pg.player_key = me.player_key
+    LEFT JOIN players op ON op.player_key = pg.opponent_key
+    WHERE me.handle = :player
+    ORDER BY pg.date_time
+"""
+
+# The :player parameter's totals from the maintained aggregate tables (see aggregates.py): a primary key lookup
+# per query, however many games are stored. Win rates count draws as non-wins, like the charts always have.
+PLAYER_COLOR_STATS_SQL = f"""
+    SELECT color, games, wins, draws, losses, wins::FLOAT / games AS win_rate
+    FROM player_color_stats
+    WHERE player_key = ({PLAYER_KEY_SQL})
+"""
+PLAYER_TIME_CLASS_STATS_SQL = f"""
+    SELECT time_class, games, wins, draws, losses, wins::FLOAT / games AS win_rate,
+           rating_sum::FLOAT / NULLIF(rated_games, 0) AS avg_rating
+    FROM player_time_class_stats
+    WHERE player_key = ({PLAYER_KEY_SQL})
+    ORDER BY games DESC
+"""
+# ECO codes played at least :min_games times, best win rate first; :limit NULL returns them all
+PLAYER_ECO_STATS_SQL = f"""
+    SELECT eco, games AS total_games, wins, wins::FLOAT / games AS win_rate
+    FROM player_eco_stats
+    WHERE player_key = ({PLAYER_KEY_SQL}) AND games >= :min_games
+    ORDER BY win_rate DESC, eco
+    LIMIT :limit
+"""
@@ -0,0 +1,68 @@
+# players.py
+
+from sqlalchemy import text
+
+# The players dimension: one row per Chess.com account under a compact integer key, which games and player_games
+# reference instead of repeating the username. handle is the lower-cased username every lookup goes through;
+# username keeps the spelling Chess.com first reported.
+PLAYERS_DDL = """
+    CREATE TABLE IF NOT EXISTS players (
+        player_key INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        handle TEXT NOT NULL UNIQUE,
+        username TEXT NOT NULL,
+        name TEXT,
+        title TEXT,
+        country TEXT,
+        location TEXT,
+        last_online TIMESTAMP WITH TIME ZONE,
+        joined TIMESTAMP WITH TIME ZONE,
+        status TEXT,
+        rating INTEGER
+    );
+"""
+# games.winner: the side that won, or draw; NULL when unknown (4 bytes instead of a repeated username)
+GAME_WINNER_DDL = """
+    DO $$ BEGIN
+        CREATE TYPE game_winner AS ENUM ('white', 'black', 'draw');
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$;
+"""
+
+# Resolves the :player parameter (a lower-cased username) to its key, for "player_key = (...)" filters
+PLAYER_KEY_SQL = "SELECT player_key FROM players WHERE handle = :player"
+
+
+def upsert_players(connection, usernames):
+    """Adds a players row for every username not stored yet, inside the caller's transaction, and returns
+    {handle: player_key} for all of them.
+
+    Known handles are filtered out before the insert, so repeat opponents neither burn identity values nor
+    contend on row locks; handles are inserted in sorted order so concurrent ingests can't deadlock.
+    """
+    spellings = {}
+    for username in usernames:
+        if username:
+            spellings.setdefault(username.lower(), username)
+    if not spellings:
+        return {}
+    handles = sorted(spellings)
+    connection.execute(text("""
+        INSERT INTO players (handle, username)
+        SELECT u.handle, u.username
+        FROM unnest(CAST(:handles AS TEXT[]), CAST(:usernames AS TEXT[])) AS u(handle, username)
+        WHERE NOT EXISTS (SELECT 1 FROM players p WHERE p.handle = u.handle)
+        ORDER BY u.handle
+        ON CONFLICT (handle) DO NOTHING
+    """), {"handles": handles, "usernames": [spellings[handle] for handle in handles]})
+    rows = connection.execute(text("SELECT handle, player_key FROM players WHERE handle = ANY(:handles)"),
+                              {"handles": handles})
+    return dict(rows.all())
+
+
+def assign_player_keys(connection, games):
+    """Sets white_key and black_key on game rows from their white_player_id/black_player_id usernames,
+    adding unseen players to the dimension first. Runs inside the caller's transaction."""
+    keys = upsert_players(connection, (name for game in games for name in (game["white_player_id"], game["black_player_id"])))
+    for game in games:
+        game["white_key"] = keys.get((game["white_player_id"] or "").lower())
+        game["black_key"] = keys.get((game["black_player_id"] or "").lower())
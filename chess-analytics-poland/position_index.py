@@ -0,0 +1,104 @@
+# position_index.py
+import chess
+import chess.polyglot
+from sqlalchemy import text
+
+DEFAULT_GAME_LIMIT = 50
+HASH_OFFSET = 1 << 63  # Polyglot hashes are unsigned 64-bit; BIGINT is signed
+
+
+def to_bigint(key):
+    """Maps an unsigned 64-bit hash onto the signed BIGINT range, preserving equality."""
+    return key - HASH_OFFSET
+
+
+def position_hash(board):
+    """Polyglot Zobrist hash of a position as a BIGINT. Move counters are not part of it, so
+    transpositions reached on different move numbers share a hash."""
+    return to_bigint(chess.polyglot.zobrist_hash(board))
+
+
+def fen_hash(fen):
+    """Hash of the position a FEN describes. Raises ValueError for an invalid FEN."""
+    return position_hash(chess.Board(fen))
+
+
+_hasher = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+_piece_keys = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+
+def _piece_key(piece, square):
+    return _piece_keys[64 * ((piece.piece_type - 1) * 2 + piece.color) + square] if piece else 0
+
+
+def _changed_squares(board, move):
+    """Squares whose contents a (legal) move changes, including castling rooks and en passant captures."""
+    squares = [move.from_square, move.to_square]
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square) * 8
+        if chess.square_file(move.to_square) > chess.square_file(move.from_square):
+            squares += [rank + 7, rank + 5]
+        else:
+            squares += [rank, rank + 3]
+    elif board.is_en_passant(move):
+        squares.append(move.to_square + (-8 if board.turn == chess.WHITE else 8))
+    return squares
+
+
+def replay_positions(game):
+    """Replays one (game_id, moves) pair and returns (game_id, [(position_hash, game_id, ply), ...]) covering
+    every position after the start, keeping only the first ply at which a repeated position occurs. Stops at
+    the first illegal or unparsable move, so a damaged game is indexed as far as it is playable."""
+    game_id, moves = game
+    board = chess.Board()
+    # The piece placement part of the hash is updated incrementally from the squares each move changes;
+    # only the cheap castling, en passant and side-to-move terms are recomputed per ply
+    pieces = _hasher.hash_board(board)
+    seen = set()
+    rows = []
+    for ply, san in enumerate(moves, 1):
+        try:
+            move = board.parse_san(san)
+        except ValueError:
+            break
+        squares = _changed_squares(board, move)
+        for square in squares:
+            pieces ^= _piece_key(board.piece_at(square), square)
+        board.push(move)
+        for square in squares:
+            pieces ^= _piece_key(board.piece_at(square), square)
+        key = to_bigint(pieces ^ _hasher.hash_castling(board) ^ _hasher.hash_ep_square(board) ^ _hasher.hash_turn(board))
+        if key not in seen:
+            seen.add(key)
+            rows.append((key, game_id, ply))
+    return game_id, rows
+
+
+def position_stats(connection, fen):
+    """Counts the games that reached the FEN's position and how they ended."""
+    row = connection.execute(text("""
+        SELECT COUNT(*) AS games,
+               COUNT(*) FILTER (WHERE g.result = '1-0') AS white_wins,
+               COUNT(*) FILTER (WHERE g.result = '1/2-1/2') AS draws,
+               COUNT(*) FILTER (WHERE g.result = '0-1') AS black_wins
+        FROM game_positions p
+        JOIN games g ON g.game_id = p.game_id
+        WHERE p.position_hash = :hash
+    """), {"hash": fen_hash(fen)}).mappings().one()
+    return dict(row)
+
+
+def find_games(connection, fen, limit=DEFAULT_GAME_LIMIT):
+    """Returns the most recent games that reached the FEN's position, with the ply they reached it at."""
+    rows = connection.execute(text("""
+        SELECT g.game_id, p.ply, w.username AS white_player_id, b.username AS black_player_id, g.white_rating,
+               g.black_rating, g.result, g.time_class, g.end_time
+        FROM game_positions p
+        JOIN games g ON g.game_id = p.game_id
+        LEFT JOIN players w ON w.player_key = g.white_key
+        LEFT JOIN players b ON b.player_key = g.black_key
+        WHERE p.position_hash = :hash
+        ORDER BY g.end_time DESC NULLS LAST
+        LIMIT :limit
+    """), {"hash": fen_hash(fen), "limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
@@ -0,0 +1,67 @@
+# rate_limiter.py
+import multiprocessing
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to the Chess.com API.
+
+    `rate` tokens are added per second up to `capacity`; a rate of 0 or less
+    disables limiting entirely.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available, then consumes them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in shared memory, so one rate budget spans several worker processes.
+
+    Must reach workers through inheritance (e.g. a pool initializer), not as a task argument.
+    """
+
+    def __init__(self, rate, capacity=1, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        # [tokens, last refill time]; CLOCK_MONOTONIC is system-wide, so timestamps compare across processes
+        self._state = context.Array('d', [self.capacity, time.monotonic()])
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available, then consumes them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._state.get_lock():
+                now = time.monotonic()
+                available = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+                self._state[1] = now
+                if available >= tokens:
+                    self._state[0] = available - tokens
+                    return
+                self._state[0] = available
+                wait = (tokens - available) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,90 @@
+# schema_indexes.py
+import logging
+
+from sqlalchemy import text
+
+from partitions import is_partitioned, list_partitions
+
+# Managed secondary indexes on games: name -> indexed columns. The player key indexes serve the players foreign
+# keys and per-color, date-ordered scans (per-player queries go through player_games).
+GAME_INDEXES = {
+    "idx_games_white_key_date": "(white_key, date_time)",
+    "idx_games_black_key_date": "(black_key, date_time)",
+    "idx_games_eco": "(eco)",
+    "idx_games_time_class": "(time_class)",
+    "idx_games_book_opening": "(book_opening)",
+}
+
+
+def index_name(name, table="games"):
+    """Name of a managed index on table, e.g. idx_games_eco on games, idx_games_partitioned_eco on games_partitioned."""
+    return name.replace("idx_games", f"idx_{table}", 1)
+
+
+def existing_indexes(connection, table="games"):
+    """Returns {index name: valid} for the indexes on table. An index is invalid when a concurrent build failed."""
+    rows = connection.execute(text("""
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = :table
+    """), {"table": table})
+    return {name: valid for name, valid in rows}
+
+
+def attached_partitions(connection, index):
+    """Names of the partitions whose index is attached to a partitioned index."""
+    rows = connection.execute(text("""
+        SELECT t.relname
+        FROM pg_inherits i
+        JOIN pg_index x ON x.indexrelid = i.inhrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        WHERE i.inhparent = to_regclass(:index)
+    """), {"index": index})
+    return {row[0] for row in rows}
+
+
+def build_partitioned_index(connection, name, table, columns):
+    """Builds an index on a partitioned table without blocking writes. CREATE INDEX CONCURRENTLY can't target a
+    partitioned table, so the index is created on the parent alone, each partition's index is built concurrently
+    and attached, and the parent index turns valid once every partition has one. Safe to rerun after a failure."""
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {columns}"))
+    attached = attached_partitions(connection, name)
+    for partition, _, _ in list_partitions(connection, table):
+        if partition in attached:
+            continue
+        child = f"{name}_{partition[len('games_'):]}"
+        if existing_indexes(connection, partition).get(child) is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {child}"))
+        logging.info(f"Creating index {child} on {partition} {columns}...")
+        connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} {columns}"))
+        connection.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+
+
+def ensure_indexes(connection, concurrently=False, table="games"):
+    """Creates every managed index that doesn't exist yet on table (games or a copy of it), rebuilding ones left
+    invalid by a failed concurrent build, and returns the names created.
+
+    With concurrently, the builds don't block writes to games but the connection must be in autocommit
+    mode (CREATE INDEX CONCURRENTLY cannot run inside a transaction). On a partitioned table the partitions
+    are indexed one by one (see build_partitioned_index).
+    """
+    present = existing_indexes(connection, table)
+    partitioned = concurrently and is_partitioned(connection, table)
+    mode = "CONCURRENTLY " if concurrently else ""
+    created = []
+    for base_name, columns in GAME_INDEXES.items():
+        name = index_name(base_name, table)
+        if present.get(name):
+            continue
+        if partitioned:
+            build_partitioned_index(connection, name, table, columns)
+        else:
+            if name in present:
+                logging.warning(f"Index {name} is invalid (interrupted build), rebuilding it.")
+                connection.execute(text(f"DROP INDEX {mode}IF EXISTS {name}"))
+            logging.info(f"Creating index {name} on {table} {columns}...")
+            connection.execute(text(f"CREATE INDEX {mode}IF NOT EXISTS {name} ON {table} {columns}"))
+        created.append(name)
+    return created
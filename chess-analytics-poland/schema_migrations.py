@@ -0,0 +1,321 @@
+# schema_migrations.py
+import logging
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from aggregates import AGGREGATE_TABLES, CHANGES_DDL, LOG_FUNCTION_DDL, TRIGGERS as AGGREGATE_TRIGGERS, aggregate_ddl, rebuild_aggregates
+from db_connection import get_engine
+from partitions import GAME_IDS_DDL, ensure_game_ids_trigger
+from participation import PLAYER_GAMES_COLUMNS, PLAYER_GAMES_DDL, SYNC_FUNCTION_DDL, ensure_player_games_triggers, participation_select
+from pgn_store import GAME_PGNS_DDL
+from players import GAME_WINNER_DDL, PLAYERS_DDL
+from schema_indexes import ensure_indexes
+
+# The database schema is built by the ordered migrations below, and schema_version records the ones applied.
+# Every migration is idempotent, so it also brings a database created by earlier code (which set up its schema
+# at runtime) up to date without knowing which parts it already has. Batch scripts call migrate() on startup,
+# which is a single version lookup once the database is current. New schema changes go at the end of MIGRATIONS
+# with the next version number; applied migrations are never edited.
+#
+# transactional migrations run in one transaction each, together with their schema_version row. The others run
+# in autocommit mode so they can build indexes CONCURRENTLY without blocking writers; they must be safe to rerun
+# after an interruption.
+Migration = namedtuple("Migration", ["version", "description", "apply", "transactional"])
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    );
+"""
+# Serializes migration runs between processes starting at the same time
+MIGRATION_LOCK_KEY = 7340033
+# The PGN Result tag's value, for SQL substring()/~
+RESULT_TAG_PATTERN = r'\[Result "([^"]+)"\]'
+
+# Range-partitioned by month on date_time (see partitions.py); ingest creates the games_YYYY_MM partitions as
+# batches need them. The primary key has to include the partition column.
+GAMES_DDL = """
+    CREATE TABLE IF NOT EXISTS games (
+        game_id TEXT NOT NULL,
+        white_rating INTEGER,
+        black_rating INTEGER,
+        time_class TEXT,
+        time_control TEXT,
+        rules TEXT,
+        eco TEXT,
+        start_time TIMESTAMP WITH TIME ZONE,
+        end_time TIMESTAMP WITH TIME ZONE,
+        date_time DATE NOT NULL,
+        PRIMARY KEY (game_id, date_time)
+    ) PARTITION BY RANGE (date_time);
+"""
+# Columns added after the first games tables were created (filled by single-pass extraction, see game_extraction.py)
+GAME_COLUMNS_DDL = """
+    ALTER TABLE games
+        ADD COLUMN IF NOT EXISTS date_time DATE,
+        ADD COLUMN IF NOT EXISTS white_key INTEGER REFERENCES players(player_key),
+        ADD COLUMN IF NOT EXISTS black_key INTEGER REFERENCES players(player_key),
+        ADD COLUMN IF NOT EXISTS winner game_winner,
+        ADD COLUMN IF NOT EXISTS base_time INTEGER,
+        ADD COLUMN IF NOT EXISTS increment INTEGER,
+        ADD COLUMN IF NOT EXISTS eco_url TEXT,
+        ADD COLUMN IF NOT EXISTS opening_name TEXT,
+        ADD COLUMN IF NOT EXISTS book_eco TEXT,
+        ADD COLUMN IF NOT EXISTS book_opening TEXT,
+        ADD COLUMN IF NOT EXISTS book_plies SMALLINT,
+        ADD COLUMN IF NOT EXISTS result TEXT,
+        ADD COLUMN IF NOT EXISTS termination TEXT,
+        ADD COLUMN IF NOT EXISTS move_count INTEGER;
+"""
+SIDE_TABLES_DDL = [
+    GAME_PGNS_DDL,
+    """
+    CREATE TABLE IF NOT EXISTS player_sync_state (
+        player_id TEXT NOT NULL,
+        archive_month DATE NOT NULL,
+        last_end_time TIMESTAMP WITH TIME ZONE,
+        game_count INTEGER NOT NULL DEFAULT 0,
+        complete BOOLEAN NOT NULL DEFAULT FALSE,
+        synced_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (player_id, archive_month)
+    );
+    """,
+    # clocks[i] is the mover's remaining time after ply i in deciseconds (NULL when the PGN has no %clk)
+    """
+    CREATE TABLE IF NOT EXISTS game_moves (
+        game_id TEXT PRIMARY KEY,
+        ply_count SMALLINT NOT NULL,
+        moves TEXT[] NOT NULL,
+        clocks INTEGER[] NOT NULL
+    );
+    ALTER TABLE game_moves ADD COLUMN IF NOT EXISTS positions_indexed BOOLEAN NOT NULL DEFAULT FALSE;
+    """,
+    # Every position reached in a game by Polyglot Zobrist hash (see position_index.py); ply is the first one
+    """
+    CREATE TABLE IF NOT EXISTS game_positions (
+        position_hash BIGINT NOT NULL,
+        game_id TEXT NOT NULL,
+        ply SMALLINT NOT NULL,
+        PRIMARY KEY (position_hash, game_id)
+    );
+    """,
+    # Per-player repertoire by move prefix (see opening_tree.py); the prefix index serves path LIKE 'e4 e5 %'
+    # regardless of the database collation
+    """
+    CREATE TABLE IF NOT EXISTS opening_tree (
+        player_id TEXT NOT NULL,
+        color TEXT NOT NULL,
+        path TEXT NOT NULL,
+        depth SMALLINT NOT NULL,
+        move TEXT,
+        games INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        draws INTEGER NOT NULL,
+        losses INTEGER NOT NULL,
+        opponent_rating_sum BIGINT NOT NULL,
+        PRIMARY KEY (player_id, color, path)
+    );
+    CREATE INDEX IF NOT EXISTS idx_opening_tree_prefix ON opening_tree (player_id, color, path text_pattern_ops);
+    """,
+]
+
+
+def create_players(connection):
+    """Creates the players dimension and the game_winner type. A players table from the original schema (text
+    player_id, never populated) is set aside as players_legacy."""
+    legacy = connection.execute(text("""
+        SELECT to_regclass('players') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM information_schema.columns WHERE table_name = 'players' AND column_name = 'player_key')
+    """)).scalar()
+    if legacy:
+        connection.execute(text("""
+            ALTER TABLE IF EXISTS games
+                DROP CONSTRAINT IF EXISTS games_white_player_id_fkey,
+                DROP CONSTRAINT IF EXISTS games_black_player_id_fkey
+        """))
+        connection.execute(text("ALTER TABLE players RENAME TO players_legacy"))
+        connection.execute(text("ALTER TABLE players_legacy RENAME CONSTRAINT players_pkey TO players_legacy_pkey"))
+        logging.warning("Renamed the old text-keyed players table to players_legacy.")
+    connection.execute(text(PLAYERS_DDL))
+    connection.execute(text(GAME_WINNER_DDL))
+
+
+def create_games(connection):
+    """Creates the partitioned games table, or adds the newer columns to an existing one (partitioned or not;
+    scripts/partition_games.py converts the latter)."""
+    connection.execute(text(GAMES_DDL))
+    connection.execute(text(GAME_COLUMNS_DDL))
+
+
+def create_side_tables(connection):
+    for ddl in SIDE_TABLES_DDL:
+        connection.execute(text(ddl))
+
+
+def create_player_games(connection):
+    """Creates player_games and its sync triggers on games, filling it from the stored games. A player_games
+    table from before the players dimension (text player_id) is rebuilt."""
+    exists = connection.execute(text("SELECT to_regclass('player_games') IS NOT NULL")).scalar()
+    if exists and connection.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'player_games' AND column_name = 'player_id')
+    """)).scalar():
+        connection.execute(text("DROP TABLE player_games"))
+        exists = False
+    connection.execute(text(PLAYER_GAMES_DDL))
+    connection.execute(text(SYNC_FUNCTION_DDL))
+    ensure_player_games_triggers(connection)
+    if not exists:
+        result = connection.execute(text(f"""
+            INSERT INTO player_games ({', '.join(PLAYER_GAMES_COLUMNS)}){participation_select("games")}
+            ON CONFLICT (player_key, game_id) DO NOTHING
+        """))
+        logging.info(f"Filled player_games with {result.rowcount} rows from existing games.")
+
+
+def create_aggregates(connection):
+    """Creates the per-player aggregate tables and the player_games change log with its triggers, filling the
+    tables from player_games when they are new."""
+    exists = connection.execute(text("SELECT to_regclass('player_stats') IS NOT NULL")).scalar()
+    connection.execute(text(CHANGES_DDL))
+    for table, keys in AGGREGATE_TABLES.items():
+        connection.execute(text(aggregate_ddl(table, keys)))
+    connection.execute(text(LOG_FUNCTION_DDL))
+    for name, timing in AGGREGATE_TRIGGERS.items():
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name} ON player_games"))
+        connection.execute(text(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION log_player_games_changes()"))
+    if not exists:
+        rebuild_aggregates(connection)
+
+
+def create_game_indexes(connection):
+    """Builds the managed games indexes without blocking writers (see schema_indexes.py)."""
+    created = ensure_indexes(connection, concurrently=True)
+    if created:
+        connection.execute(text("ANALYZE games"))
+
+
+def game_column_types(connection):
+    rows = connection.execute(text("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_name = 'games' AND table_schema = current_schema()
+    """))
+    return dict(rows.all())
+
+
+def convert_winner(connection):
+    """Converts a winner column from before the game_winner type, which held the winner's username (and the black
+    player's for draws), to the enum; ADD COLUMN IF NOT EXISTS in migration 2 leaves such a column as text.
+
+    The side is read from the PGN result, so games without one get it from their Result tag first (in game_pgns,
+    or the inline games.pgn not moved yet). Without a result a black username can't be told from a draw and
+    becomes NULL (unknown). Rewrites games under an exclusive lock."""
+    columns = game_column_types(connection)
+    if columns.get("winner") != "text":
+        return
+    if "pgn" in columns:
+        connection.execute(text(f"""
+            UPDATE games SET result = substring(pgn FROM '{RESULT_TAG_PATTERN}')
+            WHERE result IS NULL AND pgn ~ '{RESULT_TAG_PATTERN}'
+        """))
+    connection.execute(text(f"""
+        UPDATE games g SET result = substring(p.pgn FROM '{RESULT_TAG_PATTERN}')
+        FROM game_pgns p
+        WHERE p.game_id = g.game_id AND g.result IS NULL AND p.pgn ~ '{RESULT_TAG_PATTERN}'
+    """))
+    legacy_side = "WHEN LOWER(winner) = LOWER(white_player_id) THEN 'white'" if "white_player_id" in columns else ""
+    connection.execute(text(f"""
+        ALTER TABLE games ALTER COLUMN winner TYPE game_winner USING (CASE
+            WHEN result = '1-0' THEN 'white'
+            WHEN result = '0-1' THEN 'black'
+            WHEN result = '1/2-1/2' THEN 'draw'
+            WHEN winner IN ('white', 'black', 'draw') THEN winner
+            {legacy_side}
+        END)::game_winner
+    """))
+    logging.info("Converted games.winner to the game_winner type.")
+
+
+def create_game_ids(connection):
+    """Creates the game_ids guard with its delete trigger on games (see partitions.py) and fills it from the
+    stored games."""
+    connection.execute(text(GAME_IDS_DDL))
+    ensure_game_ids_trigger(connection)
+    result = connection.execute(text("INSERT INTO game_ids (game_id) SELECT DISTINCT game_id FROM games ON CONFLICT DO NOTHING"))
+    logging.info(f"Filled game_ids with {result.rowcount} ids from existing games.")
+
+
+def replace_player_games_sync(connection):
+    """Replaces sync_player_games() with the version that skips updates leaving player_games' columns unchanged."""
+    connection.execute(text(SYNC_FUNCTION_DDL))
+
+
+MIGRATIONS = [
+    Migration(1, "players dimension and game_winner type", create_players, True),
+    Migration(2, "games table and extraction columns", create_games, True),
+    Migration(3, "game_pgns, player_sync_state, game_moves, game_positions and opening_tree", create_side_tables, True),
+    Migration(4, "player_games participation table and sync triggers", create_player_games, True),
+    Migration(5, "per-player aggregate tables and change log", create_aggregates, True),
+    Migration(6, "managed games indexes, built concurrently", create_game_indexes, False),
+    Migration(7, "game_ids guard keeping game_id unique across partitions", create_game_ids, True),
+    Migration(8, "convert a text games.winner to the game_winner type", convert_winner, True),
+    Migration(9, "player_games update sync limited to changed participation columns", replace_player_games_sync, True),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def applied_versions(connection):
+    """The versions recorded in schema_version, empty before the first migration run."""
+    if not connection.execute(text("SELECT to_regclass('schema_version') IS NOT NULL")).scalar():
+        return set()
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+
+def pending_migrations(connection, target=None):
+    applied = applied_versions(connection)
+    return [migration for migration in MIGRATIONS
+            if migration.version not in applied and (target is None or migration.version <= target)]
+
+
+def apply_migration(engine, migration):
+    """Applies one migration and records it, unless another process did so first. Returns whether it ran."""
+    record = text("INSERT INTO schema_version (version, description) VALUES (:version, :description)")
+    params = {"version": migration.version, "description": migration.description}
+    if migration.transactional:
+        with engine.begin() as connection:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            if migration.version in applied_versions(connection):
+                return False
+            migration.apply(connection)
+            connection.execute(record, params)
+        return True
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            if migration.version in applied_versions(connection):
+                return False
+            migration.apply(connection)
+            connection.execute(record, params)
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return True
+
+
+def migrate(engine=None, target=None):
+    """Applies the pending migrations in version order (up to target if given) and returns the versions applied.
+    When the database is current this is one schema_version lookup."""
+    engine = engine or get_engine()
+    with engine.connect() as connection:
+        pending = pending_migrations(connection, target)
+    if not pending:
+        return []
+    with engine.begin() as connection:
+        connection.execute(text(SCHEMA_VERSION_DDL))
+    applied = []
+    for migration in pending:
+        logging.info(f"Applying migration {migration.version}: {migration.description}...")
+        if apply_migration(engine, migration):
+            applied.append(migration.version)
+    return applied
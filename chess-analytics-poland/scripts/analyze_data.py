@@ -6,65 +6,76 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from db_connection import get_engine
+from aggregates import refresh_aggregates
 
 engine = get_engine()
 print("✅ Database connection imported and created successfully.")
 
 
+# All three read the maintained per-player aggregate tables (see aggregates.py), which hold one row per player,
+# player and color or player pairing, so they cost the same however many games are stored.
+
 # 1️⃣ Average ratings between player pairings
 query_avg_ratings = """
 SELECT 
-    white_player_id, 
-    AVG(white_rating) AS avg_white_rating, 
-    black_player_id, 
-    AVG(black_rating) AS avg_black_rating
-FROM games
-GROUP BY white_player_id, black_player_id
+    w.handle AS white_player_id, 
+    s.rating_sum::FLOAT / NULLIF(s.rated_games, 0) AS avg_white_rating, 
+    b.handle AS black_player_id, 
+    s.opponent_rating_sum::FLOAT / NULLIF(s.opponent_rated_games, 0) AS avg_black_rating
+FROM player_pair_stats s
+JOIN players w ON w.player_key = s.player_key
+JOIN players b ON b.player_key = s.opponent_key
+WHERE s.color = 'white'
 """
-df_avg_ratings = pd.read_sql(query_avg_ratings, engine)
-print("🎯 Average Ratings Per Player Pairing:")
-print(df_avg_ratings.head())
 
 # 2️⃣ Total games played by player as white and as black — separately aggregated
 query_game_counts = """
-SELECT player_id, 
-       SUM(games_as_white) AS white_games,
-       SUM(games_as_black) AS black_games,
-       SUM(games_as_white + games_as_black) AS total_games
-FROM (
-    SELECT white_player_id AS player_id, COUNT(*) AS games_as_white, 0 AS games_as_black
-    FROM games
-    GROUP BY white_player_id
-
-    UNION ALL
-
-    SELECT black_player_id AS player_id, 0 AS games_as_white, COUNT(*) AS games_as_black
-    FROM games
-    GROUP BY black_player_id
-) sub
-GROUP BY player_id
+SELECT p.handle AS player_id,
+       COALESCE(w.games, 0) AS white_games,
+       COALESCE(b.games, 0) AS black_games,
+       s.games AS total_games
+FROM player_stats s
+JOIN players p ON p.player_key = s.player_key
+LEFT JOIN player_color_stats w ON w.player_key = s.player_key AND w.color = 'white'
+LEFT JOIN player_color_stats b ON b.player_key = s.player_key AND b.color = 'black'
 """
-df_game_counts = pd.read_sql(query_game_counts, engine)
-print("\n🎯 Total Games Played Per Player (White & Black):")
-print(df_game_counts.head())
 
 # 3️⃣ Win stats per player regardless of color
 query_win_rates = """
-SELECT 
-    player_id,
-    SUM(CASE WHEN player_id = white_player_id THEN 1 ELSE 0 END) AS games_as_white,
-    SUM(CASE WHEN player_id = black_player_id THEN 1 ELSE 0 END) AS games_as_black,
-    SUM(CASE WHEN player_id = winner THEN 1 ELSE 0 END) AS wins
-FROM (
-    SELECT white_player_id AS player_id, * FROM games
-    UNION ALL
-    SELECT black_player_id AS player_id, * FROM games
-) sub
-GROUP BY player_id
+SELECT p.handle AS player_id,
+       COALESCE(w.games, 0) AS games_as_white,
+       COALESCE(b.games, 0) AS games_as_black,
+       s.wins
+FROM player_stats s
+JOIN players p ON p.player_key = s.player_key
+LEFT JOIN player_color_stats w ON w.player_key = s.player_key AND w.color = 'white'
+LEFT JOIN player_color_stats b ON b.player_key = s.player_key AND b.color = 'black'
 """
-df_win_rates = pd.read_sql(query_win_rates, engine)
-df_win_rates["total_games"] = df_win_rates["games_as_white"] + df_win_rates["games_as_black"]
-df_win_rates["win_rate"] = df_win_rates["wins"] / df_win_rates["total_games"]
 
-print("\n🎯 Win Rates Per Player:")
-print(df_win_rates.head())
+
+def run_analysis(engine=engine):
+    """Prints pairing rating averages, game counts and win rates for every player in the database."""
+    # Fold in whatever changed since the last ingest (e.g. backfills) before reading the aggregates
+    with engine.begin() as connection:
+        refresh_aggregates(connection)
+
+    df_avg_ratings = pd.read_sql(query_avg_ratings, engine)
+    print("🎯 Average Ratings Per Player Pairing:")
+    print(df_avg_ratings.head())
+
+    df_game_counts = pd.read_sql(query_game_counts, engine)
+    print("\n🎯 Total Games Played Per Player (White & Black):")
+    print(df_game_counts.head())
+
+    df_win_rates = pd.read_sql(query_win_rates, engine)
+    df_win_rates["total_games"] = df_win_rates["games_as_white"] + df_win_rates["games_as_black"]
+    df_win_rates["win_rate"] = df_win_rates["wins"] / df_win_rates["total_games"]
+
+    print("\n🎯 Win Rates Per Player:")
+    print(df_win_rates.head())
+
+    return {"avg_ratings": df_avg_ratings, "game_counts": df_game_counts, "win_rates": df_win_rates}
+
+
+if __name__ == "__main__":
+    run_analysis()
@@ -0,0 +1,72 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from bulk_load import copy_insert
+from game_extraction import MOVE_COLUMNS, split_pgn
+from pgn_movetext import tokenize_movetext
+from schema_migrations import migrate
+from player_queries import PLAYER_GAME_IDS_SQL
+
+# Backfill for games ingested before the movetext was tokenized into game_moves (see pgn_movetext.py).
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def iter_missing_games(connection, player=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams (game_id, pgn) for games that have no game_moves row yet, through a server-side cursor.
+    Reads game_pgns, so move inline PGNs there first with scripts/migrate_pgns.py."""
+    query = """
+        SELECT p.game_id, p.pgn
+        FROM game_pgns p
+        WHERE NOT EXISTS (SELECT 1 FROM game_moves m WHERE m.game_id = p.game_id)
+    """
+    params = {}
+    if player:
+        query += f" AND p.game_id IN ({PLAYER_GAME_IDS_SQL})"
+        params["player"] = player.lower()
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(text(query), params)
+    for partition in result.partitions():
+        yield partition
+
+
+def backfill_game_moves(player=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Tokenizes the stored PGN of every game missing from game_moves, one committed batch at a time.
+    Returns the number of rows written."""
+    engine = get_engine()
+    migrate(engine)
+    written = 0
+    start = time.perf_counter()
+    with engine.connect() as reader:
+        for partition in iter_missing_games(reader, player, batch_size):
+            rows = []
+            for game_id, pgn in partition:
+                tokens = tokenize_movetext(split_pgn(pgn)[1])
+                rows.append({"game_id": game_id, "ply_count": tokens.plies, "moves": tokens.moves, "clocks": tokens.clocks})
+            with engine.begin() as writer:
+                inserted, _ = copy_insert(writer, "game_moves", rows, MOVE_COLUMNS)
+            written += inserted
+            logging.info(f"Tokenized {written} games ({written / (time.perf_counter() - start):.0f} games/s).")
+    logging.info(f"✅ game_moves backfill done: {written} games.")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill game_moves for games stored before movetext tokenization.")
+    parser.add_argument("player", nargs="?", help="Only backfill this player's games (default: all games)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    backfill_game_moves(args.player, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
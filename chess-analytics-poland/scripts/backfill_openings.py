@@ -0,0 +1,70 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from bulk_load import copy_update
+from opening_classifier import classify_moves, load_opening_trie
+from schema_migrations import migrate
+from player_queries import PLAYER_GAME_IDS_SQL
+
+# Backfill for games ingested before moves were classified against openings_sheet.csv (see opening_classifier.py).
+# Reads the tokenized moves from game_moves, so run the game_moves backfill first for older games.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 10000
+BOOK_COLUMNS = ["book_eco", "book_opening", "book_plies"]
+
+
+def iter_unclassified_games(connection, player=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams (game_id, moves) for games without a book opening yet, through a server-side cursor."""
+    query = """
+        SELECT g.game_id, m.moves
+        FROM games g
+        JOIN game_moves m ON m.game_id = g.game_id
+        WHERE g.book_plies IS NULL
+    """
+    params = {}
+    if player:
+        query += f" AND g.game_id IN ({PLAYER_GAME_IDS_SQL})"
+        params["player"] = player.lower()
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(text(query), params)
+    for partition in result.partitions():
+        yield partition
+
+
+def backfill_book_openings(player=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Classifies every unclassified game from its stored moves, one committed batch at a time.
+    Returns the number of rows updated."""
+    engine = get_engine()
+    migrate(engine)
+    trie = load_opening_trie()
+    updated = 0
+    start = time.perf_counter()
+    with engine.connect() as reader:
+        for partition in iter_unclassified_games(reader, player, batch_size):
+            rows = [(game_id, *classify_moves(moves, trie)) for game_id, moves in partition]
+            with engine.begin() as writer:
+                updated += copy_update(writer, "games", "game_id", BOOK_COLUMNS, rows, batch_size)
+            logging.info(f"Classified {updated} games ({updated / (time.perf_counter() - start):.0f} games/s).")
+    logging.info(f"✅ Book opening backfill done: {updated} games.")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill book_eco/book_opening/book_plies for games stored before opening classification.")
+    parser.add_argument("player", nargs="?", help="Only backfill this player's games (default: all games)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    backfill_book_openings(args.player, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
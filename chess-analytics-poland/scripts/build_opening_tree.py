@@ -0,0 +1,65 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from opening_tree import DEFAULT_TREE_DEPTH, delete_opening_tree, update_opening_tree
+from schema_migrations import migrate
+from player_queries import PLAYER_GAME_IDS_SQL
+
+# Rebuilds a player's opening tree from stored games, e.g. for games ingested before the tree existed.
+# Ingest keeps the tree current afterwards. Reads moves from game_moves, so run the game_moves backfill first.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def iter_player_game_moves(connection, player, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams the player's games with their tokenized moves through a server-side cursor."""
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(text(f"""
+        SELECT w.handle AS white_player_id, b.handle AS black_player_id, g.white_rating, g.black_rating, g.result, m.moves
+        FROM games g
+        JOIN game_moves m ON m.game_id = g.game_id
+        LEFT JOIN players w ON w.player_key = g.white_key
+        LEFT JOIN players b ON b.player_key = g.black_key
+        WHERE g.game_id IN ({PLAYER_GAME_IDS_SQL})
+    """), {"player": player.lower()})
+    for partition in result.partitions():
+        yield [dict(row._mapping) for row in partition]
+
+
+def rebuild_opening_tree(player, depth=DEFAULT_TREE_DEPTH, batch_size=DEFAULT_BATCH_SIZE):
+    """Replaces the player's tree with one built from all of their stored games in a single transaction.
+    Returns the number of games counted."""
+    engine = get_engine()
+    migrate(engine)
+    counted = 0
+    start = time.perf_counter()
+    with engine.connect() as reader, engine.begin() as writer:
+        delete_opening_tree(writer, player)
+        for partition in iter_player_game_moves(reader, player, batch_size):
+            update_opening_tree(writer, player, partition, depth)
+            counted += len(partition)
+            logging.info(f"Added {counted} games to {player}'s opening tree ({counted / (time.perf_counter() - start):.0f} games/s).")
+    logging.info(f"✅ Opening tree rebuilt for {player}: {counted} games.")
+    return counted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild a player's opening tree from the games already stored.")
+    parser.add_argument("player", help="Chess.com username")
+    parser.add_argument("--depth", type=int, default=DEFAULT_TREE_DEPTH, help="Plies per game added to the tree")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    rebuild_opening_tree(args.player, args.depth, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,32 @@ import json
 import os
 import time
 import sys
-import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import text
 import datetime
-import re
 import logging
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from sqlalchemy.exc import IntegrityError
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-import sys
-import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from db_connection import get_engine
+from rate_limiter import TokenBucket
+from http_cache import ArchiveCache
+from bulk_load import copy_insert
+from game_extraction import MOVE_COLUMNS, extract_game
+from opening_tree import update_opening_trees
+from schema_migrations import migrate
+from aggregates import refresh_aggregates
+from players import assign_player_keys
+from partitions import ensure_month_partitions, game_key_columns
+from pgn_store import PGN_COLUMNS
+from archive_store import player_data_dir, archive_filename, find_archive, write_archive, iter_archive
 
 engine = get_engine()
 print("✅ Database connection imported and created successfully.")
@@ -25,145 +36,370 @@ print("✅ Database connection imported and created successfully.")
 
 # Chess.com API settings
 HEADERS = {'User-Agent': 'QueenIsBeautiful (your_email@example.com)'}
+# Point at a local stand-in (e.g. benchmarks/mock_chess_api.py) with CHESS_API_BASE_URL or --api-base-url
+API_BASE_URL = os.environ.get("CHESS_API_BASE_URL", "https://api.chess.com/pub")
+MAX_RETRIES = 3  # Retries for HTTP 429 (Too Many Requests)
+
+# Concurrent archive download settings
+DEFAULT_MAX_WORKERS = 4  # Parallel archive downloads
+DEFAULT_REQUESTS_PER_SECOND = 3.0  # Shared request budget across all workers (0 disables limiting)
+
+# Columns written to the games table by the ingest step
+GAME_COLUMNS = [
+    "game_id", "white_key", "black_key", "white_rating", "black_rating",
+    "time_class", "time_control", "base_time", "increment", "rules", "eco", "eco_url",
+    "opening_name", "book_eco", "book_opening", "book_plies", "result", "termination", "move_count", "start_time", "end_time",
+    "winner", "date_time",
+]
+# The full PGN goes to the game_pgns side table, keeping games narrow (see pgn_store.py), and the tokenized
+# moves to game_moves (MOVE_COLUMNS, see game_extraction.py)
+
+# Streaming ingest settings
+DEFAULT_BATCH_SIZE = 5000  # Games held in memory before a flush to the database
+
+# Marks an archive whose download failed inside iter_archives
+FETCH_FAILED = object()
 
 # Create an API session
 session = requests.Session()
 session.headers.update(HEADERS)
+# Size the connection pool so concurrent workers don't discard connections
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+def api_get(url, headers=None):
+    """GETs an API URL, backing off and retrying on HTTP 429 as directed by Retry-After."""
+    for attempt in range(MAX_RETRIES + 1):
+        response = session.get(url, headers=headers)
+        if response.status_code != 429 or attempt == MAX_RETRIES:
+            return response
+        try:
+            delay = float(response.headers.get("Retry-After", 2 ** attempt))
+        except ValueError:
+            delay = 2 ** attempt
+        logging.warning(f"Rate limited on {url}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
 
 def fetch_all_game_urls(player_name):
-    """Fetches all archive URLs for the given player."""
-    ARCHIVES_URL = f"https://api.chess.com/pub/player/{player_name}/games/archives"
+    """Fetches all archive URLs for the given player. Request failures are logged and re-raised."""
+    ARCHIVES_URL = f"{API_BASE_URL}/player/{player_name}/games/archives"
     try:
-        response = session.get(ARCHIVES_URL)
+        response = api_get(ARCHIVES_URL)
         response.raise_for_status()
         archives = response.json().get("archives", [])
         logging.info(f"Found {len(archives)} archives for player {player_name}")
         return archives
     except requests.exceptions.RequestException as e:
         logging.error(f"Failed to fetch archives for {player_name}: {e}")
-        return []
+        raise
 
-def fetch_games_data(archive_url):
-    """Fetches game data from a single archive."""
-    try:
-        response = session.get(archive_url)
-        response.raise_for_status()
-        return response.json().get("games", [])
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching games from {archive_url}: {e}")
-        return []
+def fetch_games_data(archive_url, cache=None):
+    """Fetches game data from a single archive.
+
+    With a cache, the request is conditional and None is returned when the archive is unchanged (HTTP 304).
+    Request failures raise requests.exceptions.RequestException.
+    """
+    headers = cache.conditional_headers(archive_url) if cache is not None else {}
+    response = api_get(archive_url, headers=headers)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    if cache is not None:
+        cache.update(archive_url, response)
+    return response.json().get("games", [])
+
+def iter_archives(archive_urls, max_workers=DEFAULT_MAX_WORKERS, rate_limiter=None, cache=None, failed_urls=None):
+    """Downloads archives on a bounded worker pool, yielding (archive_url, games) as each one arrives.
+
+    games is None for archives the cache reports as not modified. Archives that fail to download are
+    logged and left out, so their months stay unsynced and are retried on the next run; pass a list as
+    failed_urls to collect their URLs.
+    """
+    if rate_limiter is None:
+        rate_limiter = TokenBucket(DEFAULT_REQUESTS_PER_SECOND, capacity=max_workers)
 
-def extract_date_from_pgn(pgn):
-    """Extracts the date (YYYY-MM-DD) from the PGN, handling case and varying digit counts."""
-    date_match = re.search(
-        r'\[Date "(\d{4}\.\d{1,2}\.\d{1,2})"\]',
-        pgn,
-        re.IGNORECASE
-    )
-    if date_match:
-        date_str = date_match.group(1)
+    def fetch(archive_url):
+        rate_limiter.acquire()
         try:
-            date_obj = datetime.datetime.strptime(date_str, '%Y.%m.%d').date()
-            return date_obj.strftime('%Y-%m-%d')
-        except ValueError as e:
-            logging.warning(f"Invalid date '{date_str}' in PGN: {e}")
-    else:
-        logging.warning("No Date tag found in PGN.")
-    return '1900-01-01'
+            return archive_url, fetch_games_data(archive_url, cache)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching games from {archive_url}: {e}")
+            return archive_url, FETCH_FAILED
+
+    if max_workers <= 1:
+        for archive_url in archive_urls:
+            archive_url, games = fetch(archive_url)
+            if games is not FETCH_FAILED:
+                yield archive_url, games
+            elif failed_urls is not None:
+                failed_urls.append(archive_url)
+        return
+
+    # Only a few archives run ahead of the consumer, so downloaded months don't pile up in memory
+    max_in_flight = max_workers * 2
+    pending_urls = iter(archive_urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {executor.submit(fetch, url) for url in itertools.islice(pending_urls, max_in_flight)}
+        try:
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    next_url = next(pending_urls, None)
+                    if next_url is not None:
+                        in_flight.add(executor.submit(fetch, next_url))
+                    archive_url, games = future.result()
+                    if games is not FETCH_FAILED:
+                        yield archive_url, games
+                    elif failed_urls is not None:
+                        failed_urls.append(archive_url)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+def archive_path(data_dir, player_name, archive_url):
+    """Builds the local compressed filename an archive URL (…/games/YYYY/MM) is saved under."""
+    year, month = archive_url.rstrip('/').split('/')[-2:]
+    return archive_filename(data_dir, player_name, year, month)
+
+def stored_archive(data_dir, player_name, archive_url):
+    """Returns the saved copy of an archive URL in either the compressed or legacy JSON format, or None."""
+    year, month = archive_url.rstrip('/').split('/')[-2:]
+    return find_archive(data_dir, player_name, year, month)
+
+def archive_month(archive_url):
+    """Returns the first day of the month an archive URL (…/games/YYYY/MM) covers."""
+    year, month = archive_url.rstrip('/').split('/')[-2:]
+    return datetime.date(int(year), int(month), 1)
 
-def get_existing_game_ids():
-    """Fetches existing game IDs from the database."""
+def load_archive_file(archive_filename):
+    """Reads a previously saved archive, returning [] if it is missing or unreadable."""
+    if archive_filename is None:
+        return []
     try:
-        return pd.read_sql("SELECT game_id FROM games", engine)['game_id'].tolist()
-    except Exception as e:
-        logging.error(f"Error fetching existing game IDs: {e}")
+        return list(iter_archive(archive_filename))
+    except (IOError, EOFError, json.JSONDecodeError) as e:
+        logging.error(f"Error reading archive {archive_filename}: {e}")
         return []
 
-def process_player_games(player_name):
-    """Fetches, processes, and stores new chess games for a given player."""
+def get_sync_state(player_name):
+    """Returns {archive_month: watermark} for every month already ingested for the player."""
+    with engine.connect() as connection:
+        rows = connection.execute(text("""
+            SELECT archive_month, last_end_time, game_count, complete
+            FROM player_sync_state
+            WHERE player_id = :player_id;
+        """), {"player_id": player_name.lower()}).mappings().all()
+    return {row["archive_month"]: dict(row) for row in rows}
+
+def save_sync_state(connection, player_name, month_stats):
+    """Advances the player's watermarks by the games just inserted, inside the caller's transaction."""
+    current_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    for month, stats in month_stats.items():
+        connection.execute(text("""
+            INSERT INTO player_sync_state (player_id, archive_month, last_end_time, game_count, complete, synced_at)
+            VALUES (:player_id, :archive_month, to_timestamp(:last_end_time), :game_count, :complete, now())
+            ON CONFLICT (player_id, archive_month) DO UPDATE SET
+                last_end_time = GREATEST(player_sync_state.last_end_time, EXCLUDED.last_end_time),
+                game_count = player_sync_state.game_count + EXCLUDED.game_count,
+                complete = EXCLUDED.complete,
+                synced_at = now();
+        """), {
+            "player_id": player_name.lower(),
+            "archive_month": month,
+            "last_end_time": stats["last_end_time"],
+            "game_count": stats["game_count"],
+            # Past months can no longer receive games, so once fully read they never need fetching again
+            "complete": stats["finished"] and month < current_month,
+        })
+
+def iter_new_games(player_name, data_dir, archives, sync_state):
+    """Parses archives as they arrive, yielding (archive_month, end_time, game_row) for each game past the
+    month's watermark, in end_time order, and (archive_month, None, None) once the month has been read in full.
+
+    Every derived column (date, ECO, opening, result, termination, time control, move count) is
+    extracted here, so later stages never have to re-read the archive files.
+    """
+    for games_url, games_data in archives:
+        if games_data is None:
+            # Unchanged on the server or downloaded on an earlier run: catch up from the saved copy
+            games_data = load_archive_file(stored_archive(data_dir, player_name, games_url))
+        else:
+            logging.info(f"Fetched games from {games_url}.")
+
+            # Save the archive as compressed NDJSON, replacing any legacy JSON copy
+            if games_data:
+                archive_filename = archive_path(data_dir, player_name, games_url)
+                legacy_filename = stored_archive(data_dir, player_name, games_url)
+                write_archive(archive_filename, games_data)
+                if legacy_filename and legacy_filename != archive_filename:
+                    os.remove(legacy_filename)
+                logging.info(f"Saved games data to {archive_filename}")
+
+        month = archive_month(games_url)
+        watermark = sync_state.get(month, {}).get("last_end_time")
+        watermark = watermark.timestamp() if watermark is not None else None
+
+        # Ascending end_time keeps each committed batch a prefix of the month, which is what the watermark records
+        for game in sorted(games_data, key=lambda game: game.get("end_time") or 0):
+            try:
+                if "pgn" not in game:
+                    continue  # Skip games without PGN
+
+                end_time = game.get("end_time")
+                if watermark is not None and end_time is not None and end_time <= watermark:
+                    continue  # Already ingested on a previous run
+
+                yield month, end_time, extract_game(game)
+
+            except KeyError as e:
+                logging.warning(f"Skipping game due to missing key: {e}")
+
+        yield month, None, None
+
+def flush_batch(player_name, batch, month_stats):
+    """Stores one batch of games with their players, PGNs and tokenized moves, adds the new ones to the opening
+    trees of both of their players and advances the watermarks of the months it covers in a single transaction. The monthly
+    games partitions the batch needs are created beforehand."""
+    ensure_month_partitions(engine, (row["date_time"] for row in batch))
+    with engine.begin() as connection:
+        inserted_keys = []
+        inserted = 0
+        if batch:
+            assign_player_keys(connection, batch)
+            # Claim the game_ids first: games stored before, even under another date_time, are left alone
+            claimed_ids = []
+            copy_insert(connection, 'game_ids', batch, ["game_id"], inserted_keys=claimed_ids)
+            claimed_ids = set(claimed_ids)
+            new_games = list({row["game_id"]: row for row in batch if row["game_id"] in claimed_ids}.values())
+            key_columns = game_key_columns(connection)
+            inserted, _ = copy_insert(connection, 'games', new_games, GAME_COLUMNS, key_columns, inserted_keys=inserted_keys)
+            copy_insert(connection, 'game_pgns', batch, PGN_COLUMNS)
+            copy_insert(connection, 'game_moves', batch, MOVE_COLUMNS)
+        if inserted_keys:
+            # Games already stored were counted when they were first inserted
+            inserted_ids = {key[0] for key in inserted_keys} if len(key_columns) > 1 else set(inserted_keys)
+            update_opening_trees(connection, (row for row in new_games if row["game_id"] in inserted_ids))
+        save_sync_state(connection, player_name, month_stats)
+    if batch:
+        logging.info(f"Committed batch of {len(batch)} games for {player_name} ({inserted} new, {len(batch) - inserted} already present).")
+    return inserted
+
+def process_player_games(player_name, max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, batch_size=DEFAULT_BATCH_SIZE, rate_limiter=None, failed_archives=None):
+    """Fetches, processes, and stores new chess games for a given player.
+
+    Games stream from the downloader into fixed-size batches, so memory stays bounded by batch_size and
+    an interrupted run resumes after the last committed batch. Pass rate_limiter to share one request
+    budget with other ingests; otherwise one is built from requests_per_second. Returns the number of games inserted.
+    A failed flush or archive list request is logged and re-raised; batches committed before it stay stored and are
+    skipped on the next run. Archives that fail to download are retried on the next run, and their URLs are added
+    to failed_archives when a list is passed.
+    """
     logging.info(f"Processing games for player: {player_name}")
+    if rate_limiter is None:
+        rate_limiter = TokenBucket(requests_per_second, capacity=max_workers)
+    rate_limiter.acquire()
     all_games_urls = fetch_all_game_urls(player_name)
     if not all_games_urls:
         logging.warning(f"No game archives found for player {player_name}.")
-        return
+        return 0
 
-    existing_game_ids = set(get_existing_game_ids())
-    new_games = []
+    migrate(engine)
+    sync_state = get_sync_state(player_name)
 
     # Directory to save game data
-    data_dir = os.path.join(os.getcwd(), player_name)
+    data_dir = player_data_dir(player_name)
     os.makedirs(data_dir, exist_ok=True)
 
+    # ETag/Last-Modified validators for conditional re-downloads
+    cache = ArchiveCache(os.path.join(data_dir, f"{player_name}_http_cache.json"))
+
+    pending_urls = []
+    local_urls = []
     for games_url in all_games_urls:
-        # Check if the archive has already been downloaded
-        archive_filename = os.path.join(data_dir, f"{player_name}_games_{games_url.split('/')[-2]}_{games_url.split('/')[-1]}.json")
-        if os.path.exists(archive_filename):
-            logging.info(f"Archive {archive_filename} already downloaded, skipping...")
-            continue
-        
-        logging.info(f"Fetching games from {games_url}...")
-        games_data = fetch_games_data(games_url)
-
-        # Save the archive as a JSON file
-        if games_data:
-            with open(archive_filename, 'w', encoding='utf-8') as f:
-                json.dump(games_data, f, indent=4)
-            logging.info(f"Saved games data to {archive_filename}")
-
-        for game in games_data:
-            try:
-                if "pgn" not in game:
-                    continue  # Skip games without PGN
+        if sync_state.get(archive_month(games_url), {}).get("complete"):
+            continue  # Closed month, fully ingested
 
-                game_id = game.get("uuid", game["url"].split("/")[-1])
-                if game_id in existing_game_ids:
-                    continue  # Skip existing games
-
-                white = game["white"]
-                black = game["black"]
-                winner = white["username"] if white["result"] == "win" else black["username"]
-                date_time = extract_date_from_pgn(game["pgn"])
-
-                game_data = {
-                    "game_id": game_id,
-                    "white_player_id": white["username"],
-                    "black_player_id": black["username"],
-                    "white_rating": white.get("rating", 0),
-                    "black_rating": black.get("rating", 0),
-                    "time_class": game["time_class"],
-                    "time_control": game["time_control"],
-                    "rules": game["rules"],
-                    "pgn": game["pgn"],
-                    "start_time": datetime.datetime.fromtimestamp(game["end_time"]).strftime('%Y-%m-%d %H:%M:%S') if game.get("end_time") else None,
-                    "winner": winner,
-                    "date_time": date_time
-                }
-                new_games.append(game_data)
+        # Downloaded archives are revalidated; ones saved before the cache existed are
+        # read from disk unless they are the latest month, which may still be receiving games
+        if stored_archive(data_dir, player_name, games_url) and games_url not in cache and games_url != all_games_urls[-1]:
+            local_urls.append(games_url)
+        else:
+            pending_urls.append(games_url)
 
-            except KeyError as e:
-                logging.warning(f"Skipping game due to missing key: {e}")
+    logging.info(f"{len(all_games_urls) - len(pending_urls) - len(local_urls)} of {len(all_games_urls)} archives already synced for {player_name}.")
+    logging.info(f"Fetching {len(pending_urls)} archives with {max_workers} workers...")
 
-        time.sleep(1)  # Rate limit delay
+    # Validators of a downloaded archive are kept once its month has been read in full and committed
+    pending_months = {archive_month(games_url): games_url for games_url in pending_urls}
 
-    if new_games:
-        logging.info(f"Inserting {len(new_games)} new games for {player_name} into the database.")
-        df = pd.DataFrame(new_games)
-        try:
-            df.to_sql('games', engine, if_exists='append', index=False)
-            logging.info(f"Inserted {len(new_games)} new games for {player_name} into the database.")
-        except IntegrityError as e:
-            logging.error(f"Integrity error inserting games for {player_name}: {e}")
-        except Exception as e:
-            logging.error(f"Unexpected error inserting games for {player_name}: {e}")
-    else:
-        logging.info(f"No new games to insert for {player_name}.")
+    def commit_batch(batch, month_stats):
+        inserted = flush_batch(player_name, batch, month_stats)
+        cache.confirm(pending_months[month] for month, stats in month_stats.items()
+                      if stats["finished"] and month in pending_months)
+        return inserted
+
+    local_archives = ((games_url, None) for games_url in local_urls)
+    archives = itertools.chain(local_archives, iter_archives(pending_urls, max_workers, rate_limiter, cache, failed_archives))
+
+    total_inserted = 0
+    batch = []
+    month_stats = {}
+    last_key = None
+    try:
+        for month, end_time, game_row in iter_new_games(player_name, data_dir, archives, sync_state):
+            if game_row is None:
+                month_stats.setdefault(month, {"last_end_time": None, "game_count": 0, "finished": False})["finished"] = True
+                continue
+
+            # Flush only between distinct end_times, so a watermark never splits games that ended in the same second
+            key = (month, end_time)
+            if len(batch) >= batch_size and key != last_key:
+                total_inserted += commit_batch(batch, month_stats)
+                batch = []
+                month_stats = {}
+
+            stats = month_stats.setdefault(month, {"last_end_time": None, "game_count": 0, "finished": False})
+            batch.append(game_row)
+            stats["game_count"] += 1
+            if end_time is not None:
+                stats["last_end_time"] = max(stats["last_end_time"] or 0, end_time)
+            last_key = key
+
+        # Final partial batch; also marks fully read months that had no new games
+        total_inserted += commit_batch(batch, month_stats)
+    except IntegrityError as e:
+        logging.error(f"Integrity error inserting games for {player_name}: {e}")
+        raise
+    except Exception as e:
+        logging.error(f"Unexpected error inserting games for {player_name}: {e}")
+        raise
+    finally:
+        # Only validators of committed months are saved, so after a failure the rest are downloaded again
+        cache.save()
+
+    # Fold only the games logged since the last refresh into the per-player aggregates the reports read
+    with engine.begin() as connection:
+        refresh_aggregates(connection)
+
+    logging.info(f"Inserted {total_inserted} new games for {player_name} into the database.")
+    if failed_archives:
+        logging.warning(f"{len(failed_archives)} archives failed to download for {player_name} and will be retried on the next run.")
+    return total_inserted
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        player_to_fetch = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Fetch and store Chess.com games for a player.")
+    parser.add_argument("player", nargs="?", help="Chess.com username")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent archive downloads")
+    parser.add_argument("--rate", type=float, default=DEFAULT_REQUESTS_PER_SECOND, help="Max API requests per second (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Games per database flush (bounds peak memory)")
+    parser.add_argument("--api-base-url", default=API_BASE_URL, help="Chess.com API base URL (default: %(default)s)")
+    args = parser.parse_args()
+    API_BASE_URL = args.api_base_url
+
+    if args.player:
+        player_to_fetch = args.player
         logging.info(f"Fetching data for player from command line: {player_to_fetch}")
-        process_player_games(player_to_fetch)
     else:
         player_to_fetch = input("Enter the Chess.com username to fetch data for: ").strip()
         logging.info(f"Fetching data for player from user input: {player_to_fetch}")
-        process_player_games(player_to_fetch)
+    process_player_games(player_to_fetch, max_workers=args.workers, requests_per_second=args.rate, batch_size=args.batch_size)
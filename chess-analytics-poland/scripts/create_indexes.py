@@ -0,0 +1,49 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from schema_indexes import GAME_INDEXES, ensure_indexes, existing_indexes
+
+# Creates the managed games indexes (see schema_indexes.py) on an existing database without blocking ingestion.
+# Schema migration 6 (see schema_migrations.py) builds them the same way; rerun this after a failed or cancelled build.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def create_indexes(concurrently=True):
+    """Builds the missing managed indexes, then refreshes the planner statistics. Returns the names created."""
+    engine = get_engine()
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        created = ensure_indexes(connection, concurrently=concurrently)
+        if created:
+            connection.execute(text("ANALYZE games"))
+    logging.info(f"✅ {len(created)} indexes created in {time.perf_counter() - start:.1f}s "
+                 f"({len(GAME_INDEXES) - len(created)} already present).")
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the managed indexes on the games table.")
+    parser.add_argument("--list", action="store_true", help="Only show which managed indexes exist")
+    parser.add_argument("--blocking", action="store_true", help="Build without CONCURRENTLY (faster, blocks writes)")
+    args = parser.parse_args()
+    if args.list:
+        with get_engine().connect() as connection:
+            present = existing_indexes(connection)
+        for name, definition in GAME_INDEXES.items():
+            status = "✅" if present.get(name) else "⚠️ invalid" if name in present else "❌"
+            print(f"  {status} {name:<30} games {definition}")
+        return
+    create_indexes(concurrently=not args.blocking)
+
+
+if __name__ == "__main__":
+    main()
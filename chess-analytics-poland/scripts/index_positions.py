@@ -0,0 +1,86 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from bulk_load import copy_insert, copy_update
+from parallel_games import map_game_batches
+from position_index import replay_positions
+from schema_migrations import migrate
+from player_queries import PLAYER_GAME_IDS_SQL
+
+# Fills game_positions with a Zobrist hash per ply of every game not indexed yet (see position_index.py).
+# Replays the tokenized moves in game_moves, so run the game_moves backfill first for older games.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 10000  # Games per committed batch
+REPLAY_CHUNK_SIZE = 500  # Games per worker task
+POSITION_COLUMNS = ["position_hash", "game_id", "ply"]
+
+
+def iter_unindexed_games(connection, player=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams (game_id, moves) for games whose positions are not indexed yet, through a server-side cursor."""
+    query = """
+        SELECT m.game_id, m.moves
+        FROM game_moves m
+        WHERE NOT m.positions_indexed
+    """
+    params = {}
+    if player:
+        query += f" AND m.game_id IN ({PLAYER_GAME_IDS_SQL})"
+        params["player"] = player.lower()
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(text(query), params)
+    for partition in result.partitions():
+        yield from ((game_id, moves) for game_id, moves in partition)
+
+
+def write_positions(engine, replayed):
+    """Stores the positions of a batch of replayed games and marks the games indexed, in one transaction."""
+    with engine.begin() as writer:
+        rows = (dict(zip(POSITION_COLUMNS, row)) for _, positions in replayed for row in positions)
+        copy_insert(writer, "game_positions", rows, POSITION_COLUMNS, conflict_columns=("position_hash", "game_id"))
+        copy_update(writer, "game_moves", "game_id", "positions_indexed", ((game_id, True) for game_id, _ in replayed))
+
+
+def index_positions(player=None, batch_size=DEFAULT_BATCH_SIZE, processes=None):
+    """Replays every unindexed game across a process pool and stores its position hashes, committing every
+    batch_size games so an interrupted run resumes where it stopped. Returns the number of games indexed."""
+    engine = get_engine()
+    migrate(engine)
+    indexed = 0
+    pending = []
+    start = time.perf_counter()
+    with engine.connect() as reader:
+        games = iter_unindexed_games(reader, player, batch_size)
+        for replayed in map_game_batches(replay_positions, games, processes, REPLAY_CHUNK_SIZE):
+            pending.extend(replayed)
+            if len(pending) >= batch_size:
+                write_positions(engine, pending)
+                indexed += len(pending)
+                pending = []
+                logging.info(f"Indexed {indexed} games ({indexed / (time.perf_counter() - start):.0f} games/s).")
+    if pending:
+        write_positions(engine, pending)
+        indexed += len(pending)
+    logging.info(f"✅ Position index done: {indexed} games.")
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the positions reached in stored games by Zobrist hash.")
+    parser.add_argument("player", nargs="?", help="Only index this player's games (default: all games)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=None, help="Replay processes (default: one per CPU)")
+    args = parser.parse_args()
+    index_positions(args.player, args.batch_size, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from partitions import list_partitions, month_start, next_month, partition_name
+from participation import PLAYER_GAMES_COLUMNS, participation_select
+
+# Maintenance of the monthly games partitions (see partitions.py). Closed months no longer receive games, so
+# they can be compacted once, or detached from games into an archive schema to shrink what queries and
+# vacuum have to look at. Detached months can be dumped with pg_dump -t and dropped, or attached again.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_ARCHIVE_SCHEMA = "games_archive"
+
+
+def parse_month(value):
+    """YYYY-MM -> first day of that month."""
+    return month_start(datetime.datetime.strptime(value, "%Y-%m").date())
+
+
+def closed_month(month):
+    """Refuses the current month and later ones, which can still receive games."""
+    if month >= datetime.date.today().replace(day=1):
+        raise SystemExit(f"{month:%Y-%m} is still open; only past months can be compacted or detached.")
+    return month
+
+
+def show_partitions(engine):
+    with engine.connect() as connection:
+        partitions = list_partitions(connection)
+        for name, bounds, rows in partitions:
+            size = connection.execute(text("SELECT pg_size_pretty(pg_total_relation_size(to_regclass(:name)))"), {"name": name}).scalar()
+            print(f"  {name:<16} {max(rows, 0):>12,} rows  {size:>10}  {bounds}")
+    print(f"📦 {len(partitions)} partitions")
+
+
+def compact_partition(engine, month):
+    """Rewrites a closed month's partition without the dead rows left by backfills, then refreshes its statistics.
+    Locks only that partition, for the duration of the rewrite."""
+    name = partition_name(closed_month(month))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM (FULL, ANALYZE) {name}"))
+    logging.info(f"✅ Compacted {name}.")
+
+
+def detach_partition(engine, month, schema=DEFAULT_ARCHIVE_SCHEMA):
+    """Detaches a closed month from games into the archive schema, removing its player_games rows first (the
+    sync triggers don't see a detach). Its PGNs, moves and positions stay in their side tables."""
+    name = partition_name(closed_month(month))
+    with engine.begin() as connection:
+        removed = connection.execute(text(f"""
+            DELETE FROM player_games p USING {name} g
+            WHERE p.game_id = g.game_id AND p.player_key IN (g.white_key, g.black_key)
+        """)).rowcount
+        connection.execute(text(f"ALTER TABLE games DETACH PARTITION {name}"))
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+    logging.info(f"✅ Detached {name} into {schema} ({removed} player_games rows removed).")
+
+
+def attach_partition(engine, month, schema=DEFAULT_ARCHIVE_SCHEMA):
+    """Moves a detached month back into games and restores its player_games rows."""
+    name = partition_name(month)
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {schema}.{name} SET SCHEMA public"))
+        connection.execute(text(f"ALTER TABLE games ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"))
+        restored = connection.execute(text(f"""
+            INSERT INTO player_games ({', '.join(PLAYER_GAMES_COLUMNS)}){participation_select(name)}
+            ON CONFLICT (player_key, game_id) DO NOTHING
+        """)).rowcount
+    logging.info(f"✅ Attached {name} to games ({restored} player_games rows restored).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List, compact, detach or re-attach monthly games partitions.")
+    parser.add_argument("action", choices=["list", "compact", "detach", "attach"])
+    parser.add_argument("month", nargs="?", type=parse_month, help="Partition month as YYYY-MM")
+    parser.add_argument("--schema", default=DEFAULT_ARCHIVE_SCHEMA, help="Schema detached months are kept in")
+    args = parser.parse_args()
+    if args.action != "list" and args.month is None:
+        parser.error(f"{args.action} needs a month (YYYY-MM)")
+
+    engine = get_engine()
+    if args.action == "list":
+        show_partitions(engine)
+    elif args.action == "compact":
+        compact_partition(engine, args.month)
+    elif args.action == "detach":
+        detach_partition(engine, args.month, args.schema)
+    else:
+        attach_partition(engine, args.month, args.schema)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from schema_migrations import LATEST_VERSION, MIGRATIONS, applied_versions, migrate
+
+# Brings the database schema up to date with the migrations in schema_migrations.py. Ingest and the batch
+# scripts apply pending migrations on startup as well; run this to upgrade a database ahead of a deploy or to
+# see where it stands.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def show_status(engine):
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    for migration in MIGRATIONS:
+        status = "✅" if migration.version in applied else "❌"
+        print(f"  {status} {migration.version:>3}  {migration.description}")
+    print(f"📦 {len(applied)} of {len(MIGRATIONS)} migrations applied (latest version {LATEST_VERSION})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="Only show which migrations are applied")
+    parser.add_argument("--target", type=int, help="Stop after this version (default: the latest)")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.status:
+        show_status(engine)
+        return
+    applied = migrate(engine, target=args.target)
+    if applied:
+        logging.info(f"✅ Applied migrations {', '.join(str(version) for version in applied)}.")
+    else:
+        logging.info("✅ Schema is up to date, nothing to apply.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive_store import (ARCHIVE_ROOT, ARCHIVE_SUFFIX, LEGACY_SUFFIX, ARCHIVE_NAME_RE,
+                           archive_filename, player_data_dir, iter_archive, write_archive)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def find_player_dirs():
+    """Returns every player directory under the archive root that still holds legacy JSON archives."""
+    players = []
+    for name in sorted(os.listdir(ARCHIVE_ROOT)):
+        path = os.path.join(ARCHIVE_ROOT, name)
+        if os.path.isdir(path) and any(
+            (match := ARCHIVE_NAME_RE.match(filename)) and match.group("suffix") == LEGACY_SUFFIX
+            for filename in os.listdir(path)
+        ):
+            players.append(name)
+    return players
+
+
+def migrate_player(player, keep_json=False):
+    """Converts a player's legacy JSON archives to compressed NDJSON. Returns (files converted, bytes before, bytes after)."""
+    data_dir = player_data_dir(player)
+    converted, bytes_before, bytes_after = 0, 0, 0
+    for filename in sorted(os.listdir(data_dir)):
+        match = ARCHIVE_NAME_RE.match(filename)
+        if not match or match.group("suffix") != LEGACY_SUFFIX or match.group("player") != player:
+            continue
+        legacy_path = os.path.join(data_dir, filename)
+        new_path = archive_filename(data_dir, player, match.group("year"), match.group("month"), ARCHIVE_SUFFIX)
+
+        games = list(iter_archive(legacy_path))
+        # Written under a name find_archive ignores, and put in place only once the round trip is verified, so a
+        # bad conversion never shadows the original
+        staged_path = new_path[:-len(ARCHIVE_SUFFIX)] + ".converting" + ARCHIVE_SUFFIX
+        write_archive(staged_path, games)
+        if sum(1 for _ in iter_archive(staged_path)) != len(games):
+            logging.error(f"Game count mismatch after converting {legacy_path}; keeping the original.")
+            os.remove(staged_path)
+            continue
+        os.replace(staged_path, new_path)
+
+        bytes_before += os.path.getsize(legacy_path)
+        bytes_after += os.path.getsize(new_path)
+        converted += 1
+        if not keep_json:
+            os.remove(legacy_path)
+    return converted, bytes_before, bytes_after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Convert legacy JSON archives to {ARCHIVE_SUFFIX}.")
+    parser.add_argument("players", nargs="*", help="Usernames to migrate (default: every player directory found)")
+    parser.add_argument("--keep-json", action="store_true", help="Keep the original JSON files")
+    args = parser.parse_args()
+
+    players = [player.strip().lower() for player in args.players] or find_player_dirs()
+    if not players:
+        print("No legacy JSON archives found.")
+        return
+
+    for player in players:
+        converted, before, after = migrate_player(player, args.keep_json)
+        ratio = f"{before / after:.1f}x smaller" if after else "nothing to convert"
+        print(f"✅ {player}: {converted} archives, {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({ratio})")
+
+
+if __name__ == "__main__":
+    main()
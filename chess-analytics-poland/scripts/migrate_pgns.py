@@ -0,0 +1,81 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from schema_migrations import migrate
+
+# Moves PGNs stored inline in games (before game_pgns existed, see pgn_store.py) into game_pgns.
+# Each batch commits on its own, so the move can run while ingestion continues and resume after an interruption.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 5000
+
+MOVE_BATCH_SQL = """
+    WITH moved AS (
+        SELECT game_id, pgn FROM games
+        WHERE pgn IS NOT NULL
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), copied AS (
+        INSERT INTO game_pgns (game_id, pgn)
+        SELECT game_id, pgn FROM moved
+        ON CONFLICT (game_id) DO NOTHING
+    )
+    UPDATE games g SET pgn = NULL
+    FROM moved
+    WHERE g.game_id = moved.game_id
+"""
+
+
+def has_inline_pgn_column(connection):
+    return connection.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'games' AND column_name = 'pgn')
+    """)).scalar()
+
+
+def migrate_pgns(batch_size=DEFAULT_BATCH_SIZE, drop_column=False):
+    """Moves inline PGNs to game_pgns batch by batch, then optionally drops games.pgn. Returns the number moved."""
+    engine = get_engine()
+    migrate(engine)
+    with engine.connect() as connection:
+        if not has_inline_pgn_column(connection):
+            logging.info("games.pgn is already gone, nothing to migrate.")
+            return 0
+
+    moved = 0
+    start = time.perf_counter()
+    while True:
+        with engine.begin() as connection:
+            count = connection.execute(text(MOVE_BATCH_SQL), {"batch_size": batch_size}).rowcount
+        if not count:
+            break
+        moved += count
+        logging.info(f"Moved {moved} PGNs ({moved / (time.perf_counter() - start):.0f} games/s).")
+
+    if drop_column:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE games DROP COLUMN IF EXISTS pgn"))
+        # Dropping the column is instant; the space comes back as rows are rewritten, or at once with VACUUM FULL
+        logging.info("Dropped games.pgn. Run VACUUM FULL games (or pg_repack) in a quiet window to reclaim its space.")
+    logging.info(f"✅ PGN migration done: {moved} games moved to game_pgns.")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move PGNs out of the games table into game_pgns.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--drop-column", action="store_true", help="Drop games.pgn once every PGN has been moved")
+    args = parser.parse_args()
+    migrate_pgns(args.batch_size, args.drop_column)
+
+
+if __name__ == "__main__":
+    main()
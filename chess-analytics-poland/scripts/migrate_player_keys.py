@@ -0,0 +1,96 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from schema_migrations import game_column_types, migrate
+
+# Moves games stored before the players dimension (see players.py) from username columns to player keys:
+# fills players from every username seen and sets white_key/black_key. winner is converted from usernames to the
+# game_winner type by schema migration 8 (see schema_migrations.convert_winner), which runs first.
+# Each batch commits on its own and the player_games triggers pick up every updated game, so the migration
+# resumes after an interruption. --drop-columns finishes it by dropping the username columns.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 5000
+
+FILL_PLAYERS_SQL = """
+    INSERT INTO players (handle, username)
+    SELECT DISTINCT ON (LOWER(u.username)) LOWER(u.username), u.username
+    FROM (
+        SELECT white_player_id AS username FROM games
+        UNION ALL
+        SELECT black_player_id FROM games
+    ) u
+    WHERE u.username IS NOT NULL
+    ORDER BY LOWER(u.username)
+    ON CONFLICT (handle) DO NOTHING
+"""
+
+KEY_BATCH_SQL = """
+    WITH batch AS (
+        SELECT game_id FROM games
+        WHERE (white_key IS NULL AND white_player_id IS NOT NULL)
+           OR (black_key IS NULL AND black_player_id IS NOT NULL)
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE games g SET
+        white_key = (SELECT player_key FROM players WHERE handle = LOWER(g.white_player_id)),
+        black_key = (SELECT player_key FROM players WHERE handle = LOWER(g.black_player_id))
+    FROM batch
+    WHERE g.game_id = batch.game_id
+"""
+
+
+def migrate_player_keys(batch_size=DEFAULT_BATCH_SIZE, drop_columns=False):
+    """Assigns player keys to legacy games batch by batch, then optionally drops the username columns.
+    Returns the number of games migrated."""
+    engine = get_engine()
+    migrate(engine)
+    with engine.connect() as connection:
+        columns = game_column_types(connection)
+    if "white_player_id" not in columns:
+        logging.info("games already references players by key, nothing to migrate.")
+        return 0
+
+    with engine.begin() as connection:
+        added = connection.execute(text(FILL_PLAYERS_SQL)).rowcount
+    logging.info(f"Added {added} players to the players dimension.")
+
+    migrated = 0
+    start = time.perf_counter()
+    while True:
+        with engine.begin() as connection:
+            count = connection.execute(text(KEY_BATCH_SQL), {"batch_size": batch_size}).rowcount
+        if not count:
+            break
+        migrated += count
+        logging.info(f"Migrated {migrated} games ({migrated / (time.perf_counter() - start):.0f} games/s).")
+
+    if drop_columns:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE games DROP COLUMN white_player_id, DROP COLUMN black_player_id"))
+        logging.info("Dropped the username columns from games.")
+    logging.info(f"✅ Player key migration done: {migrated} games.")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move games from username columns to players dimension keys.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--drop-columns", action="store_true",
+                        help="Drop white_player_id/black_player_id once every game is migrated")
+    args = parser.parse_args()
+    migrate_player_keys(args.batch_size, args.drop_columns)
+
+
+if __name__ == "__main__":
+    main()
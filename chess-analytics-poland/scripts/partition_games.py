@@ -0,0 +1,159 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_connection import get_engine
+from game_extraction import DEFAULT_DATE
+from partitions import GAME_IDS_TRIGGER, create_month_partitions, ensure_game_ids_trigger, is_partitioned
+from participation import TRIGGERS, ensure_player_games_triggers
+from schema_indexes import GAME_INDEXES, ensure_indexes, index_name
+from schema_migrations import migrate
+
+# Moves an unpartitioned games table to the monthly partitioned layout (see partitions.py): games is copied into
+# games_partitioned in committed batches, then the two are swapped under a short write lock, copying the games
+# ingested in the meantime first. Ingestion can keep running; backfills that update games should wait until the
+# swap is done. The old table is kept as games_unpartitioned until you drop it.
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BATCH_SIZE = 20000
+TARGET = "games_partitioned"
+
+
+def game_columns(connection):
+    rows = connection.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'games' AND table_schema = current_schema()
+        ORDER BY ordinal_position
+    """))
+    return [row[0] for row in rows]
+
+
+def stored_months(connection, source="games"):
+    rows = connection.execute(text(f"SELECT DISTINCT date_trunc('month', date_time)::date FROM {source}"))
+    return [row[0] for row in rows]
+
+
+def create_target(connection):
+    """Creates games_partitioned with games' columns, the partitioned primary key, the players foreign keys and
+    the managed indexes (built as the rows arrive), plus a partition for every month stored."""
+    if connection.execute(text(f"SELECT to_regclass('{TARGET}') IS NOT NULL")).scalar():
+        return
+    connection.execute(text(f"CREATE TABLE {TARGET} (LIKE games INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (date_time)"))
+    connection.execute(text(f"""
+        ALTER TABLE {TARGET}
+            ALTER COLUMN date_time SET NOT NULL,
+            ADD PRIMARY KEY (game_id, date_time),
+            ADD FOREIGN KEY (white_key) REFERENCES players(player_key),
+            ADD FOREIGN KEY (black_key) REFERENCES players(player_key)
+    """))
+    ensure_indexes(connection, table=TARGET)
+
+
+def copy_batches(engine, columns, months, batch_size):
+    """Copies games into games_partitioned in game_id order, one committed batch at a time. Games of months
+    without a partition yet (ingested after the copy started) are left to the swap. Returns the rows copied."""
+    column_list = ", ".join(columns)
+    copied = 0
+    after = ""
+    start = time.perf_counter()
+    while True:
+        with engine.begin() as connection:
+            last_id, count, inserted = connection.execute(text(f"""
+                WITH batch AS (
+                    SELECT {column_list} FROM games
+                    WHERE game_id > :after
+                    ORDER BY game_id
+                    LIMIT :batch_size
+                ), copied AS (
+                    INSERT INTO {TARGET} ({column_list})
+                    SELECT {column_list} FROM batch
+                    WHERE date_trunc('month', date_time)::date = ANY(CAST(:months AS DATE[]))
+                    ON CONFLICT DO NOTHING
+                    RETURNING 1
+                )
+                SELECT (SELECT MAX(game_id) FROM batch), (SELECT COUNT(*) FROM batch), (SELECT COUNT(*) FROM copied)
+            """), {"after": after, "batch_size": batch_size, "months": months}).one()
+        if not count:
+            return copied
+        after = last_id
+        copied += inserted
+        logging.info(f"Copied {copied} games ({copied / (time.perf_counter() - start):.0f} games/s).")
+
+
+def swap_tables(connection, columns):
+    """Copies the games added since the batches ran, then puts games_partitioned in place of games with the
+    player_games triggers, inside the caller's transaction. Writers to games wait for it; readers don't."""
+    column_list = ", ".join(columns)
+    connection.execute(text("LOCK TABLE games IN EXCLUSIVE MODE"))
+    connection.execute(text(f"""
+        CREATE TEMP TABLE games_catch_up ON COMMIT DROP AS
+        SELECT {column_list} FROM games g
+        WHERE NOT EXISTS (SELECT 1 FROM {TARGET} p WHERE p.game_id = g.game_id AND p.date_time = g.date_time)
+    """))
+    create_month_partitions(connection, stored_months(connection, "games_catch_up"), parent=TARGET)
+    caught_up = connection.execute(text(f"""
+        INSERT INTO {TARGET} ({column_list}) SELECT {column_list} FROM games_catch_up ON CONFLICT DO NOTHING
+    """)).rowcount
+    logging.info(f"Copied {caught_up} games ingested during the migration.")
+
+    # Side tables can't keep a game_id-only foreign key to a partitioned games table
+    connection.execute(text("ALTER TABLE player_games DROP CONSTRAINT IF EXISTS player_games_game_id_fkey"))
+    connection.execute(text("ALTER TABLE game_pgns DROP CONSTRAINT IF EXISTS game_pgns_game_id_fkey"))
+    for name in [*TRIGGERS, GAME_IDS_TRIGGER]:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name} ON games"))
+    connection.execute(text("ALTER TABLE games RENAME TO games_unpartitioned"))
+    connection.execute(text("ALTER TABLE games_unpartitioned RENAME CONSTRAINT games_pkey TO games_unpartitioned_pkey"))
+    for name in GAME_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        connection.execute(text(f"ALTER INDEX {index_name(name, TARGET)} RENAME TO {name}"))
+    connection.execute(text(f"ALTER TABLE {TARGET} RENAME TO games"))
+    connection.execute(text(f"ALTER TABLE games RENAME CONSTRAINT {TARGET}_pkey TO games_pkey"))
+    ensure_player_games_triggers(connection)
+    ensure_game_ids_trigger(connection)
+
+
+def partition_games(batch_size=DEFAULT_BATCH_SIZE):
+    """Migrates games to monthly partitions. Returns the number of games copied."""
+    engine = get_engine()
+    migrate(engine)
+    with engine.begin() as connection:
+        if is_partitioned(connection):
+            logging.info("games is already partitioned, nothing to migrate.")
+            return 0
+        columns = game_columns(connection)
+        if "white_player_id" in columns:
+            logging.error("games still has username columns: run scripts/migrate_player_keys.py --drop-columns first.")
+            return 0
+        # Range partitions can't hold a NULL partition key; extraction falls back to the same date
+        connection.execute(text("UPDATE games SET date_time = :default WHERE date_time IS NULL"), {"default": DEFAULT_DATE})
+        create_target(connection)
+        months = stored_months(connection)
+        create_month_partitions(connection, months, parent=TARGET)
+
+    start = time.perf_counter()
+    copied = copy_batches(engine, columns, months, batch_size)
+    with engine.begin() as connection:
+        swap_tables(connection, columns)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE games"))
+    logging.info(f"✅ games partitioned by month in {time.perf_counter() - start:.0f}s: {copied} games copied. "
+                 "The old table is kept as games_unpartitioned; drop it once you're satisfied.")
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move the games table to monthly range partitions on date_time.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    partition_games(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
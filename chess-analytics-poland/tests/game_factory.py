@@ -0,0 +1,42 @@
+import calendar
+
+# Builds Chess.com archive entries (the shape the API returns and extract_game reads) for tests.
+
+RESULT_CODES = {"1-0": ("win", "resigned"), "0-1": ("resigned", "win"), "1/2-1/2": ("agreed", "agreed")}
+
+
+def movetext(moves, result, clock="0:03:00"):
+    """Chess.com-style movetext with a %clk comment after every ply."""
+    parts = []
+    for ply, move in enumerate(moves):
+        number = ply // 2 + 1
+        parts.append(f"{number}{'.' if ply % 2 == 0 else '...'} {move} {{[%clk {clock}]}}")
+    parts.append(result)
+    return " ".join(parts)
+
+
+def chess_com_game(game_id, white, black, moves=("e4", "e5", "Nf3", "Nc6"), result="1-0", date=(2024, 1, 15),
+                   white_rating=1500, black_rating=1400, eco="C44", time_class="blitz", time_control="180"):
+    """One archive entry with a full PGN; end_time is noon UTC on date."""
+    year, month, day = date
+    white_result, black_result = RESULT_CODES[result]
+    headers = [
+        ("Event", "Live Chess"), ("Site", "Chess.com"), ("Date", f"{year}.{month:02d}.{day:02d}"),
+        ("White", white), ("Black", black), ("Result", result), ("ECO", eco),
+        ("ECOUrl", "https://www.chess.com/openings/Kings-Pawn-Opening"),
+        ("WhiteElo", str(white_rating)), ("BlackElo", str(black_rating)), ("TimeControl", time_control),
+    ]
+    pgn = "\n".join(f'[{tag} "{value}"]' for tag, value in headers) + "\n\n" + movetext(moves, result) + "\n"
+    return {
+        "url": f"https://www.chess.com/game/live/{game_id}",
+        "uuid": game_id,
+        "pgn": pgn,
+        "time_control": time_control,
+        "end_time": calendar.timegm((year, month, day, 12, 0, 0)),
+        "rated": True,
+        "time_class": time_class,
+        "rules": "chess",
+        "eco": "https://www.chess.com/openings/Kings-Pawn-Opening",
+        "white": {"rating": white_rating, "result": white_result, "username": white},
+        "black": {"rating": black_rating, "result": black_result, "username": black},
+    }
@@ -0,0 +1,71 @@
+from sqlalchemy import text
+
+from aggregates import AGGREGATE_TABLES, key_expression, rebuild_aggregates, refresh_aggregates
+from game_extraction import extract_game
+from game_factory import chess_com_game
+
+
+def snapshot(connection):
+    """Every aggregate table's rows, in key order."""
+    return {
+        table: [tuple(row) for row in connection.execute(text(f"SELECT * FROM {table} ORDER BY {', '.join(keys)}"))]
+        for table, keys in AGGREGATE_TABLES.items()
+    }
+
+
+def test_key_expression_groups_null_keys_as_unknown():
+    assert key_expression("player_key") == "player_key"
+    assert key_expression("eco", "c") == "COALESCE(c.eco, 'unknown')"
+
+
+def test_incremental_refresh_matches_rebuild(engine):
+    from scripts.connection_to_database import flush_batch
+
+    flush_batch("alice", [
+        extract_game(chess_com_game("g1", "alice", "bob", result="1-0")),
+        extract_game(chess_com_game("g2", "bob", "alice", result="0-1", eco="B01", time_class="rapid")),
+        extract_game(chess_com_game("g3", "alice", "carol", result="1/2-1/2", date=(2024, 2, 1))),
+    ], {})
+    with engine.begin() as connection:
+        assert refresh_aggregates(connection) == 6
+
+    # Later batches, a backfill that changes a result and a removed game all go through the change log
+    flush_batch("alice", [extract_game(chess_com_game("g4", "dave", "alice", result="1-0", eco="A00"))], {})
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE games SET winner = 'black' WHERE game_id = 'g1'"))
+        connection.execute(text("DELETE FROM games WHERE game_id = 'g2'"))
+        assert refresh_aggregates(connection) > 0
+        assert refresh_aggregates(connection) == 0
+        incremental = snapshot(connection)
+
+    with engine.begin() as connection:
+        rebuild_aggregates(connection)
+        rebuilt = snapshot(connection)
+    assert incremental == rebuilt
+
+    # Groups whose games all went away are dropped rather than kept at zero
+    eco_rows = {(row[0], row[1]) for row in incremental["player_eco_stats"]}
+    with engine.connect() as connection:
+        bob = connection.execute(text("SELECT player_key FROM players WHERE handle = 'bob'")).scalar()
+        empty = sum(connection.execute(text(f"SELECT COUNT(*) FROM {table} WHERE games = 0")).scalar()
+                    for table in AGGREGATE_TABLES)
+    assert (bob, "B01") not in eco_rows
+    assert empty == 0
+
+
+def test_refresh_counts_wins_draws_and_losses(engine):
+    from scripts.connection_to_database import flush_batch
+
+    flush_batch("alice", [
+        extract_game(chess_com_game("g1", "alice", "bob", result="1-0", white_rating=1500)),
+        extract_game(chess_com_game("g2", "bob", "alice", result="1-0", black_rating=1520)),
+        extract_game(chess_com_game("g3", "alice", "bob", result="1/2-1/2", white_rating=1510)),
+    ], {})
+    with engine.begin() as connection:
+        refresh_aggregates(connection)
+        stats = connection.execute(text("""
+            SELECT s.games, s.wins, s.draws, s.losses, s.rating_sum, s.rated_games
+            FROM player_stats s JOIN players p ON p.player_key = s.player_key
+            WHERE p.handle = 'alice'
+        """)).one()
+    assert tuple(stats) == (3, 1, 1, 1, 1500 + 1520 + 1510, 3)
@@ -0,0 +1,40 @@
+import json
+import os
+
+from archive_store import (LEGACY_SUFFIX, archive_filename, find_archive, iter_archive, iter_player_games,
+                           list_player_archives, write_archive)
+from game_factory import chess_com_game
+
+
+def test_write_archive_round_trips(tmp_path):
+    games = [chess_com_game("g1", "alice", "bob"), chess_com_game("g2", "bob", "alice", result="0-1")]
+    path = archive_filename(str(tmp_path), "alice", 2024, 1)
+    write_archive(path, games)
+    assert list(iter_archive(path)) == games
+    assert os.listdir(tmp_path) == ["alice_games_2024_01.ndjson.gz"]
+
+
+def test_compressed_archives_are_preferred_over_legacy_json(tmp_path):
+    data_dir = str(tmp_path)
+    legacy = archive_filename(data_dir, "alice", 2024, 1, LEGACY_SUFFIX)
+    with open(legacy, 'w', encoding='utf-8') as f:
+        json.dump([chess_com_game("old", "alice", "bob")], f)
+    assert find_archive(data_dir, "alice", 2024, 1) == legacy
+
+    write_archive(archive_filename(data_dir, "alice", 2024, 1), [chess_com_game("new", "alice", "bob")])
+    write_archive(archive_filename(data_dir, "alice", 2023, 12), [chess_com_game("dec", "alice", "bob")])
+    # Another player's file in the same directory is ignored
+    write_archive(archive_filename(data_dir, "bob", 2024, 2), [chess_com_game("bob", "bob", "carol")])
+    assert find_archive(data_dir, "alice", 2024, 1).endswith(".ndjson.gz")
+    assert [os.path.basename(path) for path in list_player_archives(data_dir, "alice")] == [
+        "alice_games_2023_12.ndjson.gz", "alice_games_2024_01.ndjson.gz"]
+    assert [game["uuid"] for game in iter_player_games("alice", data_dir)] == ["dec", "new"]
+
+
+def test_iter_player_games_skips_unreadable_archives(tmp_path):
+    data_dir = str(tmp_path)
+    with open(archive_filename(data_dir, "alice", 2024, 1, LEGACY_SUFFIX), 'w', encoding='utf-8') as f:
+        f.write("[{broken")
+    write_archive(archive_filename(data_dir, "alice", 2024, 2), [chess_com_game("g1", "alice", "bob")])
+    assert [game["uuid"] for game in iter_player_games("alice", data_dir)] == ["g1"]
+    assert list_player_archives(str(tmp_path / "missing"), "alice") == []
@@ -0,0 +1,32 @@
+import argparse
+
+import pytest
+
+import batch_ingest
+import main
+
+
+def test_read_usernames_normalizes_and_keeps_first_occurrence(tmp_path):
+    players_file = tmp_path / "players.txt"
+    players_file.write_text("carol  # club captain\n\nAlice\n", encoding="utf-8")
+    assert batch_ingest.read_usernames(" Bob,alice ", str(players_file)) == ["bob", "alice", "carol"]
+
+
+@pytest.mark.parametrize("failed_archives, status, error", [
+    ([], "ok", None),
+    (["https://api.chess.com/pub/player/alice/games/2024/01"], "failed", "1 archives failed to download"),
+])
+def test_ingest_player_reports_failed_downloads(monkeypatch, failed_archives, status, error):
+    context = {"games_inserted": 3, "failed_archives": failed_archives, "timings": {"ingest": 1.0}}
+    monkeypatch.setattr(main, "run_pipeline", lambda username, stages, options, rate_limiter=None: context)
+    result = batch_ingest._ingest_player("alice", ["ingest"], argparse.Namespace())
+    assert (result["status"], result["games_inserted"], result["error"]) == (status, 3, error)
+
+
+def test_ingest_player_reports_exceptions_as_failures(monkeypatch):
+    def failing_pipeline(username, stages, options, rate_limiter=None):
+        raise RuntimeError("HTTP 404")
+
+    monkeypatch.setattr(main, "run_pipeline", failing_pipeline)
+    result = batch_ingest._ingest_player("nobody", ["ingest"], argparse.Namespace())
+    assert (result["status"], result["games_inserted"], result["error"]) == ("failed", 0, "HTTP 404")
@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from bulk_load import copy_insert, copy_update, csv_field, pg_array
+
+
+def test_pg_array_quotes_strings_and_writes_null():
+    assert pg_array(["e4", None, 'a"b\\c']) == '{"e4",NULL,"a\\"b\\\\c"}'
+    assert pg_array([1, None, 3]) == "{1,NULL,3}"
+
+
+def test_csv_field_keeps_empty_strings_apart_from_null():
+    assert csv_field(None) == ""
+    assert csv_field("") == '""'
+    assert csv_field('say "hi"') == '"say ""hi"""'
+    assert csv_field(12) == '"12"'
+    assert csv_field(["e4", None]) == '"{""e4"",NULL}"'
+
+
+def test_copy_insert_round_trips_empty_strings_and_nulls(engine):
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE copy_probe (id INTEGER PRIMARY KEY, label TEXT NOT NULL, note TEXT, tags TEXT[])"))
+        rows = [
+            {"id": 1, "label": "", "note": None, "tags": ["a", None]},
+            {"id": 2, "label": "x,\"y\"\nz", "note": "", "tags": []},
+        ]
+        inserted_keys = []
+        assert copy_insert(connection, "copy_probe", rows, ["id", "label", "note", "tags"], ("id",),
+                           inserted_keys=inserted_keys) == (2, 0)
+        assert sorted(inserted_keys) == [1, 2]
+        assert copy_insert(connection, "copy_probe", rows[:1], ["id", "label", "note", "tags"], ("id",)) == (0, 1)
+        stored = connection.execute(text("SELECT id, label, note, tags FROM copy_probe ORDER BY id")).all()
+    assert [tuple(row) for row in stored] == [(1, "", None, ["a", None]), (2, "x,\"y\"\nz", "", [])]
+
+
+def test_copy_update_only_touches_changed_rows(engine):
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE update_probe (id TEXT PRIMARY KEY, a TEXT, b INTEGER)"))
+        connection.execute(text("INSERT INTO update_probe VALUES ('k1', 'same', 1), ('k2', 'old', 2)"))
+        updated = copy_update(connection, "update_probe", "id", ["a", "b"], [("k1", "same", 1), ("k2", "new", None)])
+        stored = connection.execute(text("SELECT id, a, b FROM update_probe ORDER BY id")).all()
+    assert updated == 1
+    assert [tuple(row) for row in stored] == [("k1", "same", 1), ("k2", "new", None)]
@@ -0,0 +1,13 @@
+from game_extraction import extract_game
+from game_factory import chess_com_game
+
+
+def test_extract_game_reads_tags_in_any_case():
+    game = chess_com_game("g1", "alice", "bob", result="0-1", date=(2024, 3, 9), eco="B01")
+    game["pgn"] = game["pgn"].replace("[Date ", "[date ").replace("[Result ", "[RESULT ").replace("[ECO ", "[eco ")
+
+    row = extract_game(game)
+    assert str(row["date_time"]).startswith("2024-03-09")
+    assert row["result"] == "0-1"
+    assert row["winner"] == "black"
+    assert row["eco"] == "B01"
@@ -0,0 +1,41 @@
+import requests
+
+from http_cache import ArchiveCache
+
+URL = "https://api.chess.com/pub/player/alice/games/2024/01"
+
+
+def response_with(headers):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(headers)
+    return response
+
+
+def test_validators_survive_a_save_and_reload(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ArchiveCache(path)
+    assert URL not in cache and cache.conditional_headers(URL) == {}
+
+    cache.update(URL, response_with({"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+    cache.update(URL + "/other", response_with({}))
+    cache.confirm([URL, URL + "/other"])
+    cache.save()
+
+    reloaded = ArchiveCache(path)
+    assert URL in reloaded and URL + "/other" not in reloaded
+    assert reloaded.conditional_headers(URL) == {"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+
+def test_unconfirmed_validators_are_not_saved(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ArchiveCache(path)
+    cache.update(URL, response_with({"ETag": '"abc"'}))
+    cache.save()
+    assert URL not in ArchiveCache(path)
+
+
+def test_unreadable_cache_starts_empty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert URL not in ArchiveCache(str(path))
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+import requests
+from sqlalchemy import text
+
+from game_extraction import extract_game
+from http_cache import ArchiveCache
+from game_factory import chess_com_game
+
+
+def test_flush_batch_stores_games_with_the_opening_tree_root(engine):
+    from scripts.connection_to_database import flush_batch
+
+    batch = [
+        extract_game(chess_com_game("g1", "Alice", "bob", result="1-0")),
+        extract_game(chess_com_game("g2", "carol", "alice", result="1/2-1/2", date=(2024, 2, 3))),
+    ]
+    assert flush_batch("alice", batch, {}) == 2
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM games")).scalar() == 2
+        # The root node's path is the empty string, which must not read back as NULL
+        roots = connection.execute(text("""
+            SELECT color, path, depth, games, wins, draws FROM opening_tree
+            WHERE player_id = 'alice' AND depth = 0 ORDER BY color
+        """)).all()
+    assert [tuple(root) for root in roots] == [("black", "", 0, 1, 0, 1), ("white", "", 0, 1, 1, 0)]
+
+
+def test_flush_batch_skips_games_already_stored(engine):
+    from scripts.connection_to_database import flush_batch
+
+    game = chess_com_game("g1", "alice", "bob")
+    assert flush_batch("alice", [extract_game(game)], {}) == 1
+    assert flush_batch("alice", [extract_game(game)], {}) == 0
+
+    with engine.connect() as connection:
+        root_games = connection.execute(text(
+            "SELECT games FROM opening_tree WHERE player_id = 'alice' AND color = 'white' AND path = ''")).scalar()
+    assert root_games == 1
+
+
+def test_process_player_games_raises_when_a_flush_fails(engine, monkeypatch, tmp_path):
+    from scripts import connection_to_database as ingest
+
+    archive_url = "https://api.chess.com/pub/player/alice/games/2024/01"
+    monkeypatch.setattr(ingest, "fetch_all_game_urls", lambda player_name: [archive_url])
+    monkeypatch.setattr(ingest, "iter_archives", lambda urls, *args: iter([(archive_url, [chess_com_game("g1", "alice", "bob")])]))
+    monkeypatch.setattr(ingest, "player_data_dir", lambda player_name: str(tmp_path))
+
+    def failing_flush(player_name, batch, month_stats):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(ingest, "flush_batch", failing_flush)
+    # A failed flush must not look like a successful ingest of zero games
+    with pytest.raises(RuntimeError, match="database went away"):
+        ingest.process_player_games("alice", max_workers=1, requests_per_second=0)
+
+
+def test_iter_archives_collects_failed_downloads(monkeypatch):
+    from scripts import connection_to_database as ingest
+
+    def fetch_games_data(archive_url, cache=None):
+        if archive_url.endswith("02"):
+            raise requests.exceptions.HTTPError("502 Server Error")
+        return []
+
+    monkeypatch.setattr(ingest, "fetch_games_data", fetch_games_data)
+    urls = [f"https://api.chess.com/pub/player/alice/games/2024/{month:02d}" for month in (1, 2, 3)]
+    failed_urls = []
+    fetched = dict(ingest.iter_archives(urls, max_workers=2, rate_limiter=ingest.TokenBucket(0), failed_urls=failed_urls))
+    assert sorted(fetched) == [urls[0], urls[2]]
+    assert failed_urls == [urls[1]]
+
+
+def test_fetch_all_game_urls_raises_on_http_errors(monkeypatch):
+    from scripts import connection_to_database as ingest
+
+    response = requests.Response()
+    response.status_code = 404
+    monkeypatch.setattr(ingest, "api_get", lambda url, headers=None: response)
+    # An unknown player or an API outage is a failure, not a player without games
+    with pytest.raises(requests.exceptions.HTTPError):
+        ingest.fetch_all_game_urls("nobody")
+
+
+def test_flush_batch_keeps_game_ids_unique_across_dates(engine):
+    from scripts.connection_to_database import flush_batch
+
+    assert flush_batch("alice", [extract_game(chess_com_game("g1", "alice", "bob", date=(2024, 1, 31)))], {}) == 1
+    # The same game under another date (another partition) is not stored a second time
+    assert flush_batch("alice", [extract_game(chess_com_game("g1", "alice", "bob", date=(2024, 2, 1)))], {}) == 0
+    with engine.begin() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM games WHERE game_id = 'g1'")).scalar() == 1
+        # Deleting the game releases its id, so it can be ingested again
+        connection.execute(text("DELETE FROM games WHERE game_id = 'g1'"))
+        assert connection.execute(text("SELECT COUNT(*) FROM game_ids")).scalar() == 0
+    assert flush_batch("alice", [extract_game(chess_com_game("g1", "alice", "bob", date=(2024, 2, 1)))], {}) == 1
+
+
+def test_process_player_games_keeps_validators_only_for_committed_archives(engine, monkeypatch, tmp_path):
+    from scripts import connection_to_database as ingest
+
+    archive_url = "https://api.chess.com/pub/player/alice/games/2024/01"
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["ETag"] = '"v1"'
+    response._content = json.dumps({"games": [chess_com_game("g1", "alice", "bob")]}).encode()
+    monkeypatch.setattr(ingest, "fetch_all_game_urls", lambda player_name: [archive_url])
+    monkeypatch.setattr(ingest, "api_get", lambda url, headers=None: response)
+    monkeypatch.setattr(ingest, "player_data_dir", lambda player_name: str(tmp_path))
+    cache_path = str(tmp_path / "alice_http_cache.json")
+
+    flush_batch = ingest.flush_batch
+
+    def failing_flush(player_name, batch, month_stats):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(ingest, "flush_batch", failing_flush)
+    with pytest.raises(RuntimeError):
+        ingest.process_player_games("alice", max_workers=1, requests_per_second=0)
+    # A 304 next time would mark the month done without its games ever having been stored
+    assert archive_url not in ArchiveCache(cache_path)
+
+    monkeypatch.setattr(ingest, "flush_batch", flush_batch)
+    assert ingest.process_player_games("alice", max_workers=1, requests_per_second=0) == 1
+    assert ArchiveCache(cache_path).conditional_headers(archive_url) == {"If-None-Match": '"v1"'}
+
+
+def test_flush_batch_counts_a_shared_game_for_both_players(engine):
+    from scripts.connection_to_database import flush_batch
+
+    game = chess_com_game("g1", "alice", "bob", result="0-1")
+    # Stored while ingesting bob, then seen again while ingesting alice
+    assert flush_batch("bob", [extract_game(game)], {}) == 1
+    assert flush_batch("alice", [extract_game(game)], {}) == 0
+
+    with engine.connect() as connection:
+        roots = connection.execute(text(
+            "SELECT player_id, color, games, wins, losses FROM opening_tree WHERE depth = 0 ORDER BY player_id")).all()
+    assert [tuple(root) for root in roots] == [("alice", "white", 1, 0, 1), ("bob", "black", 1, 1, 0)]
@@ -0,0 +1,19 @@
+import batch_ingest
+import main
+
+
+def test_batch_mode_defaults_leave_out_visualize():
+    assert main.parse_args(["--players", "alice,bob"]).stages == main.DEFAULT_BATCH_STAGES
+    assert main.parse_args(["alice"]).stages == main.DEFAULT_STAGES
+    assert main.parse_args(["--players", "alice", "--stages", "ingest,visualize"]).stages == ["ingest", "visualize"]
+
+
+def test_batch_mode_visualizes_each_ingested_player(monkeypatch):
+    results = [{"player": "alice", "status": "ok"}, {"player": "bob", "status": "failed"}]
+    monkeypatch.setattr(batch_ingest, "run_batch", lambda usernames, stages, options, processes: results)
+    monkeypatch.setattr(batch_ingest, "print_summary", lambda results, stages, summary_file: None)
+    calls = []
+    monkeypatch.setattr(main, "run_pipeline", lambda username, stages, options: calls.append((username, stages)))
+
+    main.run_batch_mode(main.parse_args(["--players", "alice,bob", "--stages", "ingest,analyze,visualize"]))
+    assert calls == [(None, ["analyze"]), ("alice", ["visualize"])]
@@ -0,0 +1,39 @@
+import json
+import os
+
+import archive_store
+from game_factory import chess_com_game
+from scripts import migrate_archives
+
+
+def write_legacy_archive(root, player, games):
+    data_dir = os.path.join(root, player)
+    os.makedirs(data_dir)
+    path = archive_store.archive_filename(data_dir, player, 2024, 1, archive_store.LEGACY_SUFFIX)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(games, f, indent=4)
+    return data_dir, path
+
+
+def test_migrate_player_replaces_legacy_json(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive_store, "ARCHIVE_ROOT", str(tmp_path))
+    games = [chess_com_game("g1", "alice", "bob"), chess_com_game("g2", "bob", "alice")]
+    data_dir, legacy_path = write_legacy_archive(str(tmp_path), "alice", games)
+
+    converted, before, after = migrate_archives.migrate_player("alice")
+    assert (converted, before > after > 0) == (1, True)
+    assert os.listdir(data_dir) == ["alice_games_2024_01.ndjson.gz"]
+    assert list(archive_store.iter_archive(archive_store.find_archive(data_dir, "alice", 2024, 1))) == games
+
+
+def test_migrate_player_keeps_only_the_original_on_a_count_mismatch(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive_store, "ARCHIVE_ROOT", str(tmp_path))
+    data_dir, legacy_path = write_legacy_archive(str(tmp_path), "alice", [chess_com_game("g1", "alice", "bob")])
+    read_archive = archive_store.iter_archive
+    # The converted copy reads back one game short
+    monkeypatch.setattr(migrate_archives, "iter_archive",
+                        lambda path: iter([]) if path.endswith(archive_store.ARCHIVE_SUFFIX) else read_archive(path))
+
+    assert migrate_archives.migrate_player("alice") == (0, 0, 0)
+    assert os.listdir(data_dir) == [os.path.basename(legacy_path)]
+    assert archive_store.find_archive(data_dir, "alice", 2024, 1) == legacy_path
@@ -0,0 +1,52 @@
+import datetime
+
+from sqlalchemy import text
+
+from partitions import create_month_partitions
+from schema_migrations import LATEST_VERSION, migrate
+
+
+def test_migrate_is_a_no_op_once_current(engine):
+    assert migrate(engine) == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() == LATEST_VERSION
+
+
+def test_text_winner_is_converted_from_results_and_usernames(engine):
+    from scripts.migrate_player_keys import migrate_player_keys
+
+    # A database from before the players dimension: usernames in games, winner as text, the PGN inline or moved
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+    migrate(engine, target=7)
+    with engine.begin() as connection:
+        connection.execute(text("""
+            ALTER TABLE games ALTER COLUMN winner TYPE TEXT,
+                ADD COLUMN white_player_id TEXT, ADD COLUMN black_player_id TEXT, ADD COLUMN pgn TEXT
+        """))
+        create_month_partitions(connection, [datetime.date(2024, 1, 1)])
+        connection.execute(text("""
+            INSERT INTO games (game_id, date_time, white_player_id, black_player_id, winner, pgn) VALUES
+                ('draw', '2024-01-02', 'Alice', 'Bob', 'Bob', NULL),
+                ('inline', '2024-01-02', 'Alice', 'Bob', 'Bob', '[Event "Live Chess"]\n[Result "0-1"]\n\n1. f3 e5 0-1'),
+                ('white', '2024-01-02', 'Alice', 'Bob', 'alice', NULL),
+                ('no_pgn', '2024-01-02', 'Alice', 'Bob', 'Bob', NULL)
+        """))
+        connection.execute(text("""INSERT INTO game_pgns (game_id, pgn) VALUES ('draw', '[Result "1/2-1/2"]\n\n1. e4 1/2-1/2')"""))
+
+    assert migrate(engine) == list(range(8, LATEST_VERSION + 1))
+    with engine.connect() as connection:
+        winners = dict(connection.execute(text("SELECT game_id, winner::TEXT FROM games")).all())
+        result = connection.execute(text("SELECT result FROM games WHERE game_id = 'draw'")).scalar()
+    # A legacy draw was stored as the black username; only the Result tag tells it apart from a black win
+    assert winners == {"draw": "draw", "inline": "black", "white": "white", "no_pgn": None}
+    assert result == "1/2-1/2"
+
+    assert migrate_player_keys() == 4
+    with engine.connect() as connection:
+        outcomes = dict(connection.execute(text("""
+            SELECT pg.game_id, pg.outcome FROM player_games pg JOIN players p ON p.player_key = pg.player_key
+            WHERE p.handle = 'alice'
+        """)).all())
+    assert outcomes == {"draw": "D", "inline": "L", "white": "W", "no_pgn": None}
@@ -0,0 +1,42 @@
+import os
+
+from opening_classifier import OPENING, build_opening_trie, classify_moves, load_opening_trie, normalize_san
+
+SHEET = "ECO,name,moves\nC20,King's Pawn Game,e4 e5\nC40,King's Knight Opening,e4 e5 Nf3\nC99,Duplicate,e4 e5\nB20,Sicilian,e4 c5\nC41,Check line,e4 e5 Qh5+\n"
+
+
+def write_sheet(tmp_path):
+    sheet = tmp_path / "openings.csv"
+    sheet.write_text(SHEET, encoding="utf-8")
+    return str(sheet)
+
+
+def test_normalize_san_drops_annotations():
+    assert normalize_san("Qa4+!?") == "Qa4"
+    assert normalize_san("Nf3") == "Nf3"
+
+
+def test_trie_keeps_the_first_row_for_a_sequence(tmp_path):
+    trie = build_opening_trie(write_sheet(tmp_path))
+    assert trie["e4"]["e5"][OPENING] == ("C20", "King's Pawn Game")
+    assert "Qh5" in trie["e4"]["e5"]
+
+
+def test_classify_moves_returns_the_deepest_named_opening(tmp_path):
+    trie = build_opening_trie(write_sheet(tmp_path))
+    assert classify_moves(["e4", "e5", "Nf3", "Nc6"], trie) == ("C40", "King's Knight Opening", 3)
+    assert classify_moves(["e4", "e5", "Qh5", "Nc6"], trie) == ("C41", "Check line", 3)
+    assert classify_moves(["e4", "d5"], trie) == (None, None, 0)
+    assert classify_moves(["d4"], trie) == (None, None, 0)
+
+
+def test_load_opening_trie_caches_until_the_sheet_changes(tmp_path):
+    sheet = write_sheet(tmp_path)
+    cache = str(tmp_path / "trie.pickle")
+    assert load_opening_trie(sheet, cache) == build_opening_trie(sheet)
+    assert os.path.exists(cache)
+    assert load_opening_trie(sheet, cache) is load_opening_trie(sheet, cache)
+
+
+def test_classify_moves_uses_the_bundled_sheet():
+    assert classify_moves(["e4", "c5"]) == ("B20", "Sicilian Defense; B20", 2)
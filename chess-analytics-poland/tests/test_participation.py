@@ -0,0 +1,27 @@
+from sqlalchemy import text
+
+from aggregates import refresh_aggregates
+from game_extraction import extract_game
+from game_factory import chess_com_game
+
+
+def outcomes(connection):
+    return dict(connection.execute(text("""
+        SELECT p.handle, pg.outcome FROM player_games pg JOIN players p ON p.player_key = pg.player_key
+    """)).all())
+
+
+def test_updates_only_resync_games_whose_participation_changed(engine):
+    from scripts.connection_to_database import flush_batch
+
+    flush_batch("alice", [extract_game(chess_com_game("g1", "alice", "bob", result="1-0"))], {})
+    with engine.begin() as connection:
+        refresh_aggregates(connection)
+        # A backfill of a column player_games doesn't carry leaves it and the aggregate change log alone
+        connection.execute(text("UPDATE games SET book_opening = 'Italian Game', termination = 'resigned'"))
+        assert connection.execute(text("SELECT COUNT(*) FROM player_games_changes")).scalar() == 0
+        assert outcomes(connection) == {"alice": "W", "bob": "L"}
+
+        connection.execute(text("UPDATE games SET winner = 'draw'"))
+        assert outcomes(connection) == {"alice": "D", "bob": "D"}
+        assert connection.execute(text("SELECT COUNT(*) FROM player_games_changes")).scalar() > 0
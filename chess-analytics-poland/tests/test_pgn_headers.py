@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import pgn_headers
+from pgn_headers import header_value, scan_header_column, scan_headers
+
+PGN = '[Event "Live Chess"]\n[date "2024.01.02"]\n[ECO "B01"]\n[Note "say \\"hi\\""]\n\n1. e4 {[Date "1999.01.01"]} d5 1-0\n'
+# A header-like line inside a multi-line movetext comment
+COMMENT_PGN = '[Event "Live Chess"]\n\n1. e4 {\n[Date "1999.01.01"]} e5 1-0\n'
+
+
+def test_scan_headers_reads_only_the_header_block():
+    assert scan_headers(PGN) == {"Event": "Live Chess", "date": "2024.01.02", "ECO": "B01", "Note": 'say \\"hi\\"'}
+    assert scan_headers(COMMENT_PGN) == {"Event": "Live Chess"}
+    assert scan_headers(None) == {}
+
+
+def test_tags_match_case_insensitively():
+    assert scan_headers(PGN, ["Date", "eco", "Result"]) == {"Date": "2024.01.02", "eco": "B01"}
+    assert header_value(PGN, "Date") == "2024.01.02"
+    assert header_value(PGN, "DATE") == "2024.01.02"
+
+
+def test_header_value_ignores_movetext_and_longer_tag_names():
+    assert header_value(COMMENT_PGN, "Date") is None
+    assert header_value('[ECOUrl "https://x"]\n[ECO "C44"]', "ECO") == "C44"
+    assert header_value(PGN, "Result", "unknown") == "unknown"
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_scan_header_column_matches_header_value(monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(pgn_headers, "pc", None)
+    pgns = pd.Series([PGN, COMMENT_PGN, None, '[Date "2020.1.1"]'], index=[10, 11, 12, 13])
+    frame = scan_header_column(pgns, ["Date", "ECO"])
+    assert list(frame.index) == [10, 11, 12, 13]
+    assert frame.to_dict("list") == {"Date": ["2024.01.02", None, None, "2020.1.1"], "ECO": ["B01", None, None, None]}
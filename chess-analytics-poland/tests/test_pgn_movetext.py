@@ -0,0 +1,24 @@
+from game_factory import movetext
+from pgn_movetext import clock_deciseconds, tokenize_movetext
+
+
+def test_clock_deciseconds():
+    assert clock_deciseconds("0:03:00") == 1800
+    assert clock_deciseconds("1:00:00.5") == 36005
+
+
+def test_chess_com_movetext_takes_the_fast_path():
+    tokens = tokenize_movetext(movetext(["e4", "e5", "Nf3"], "1-0", clock="0:02:59.9"))
+    assert tokens == (["e4", "e5", "Nf3"], [1799, 1799, 1799], 3)
+
+
+def test_generic_movetext_skips_comments_variations_and_nags():
+    text = "1. e4 {[%clk 0:03:00]} e5 $1 (1... c5 2. Nf3) 2. Nf3 {good move} Nc6 ; rest of line\n3. Bb5 1-0"
+    tokens = tokenize_movetext(text)
+    assert tokens.moves == ["e4", "e5", "Nf3", "Nc6", "Bb5"]
+    assert tokens.clocks == [1800, None, None, None, None]
+    assert tokens.plies == 5
+
+
+def test_empty_movetext():
+    assert tokenize_movetext("*") == ([], [], 0)
@@ -0,0 +1,42 @@
+import chess
+import pytest
+
+from position_index import HASH_OFFSET, fen_hash, position_hash, replay_positions, to_bigint
+
+
+def test_to_bigint_covers_the_signed_range():
+    assert to_bigint(0) == -HASH_OFFSET
+    assert to_bigint((1 << 64) - 1) == HASH_OFFSET - 1
+
+
+@pytest.mark.parametrize("moves", [
+    # En passant for both sides, a promotion and kingside castling
+    ["e4", "d5", "exd5", "c5", "dxc6", "Nf6", "cxb7", "e6", "bxa8=Q", "Be7", "Nf3", "O-O", "Bc4", "Nc6", "O-O",
+     "Qd7", "Qxc8", "Rxc8", "d4", "a5", "Re1", "a4", "b4", "axb3"],
+    # Queenside castling
+    ["d4", "d5", "Nc3", "Nc6", "Bf4", "Bf5", "Qd2", "Qd7", "O-O-O", "O-O-O"],
+])
+def test_incremental_hashes_match_full_hashes(moves):
+    board = chess.Board()
+    expected = []
+    for ply, san in enumerate(moves, 1):
+        board.push_san(san)
+        expected.append((position_hash(board), "g1", ply))
+    assert replay_positions(("g1", moves)) == ("g1", expected)
+
+
+def test_replay_keeps_the_first_ply_of_repeated_positions_and_stops_at_illegal_moves():
+    game_id, rows = replay_positions(("g1", ["Nf3", "Nf6", "Ng1", "Ng8", "Nf3", "Nf6", "e3", "Kxe1"]))
+    assert [ply for _, _, ply in rows] == [1, 2, 3, 4, 7]
+    assert rows[1][0] == fen_hash("rnbqkb1r/pppppppp/5n2/8/8/5N2/PPPPPPPP/RNBQKB1R w KQkq - 2 2")
+
+
+def test_transpositions_share_a_hash():
+    a = replay_positions(("a", ["e4", "e5", "Nf3"]))[1][-1][0]
+    b = replay_positions(("b", ["Nf3", "e5", "e4"]))[1][-1][0]
+    assert a == b
+
+
+def test_fen_hash_rejects_invalid_fens():
+    with pytest.raises(ValueError):
+        fen_hash("not a fen")
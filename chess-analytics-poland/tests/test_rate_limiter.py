@@ -0,0 +1,22 @@
+import time
+
+from rate_limiter import SharedTokenBucket, TokenBucket
+
+
+def timed_acquires(bucket, count):
+    start = time.monotonic()
+    for _ in range(count):
+        bucket.acquire()
+    return time.monotonic() - start
+
+
+def test_zero_rate_never_blocks():
+    assert timed_acquires(TokenBucket(0), 1000) < 0.5
+    assert timed_acquires(SharedTokenBucket(0), 1000) < 0.5
+
+
+def test_bucket_allows_a_burst_then_paces_requests():
+    for bucket in (TokenBucket(20, capacity=5), SharedTokenBucket(20, capacity=5)):
+        assert timed_acquires(bucket, 5) < 0.05
+        # The next five need 5 / 20 s of refill
+        assert 0.2 <= timed_acquires(bucket, 5) < 1.0